@@ -0,0 +1,189 @@
+"""
+Incremental store of per-(dog, date, session) outcome counts.
+
+Every loaded frame (one workbook or one log) is reduced once to a small table with one row per
+session and one column per score label. The tables are kept by content digest, in memory (up to
+MEMORY_MB, least recently used first out) and as Arrow files in a subfolder of the workbook cache
+(bounded and cleared with it, see excel_cache.prune_folder), so a frame that was seen before (in
+this run or an earlier one) is not counted again. "By Sessions" and "All Together" are then summed from these tables
+with metrics.groupping_counts, whose cost depends on the number of sessions, not of trials. Logs of
+older rigs have no session column; their trials are counted as session 0, as live_log does.
+
+Check the store against a full recompute on the bundled workbooks, and against live_log on logs
+without a session column, with:  python aggregate_store.py
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from excel_cache import CACHE_DIR, prune_folder, touch
+from instrumentation import timed
+from metrics import SCORE_COL, groupping, groupping_counts
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # without pyarrow the store only lives in memory
+    feather = None
+
+SESSION_KEYS = ['dog_name', 'date', 'num_session']
+AGGREGATE_DIR = os.path.join(CACHE_DIR, 'aggregates')  # one of excel_cache.DERIVED_DIRS
+# Bump when session_counts changes so the stored tables of an earlier version are not reused
+AGGREGATE_VERSION = 2
+MEMORY_MB = 64
+
+
+def frame_digest(df):
+    """Stable content hash of a loaded frame."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    return f"{int(row_hashes.sum()) & 0xFFFFFFFFFFFFFFFF:016x}{len(df):x}"
+
+
+def with_session(df):
+    """df with a num_session column: logs of older rigs have none, their trials are session 0 (as in live_log)."""
+    return df if 'num_session' in df.columns else df.assign(num_session=0)
+
+
+def session_counts(df):
+    """Count every score label per (dog, date, session) of one frame."""
+    df = with_session(df).reindex(columns=list(dict.fromkeys(SESSION_KEYS + [SCORE_COL])))
+    counts = df.groupby(SESSION_KEYS + [SCORE_COL], observed=True, dropna=False).size()
+    counts = counts[counts.index.get_level_values(SCORE_COL).notna()]
+    counts = counts.unstack(SCORE_COL, fill_value=0)
+    counts.columns = counts.columns.astype(str)
+    return counts
+
+
+class AggregateStore:
+    def __init__(self, store_dir=AGGREGATE_DIR, memory_mb=MEMORY_MB):
+        self.store_dir = store_dir
+        self.max_bytes = memory_mb * 1024 * 1024
+        self.tables = OrderedDict()  # digest -> counts, least recently used first
+        self.lock = threading.Lock()  # the Streamlit sessions share the store
+
+    def _path(self, digest):
+        return os.path.join(self.store_dir, f"{digest}.v{AGGREGATE_VERSION}.arrow")
+
+    def _remember(self, digest, counts):
+        with self.lock:
+            self.tables[digest] = counts
+            self.tables.move_to_end(digest)
+            total = sum(int(table.memory_usage(index=True).sum()) for table in self.tables.values())
+            while total > self.max_bytes and len(self.tables) > 1:
+                _, table = self.tables.popitem(last=False)
+                total -= int(table.memory_usage(index=True).sum())
+
+    def counts(self, df):
+        """Per-session counts of one frame, counted only when this content was not counted before."""
+        digest = frame_digest(df)
+        with self.lock:
+            counts = self.tables.get(digest)
+            if counts is not None:
+                self.tables.move_to_end(digest)
+                return counts
+        path = self._path(digest)
+        if feather is not None and os.path.exists(path):
+            try:
+                counts = feather.read_table(path).to_pandas().set_index(SESSION_KEYS)
+                touch(path)
+            except OSError:
+                counts = None  # evicted by another process meanwhile
+        if counts is None:
+            counts = session_counts(df)
+            if feather is not None:
+                try:
+                    os.makedirs(self.store_dir, exist_ok=True)
+                    fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.tmp')
+                    os.close(fd)
+                    feather.write_feather(counts.reset_index(), tmp_path, compression='uncompressed')
+                    os.replace(tmp_path, path)
+                    prune_folder(self.store_dir)
+                except OSError:
+                    pass  # the in-memory table is enough for this run
+        self._remember(digest, counts)
+        return counts
+
+
+def combined_counts(tables):
+    """Per-session counts of several frames (a frame listed twice is counted twice)."""
+    if not tables:
+        return pd.DataFrame()
+    counts = pd.concat(tables).fillna(0)
+    return counts.groupby(level=SESSION_KEYS, sort=True, observed=True, dropna=False).sum().astype('int64')
+
+
+_default_store = None
+
+
+def get_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = AggregateStore()
+    return _default_store
+
+
+@timed('session_counts', rows=len)
+def session_counts_for(dataframes):
+    """Count the loaded frames through the shared store and return their combined per-session counts."""
+    store = get_store()
+    return combined_counts([store.counts(df) for df in dataframes])
+
+
+def check_consistency(df, counts):
+    """Compare the frames derived from the store with a full groupping() of the raw trials."""
+    df = with_session(df)
+    for group_by_lst in (SESSION_KEYS, ['dog_name']):
+        expected = groupping(df, group_by_lst)
+        derived = groupping_counts(counts, group_by_lst)
+        for exp, got in zip(expected, derived):
+            cols = group_by_lst + [SCORE_COL, 'count', 'hit_rate', 'fa_rate', 'd_prime']
+            pd.testing.assert_frame_equal(exp[cols], got[cols], check_dtype=False, check_categorical=False)
+
+
+def check_sessionless_log(path):
+    """A log without a session column (older rigs, like the bundled Ruff log): the store agrees with live_log."""
+    from live_log import LogFollower
+
+    follower = LogFollower(path)
+    log = follower.poll()
+    assert 'num_session' not in log.columns
+    check_consistency(log, session_counts_for([log]))
+    rates = ['hit_rate', 'fa_rate', 'd_prime']
+    live = follower.session_table().set_index(SESSION_KEYS)[rates]
+    stored = groupping_counts(session_counts_for([log]), SESSION_KEYS)[0].set_index(SESSION_KEYS)[rates]
+    pd.testing.assert_frame_equal(live, stored, check_dtype=False, check_index_type=False, check_categorical=False)
+    print(f"Aggregate store matches live_log for the {len(log)} trial(s) of {os.path.basename(path)}")
+
+
+def without_session(path, copy_path):
+    """Copy of a log with its num_session field removed from every line."""
+    with open(path, 'rb') as f:
+        lines = [line.split(b';') for line in f.read().splitlines(keepends=True)]
+    session = [cell.strip() for cell in lines[0]].index(b'num_session')
+    with open(copy_path, 'wb') as f:
+        f.writelines(b';'.join(cells[:session] + cells[session + 1:]) for cells in lines)
+    return copy_path
+
+
+def main():
+    from workbook_loader import load_workbooks
+    from preprocessing import combine_frames
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                   if name.startswith('North.data') and name.endswith('.xlsx'))
+    dataframes, errors = load_workbooks(paths)
+    for name, e in errors:
+        print(f"Failed to load {name}: {e}")
+    check_consistency(combine_frames(dataframes), session_counts_for(dataframes))
+    print(f"Aggregate store matches the full recompute for {len(dataframes)} workbook(s)")
+    check_sessionless_log(os.path.join(folder, 'Ruff_dog_1_new Experiment.txt'))
+    with tempfile.TemporaryDirectory() as log_folder:
+        name = 'Wuff_dog_1_new Experiment.txt'
+        check_sessionless_log(without_session(os.path.join(folder, name), os.path.join(log_folder, name)))
+
+
+if __name__ == '__main__':
+    main()
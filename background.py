@@ -0,0 +1,128 @@
+"""
+Run the Tk app's loading and analysis off the Tk main loop.
+
+Tasks are queued and run one after the other on a single worker thread, so a second analysis (for
+example another bin size) can be queued while the first one renders, and an analysis queued after a
+load always sees the loaded data. The worker never touches Tk: progress, results and errors are put
+on a queue that the main loop drains every POLL_MS milliseconds with root.after, and the callbacks
+run there.
+
+Cancelling is cooperative: a task calls task.check() (or task.progress(), which checks) between
+its stages and stops with Cancelled once cancel_all() was called.
+"""
+import queue
+import threading
+
+POLL_MS = 50
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Task:
+    def __init__(self, name, func, on_done=None, on_error=None):
+        self.name = name
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancel_event = threading.Event()
+        self.events = None  # the runner's event queue, set on submit
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise Cancelled(self.name)
+
+    def progress(self, done, total, text=''):
+        """Report progress from the worker (shown by the runner's on_progress) and stop if cancelled."""
+        self.events.put(('progress', self, (done, total, text)))
+        self.check()
+
+
+class TaskRunner:
+    """
+    on_progress(task, done, total, text) and on_state(running task or None, number queued) are called
+    on the Tk main loop; on_done(result) / on_error(exception) of a task as well.
+    """
+
+    def __init__(self, root, on_progress=None, on_state=None):
+        self.root = root
+        self.on_progress = on_progress
+        self.on_state = on_state
+        self.tasks = queue.Queue()
+        self.events = queue.Queue()
+        self.pending = []  # queued tasks, oldest first (for the display and cancel)
+        self.running = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._work, name='analysis-worker', daemon=True)
+        self.thread.start()
+        self.root.after(POLL_MS, self._poll)
+
+    def submit(self, name, func, on_done=None, on_error=None):
+        """Queue func(task); its result goes to on_done, an exception other than Cancelled to on_error."""
+        task = Task(name, func, on_done, on_error)
+        task.events = self.events
+        with self.lock:
+            self.pending.append(task)
+        self.tasks.put(task)
+        self._notify_state()
+        return task
+
+    def cancel_all(self):
+        """Cancel the running task and everything queued behind it."""
+        with self.lock:
+            for task in self.pending + [self.running]:
+                if task is not None:
+                    task.cancel_event.set()
+
+    def busy(self, name=None):
+        """Whether a task (with this name) is running or queued."""
+        with self.lock:
+            tasks = self.pending + ([self.running] if self.running is not None else [])
+        return any(name is None or task.name == name for task in tasks)
+
+    def _work(self):
+        while True:
+            task = self.tasks.get()
+            with self.lock:
+                self.pending.remove(task)
+                self.running = task
+            self.events.put(('state', task, None))
+            try:
+                task.check()
+                self.events.put(('done', task, task.func(task)))
+            except Cancelled:
+                self.events.put(('cancelled', task, None))
+            except Exception as e:
+                self.events.put(('error', task, e))
+            finally:
+                with self.lock:
+                    self.running = None
+                self.events.put(('state', None, None))
+
+    def _poll(self):
+        try:
+            self._drain()
+        finally:
+            self.root.after(POLL_MS, self._poll)  # keep polling even if a callback failed
+
+    def _drain(self):
+        try:
+            while True:
+                kind, task, value = self.events.get_nowait()
+                if kind == 'progress' and self.on_progress is not None:
+                    self.on_progress(task, *value)
+                elif kind == 'done' and task.on_done is not None:
+                    task.on_done(value)
+                elif kind == 'error' and task.on_error is not None:
+                    task.on_error(value)
+                elif kind in ('state', 'cancelled'):
+                    self._notify_state()
+        except queue.Empty:
+            pass
+
+    def _notify_state(self):
+        if self.on_state is not None:
+            with self.lock:
+                running, queued = self.running, len(self.pending)
+            self.on_state(running, queued)
@@ -0,0 +1,261 @@
+"""
+Render the d' reports without a window: for nightly jobs and servers (no Tk, no Streamlit, no os.startfile).
+
+    python batch_report.py DATA_DIR -o reports
+    python batch_report.py "data/North.data*.xlsx" "logs/*Experiment.txt" --split dog --format html json
+
+Inputs are workbooks (.xlsx) and experiment logs (.txt), given as files, folders (every *.xlsx and
+*Experiment.txt in them) or glob patterns. They are loaded with the same preprocessing as the apps
+(workbooks in parallel, through the workbook cache), then split into report units:
+    --split none  one report over all the data: <out>/<mode>/combined_analysis.html
+    --split dog   one report per dog:           <out>/<mode>/<dog>.html
+    --split file  one report per input file:    <out>/<mode>/<file name>.html
+Unless the split is by file, a trial found in several inputs (a month that is also in the combined
+workbook) is kept in the first input only (see dedup.py); the dropped counts are printed per file.
+Every unit is rendered for every requested display mode in one pass, the units in parallel in a
+process pool. All pages of a run share one local copy of plotly.js in <out>/assets (see
+report_writer.py).
+--format json writes the grouped table (one record per group, as plotted) next to or
+instead of the HTML page.
+
+Exit codes: 0 everything was written, 1 some inputs or reports failed (the others were written),
+2 bad arguments or no data. --stats-json writes the timings and outcome for monitoring.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from aggregate_store import session_counts
+from binning import BinEngine
+from dedup import dedupe_frames, dropped_lines
+from dprime import CORRECTIONS, DEFAULT_CORRECTION
+from log_parser import dog_name_from_file, parse_log
+from preprocessing import combine_frames
+from report_figure import report_sections
+from report_writer import write_report
+from report_modes import DEFAULT_BIN_SIZE, DEFAULT_STRIDE, DEFAULT_WINDOW, MODES, mode_result
+from workbook_loader import LOAD_WORKERS, load_workbooks
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_NO_DATA = 2
+COMBINED_NAME = 'combined_analysis'
+FOLDER_PATTERNS = ('*.xlsx', '*Experiment.txt')
+
+
+def find_inputs(args):
+    """Workbook and log paths named by files, folders or glob patterns (sorted, without duplicates)."""
+    paths = []
+    for arg in args:
+        if os.path.isdir(arg):
+            matches = [path for pattern in FOLDER_PATTERNS for path in glob.glob(os.path.join(arg, pattern))]
+        elif os.path.isfile(arg):
+            matches = [arg]
+        else:
+            matches = glob.glob(arg)
+        # skip the lock files Excel leaves next to open workbooks
+        paths += sorted(path for path in matches if not os.path.basename(path).startswith('~$'))
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def is_log(path):
+    return path.lower().endswith('.txt')
+
+
+def load_inputs(paths, max_workers=LOAD_WORKERS, use_cache=True):
+    """Load every input. Returns ([(path, frame)], [(path, error)]), in the order of paths."""
+    workbooks = [path for path in paths if not is_log(path)]
+    loaded = {}
+    errors = []
+    frames, failed = load_workbooks(workbooks, max_workers=max_workers, use_cache=use_cache)
+    failed_names = {name for name, _ in failed}
+    loaded.update(zip([path for path in workbooks if path not in failed_names], frames))
+    errors += failed
+    for path in paths:
+        if is_log(path):
+            try:
+                loaded[path] = parse_log(path, dog_name=dog_name_from_file(path))
+            except Exception as e:
+                errors.append((path, e))
+    return [(path, loaded[path]) for path in paths if path in loaded], errors
+
+
+def safe_name(label):
+    """A file name for a dog or input file label."""
+    return re.sub(r'[^\w.-]+', '_', str(label)).strip('_') or 'unnamed'
+
+
+def report_units(loaded, split):
+    """(label, trials) per report: all the data, one per dog or one per input file."""
+    if split == 'file':
+        return [(os.path.splitext(os.path.basename(path))[0], combine_frames([df])) for path, df in loaded]
+    df = combine_frames([df for _, df in loaded])
+    if split == 'dog':
+        return [(str(dog), dog_df.reset_index(drop=True))
+                for dog, dog_df in df.groupby('dog_name', sort=True, observed=True)]
+    return [(COMBINED_NAME, df)]
+
+
+def render_unit(label, df, out_dir, modes, formats, split, correction=None, **params):
+    """
+    Group and render one unit for every mode (runs in a worker process). Returns its stats:
+    written files, failed modes and the seconds spent grouping and writing (figures included).
+    """
+    start = time.perf_counter()
+    stats = dict(label=label, trials=len(df), written=[], failed=[], group=0.0, write=0.0)
+    counts = session_counts(df)
+    engine = []
+
+    def get_bin_engine():
+        if not engine:
+            engine.append(BinEngine(df, order_by=['dog_name', 'date']))
+        return engine[0]
+
+    name = COMBINED_NAME if split == 'none' else safe_name(label)
+    for mode in modes:
+        try:
+            t0 = time.perf_counter()
+            res, with_duplicates, x_title, if_sessions = mode_result(mode, counts, get_bin_engine, correction,
+                                                                     **params)
+            t1 = time.perf_counter()
+            stats['group'] += t1 - t0
+            if res.empty:
+                stats['failed'].append((mode, "no data to display"))
+                continue
+            mode_dir = os.path.join(out_dir, mode)
+            os.makedirs(mode_dir, exist_ok=True)
+            if 'html' in formats:
+                # figures are built while the page is written, one dog at a time
+                path = os.path.join(mode_dir, f"{name}.html")
+                write_report(path, report_sections(res, with_duplicates, x_title, if_sessions), asset_root=out_dir)
+                stats['written'].append(path)
+            if 'json' in formats:
+                path = os.path.join(mode_dir, f"{name}.json")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(res.drop(columns='index', errors='ignore').to_json(orient='records', date_format='iso'))
+                stats['written'].append(path)
+            stats['write'] += time.perf_counter() - t1
+        except Exception as e:
+            stats['failed'].append((mode, f"{type(e).__name__}: {e}"))
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def render_all(units, workers, on_done=None, **kwargs):
+    """Render every unit, in a process pool when there are several units and workers."""
+    results = []
+    workers = min(workers or os.cpu_count() or 1, len(units))
+    if workers <= 1:
+        for label, df in units:
+            results.append(render_unit(label, df, **kwargs))
+            if on_done is not None:
+                on_done(results[-1])
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_unit, label, df, **kwargs): label for label, df in units}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:  # e.g. a worker that died
+                results.append(dict(label=futures[future], trials=0, written=[], seconds=0.0, group=0.0, write=0.0,
+                                    failed=[('*', f"{type(e).__name__}: {e}")]))
+            if on_done is not None:
+                on_done(results[-1])
+    return sorted(results, key=lambda stats: stats['label'])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write the d' reports of workbooks and logs without a window.")
+    parser.add_argument('inputs', nargs='+', help="workbooks, logs, folders or glob patterns")
+    parser.add_argument('-o', '--out', default='reports', help="output folder (default: reports)")
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES),
+                        help="display modes to render (default: all)")
+    parser.add_argument('--split', choices=('none', 'dog', 'file'), default='none',
+                        help="one report over all data (default), per dog or per input file")
+    parser.add_argument('--format', nargs='+', choices=('html', 'json'), default=['html'], dest='formats')
+    parser.add_argument('--correction', choices=CORRECTIONS, default=DEFAULT_CORRECTION,
+                        help="d' correction of rates of 0 and 1")
+    parser.add_argument('--bin-size', type=int, default=DEFAULT_BIN_SIZE)
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW)
+    parser.add_argument('--stride', type=int, default=DEFAULT_STRIDE)
+    parser.add_argument('--workers', type=int, default=LOAD_WORKERS,
+                        help="worker processes for loading and rendering (default: one per CPU)")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or fill the workbook cache")
+    parser.add_argument('--stats-json', help="write timings and outcome to this file")
+    args = parser.parse_args(argv)
+    for name in ('bin_size', 'window', 'stride'):
+        if getattr(args, name) < 1:
+            parser.error(f"--{name.replace('_', '-')} must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    stats = dict(inputs=[], load_errors=[], duplicates_dropped={}, units=[], exit_code=EXIT_NO_DATA)
+
+    paths = find_inputs(args.inputs)
+    stats['inputs'] = paths
+    if not paths:
+        print("No workbooks or logs found.", file=sys.stderr)
+        return finish(stats, args, start)
+
+    loaded, errors = load_inputs(paths, max_workers=args.workers, use_cache=not args.no_cache)
+    stats['load_errors'] = [(path, f"{type(e).__name__}: {e}") for path, e in errors]
+    for path, e in errors:
+        print(f"Failed to load {path}: {e}", file=sys.stderr)
+    stats['load_seconds'] = time.perf_counter() - start
+    print(f"Loaded {len(loaded)} of {len(paths)} file(s) in {stats['load_seconds']:.2f} s")
+    if not loaded:
+        return finish(stats, args, start)
+    if args.split != 'file':
+        # a trial in several inputs (e.g. a month and the combined workbook) is reported once
+        frames, dropped = dedupe_frames([df for _, df in loaded])
+        stats['duplicates_dropped'] = {path: n for (path, _), n in zip(loaded, dropped) if n}
+        for line in dropped_lines([path for path, _ in loaded], dropped):
+            print(f"  {line}")
+        loaded = [(path, df) for (path, _), df in zip(loaded, frames)]
+
+    units = report_units(loaded, args.split)
+    render_start = time.perf_counter()
+
+    def on_done(unit):
+        print(f"  {unit['label']}: {unit['trials']} trials, {len(unit['written'])} file(s) in "
+              f"{unit['seconds']:.2f} s" + "".join(f"\n    {mode} failed: {e}" for mode, e in unit['failed']))
+
+    stats['units'] = render_all(units, args.workers, on_done=on_done, out_dir=args.out, modes=args.modes,
+                                formats=args.formats, split=args.split, correction=args.correction,
+                                bin_size=args.bin_size, window=args.window, stride=args.stride)
+    stats['render_seconds'] = time.perf_counter() - render_start
+
+    written = sum(len(unit['written']) for unit in stats['units'])
+    failed = sum(len(unit['failed']) for unit in stats['units'])
+    stats['exit_code'] = EXIT_OK if not failed and not errors else EXIT_PARTIAL
+    if not written:
+        stats['exit_code'] = EXIT_NO_DATA
+    print(f"Rendered {len(units)} report unit(s) in {stats['render_seconds']:.2f} s: {written} file(s) written "
+          f"to {args.out}, {failed} failed")
+    return finish(stats, args, start)
+
+
+def finish(stats, args, start):
+    stats['total_seconds'] = time.perf_counter() - start
+    for stage in ('group', 'write'):
+        stats[f'{stage}_seconds'] = sum(unit[stage] for unit in stats['units'])
+    if stats['units']:
+        print("Time per stage (summed over workers): " +
+              ", ".join(f"{stage} {stats[f'{stage}_seconds']:.2f} s" for stage in ('group', 'write')) +
+              f"; total {stats['total_seconds']:.2f} s")
+    if args.stats_json:
+        with open(args.stats_json, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+    return stats['exit_code']
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Benchmark the prefix-sum bin engine (binning.BinEngine) against sort + cumcount + groupping per bin size.
+Run from the project folder: python benchmarks/bench_binning.py
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from binning import BinEngine  # noqa: E402
+from metrics import groupping, groupping_counts  # noqa: E402
+from bench_groupping import make_trials  # noqa: E402
+
+
+def old_bins(df, bin_size):
+    df_sorted = df.sort_values(by=['dog_name', 'date'], kind='stable')
+    df_sorted['bin'] = df_sorted.groupby('dog_name').cumcount() // bin_size + 1
+    return groupping(df_sorted, ['dog_name', 'bin'])
+
+
+def main():
+    for n_trials in (100_000, 300_000):
+        df = make_trials(n_trials)
+        start = time.perf_counter()
+        engine = BinEngine(df)
+        print(f"{n_trials} trials, engine built once in {time.perf_counter() - start:.3f} s")
+        print(f"{'bin size':>9} {'old [s]':>8} {'engine [s]':>11}")
+        for bin_size in (5, 10, 25, 100):
+            start = time.perf_counter()
+            expected = old_bins(df, bin_size)
+            old_t = time.perf_counter() - start
+            start = time.perf_counter()
+            got = groupping_counts(engine.bins(bin_size), ['dog_name', 'bin'])
+            new_t = time.perf_counter() - start
+            for a, b in zip(expected, got):
+                pd.testing.assert_frame_equal(a, b, check_dtype=False)
+            print(f"{bin_size:>9} {old_t:>8.3f} {new_t:>11.3f}")
+        start = time.perf_counter()
+        groupping_counts(engine.windows(50, 5), ['dog_name', 'window'])
+        print(f"moving window 50/5: {time.perf_counter() - start:.3f} s\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark bootstrap.d_prime_ci: 2000 resamples for every session of every dog of synthetic data,
+batched (one process and a process pool) against a Python loop over the resamples.
+Run from the project folder: python benchmarks/bench_bootstrap.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from aggregate_store import session_counts  # noqa: E402
+from bootstrap import N_RESAMPLES, d_prime_ci  # noqa: E402
+from dprime import z_scores  # noqa: E402
+from metrics import OUTCOMES  # noqa: E402
+from preprocessing import preprocess_excel  # noqa: E402
+from synthetic import trial_table  # noqa: E402
+
+# (dogs, sessions per dog, trials per session)
+SCALES = ((10, 50, 40), (30, 100, 40), (100, 100, 40))
+
+
+def loop_ci(hit, miss, fa, cr, n_resamples, seed=0):
+    """The same interval with one vectorized draw per resample (the loop the batched version avoids)."""
+    rng = np.random.default_rng(seed)
+    signal, noise = hit + miss, fa + cr
+    hit_rate = np.divide(hit, signal, out=np.zeros(len(hit)), where=signal > 0)
+    fa_rate = np.divide(fa, noise, out=np.zeros(len(fa)), where=noise > 0)
+    d_prime = np.empty((len(hit), n_resamples))
+    for i in range(n_resamples):
+        d_prime[:, i] = (z_scores(rng.binomial(signal, hit_rate), signal) -
+                         z_scores(rng.binomial(noise, fa_rate), noise))
+    return np.quantile(d_prime, [0.025, 0.975], axis=1)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    workers = os.cpu_count() or 1
+    print(f"{N_RESAMPLES} resamples per session, pool of {workers} worker(s)")
+    print(f"{'sessions':>9} {'loop [s]':>9} {'batched [s]':>12} {'pool [s]':>9}")
+    for n_dogs, n_sessions, n_trials in SCALES:
+        counts = session_counts(preprocess_excel(trial_table(n_dogs, n_sessions, n_trials)))
+        counts = counts.reindex(columns=OUTCOMES, fill_value=0)
+        arrays = [counts[name].to_numpy() for name in OUTCOMES]
+        loop_seconds, _ = timed(lambda: loop_ci(*arrays, N_RESAMPLES))
+        batched_seconds, (low, high) = timed(lambda: d_prime_ci(*arrays, max_workers=1))
+        pool_seconds, (pool_low, _) = timed(lambda: d_prime_ci(*arrays, max_workers=workers))
+        assert np.array_equal(low, pool_low) and (low <= high).all()
+        print(f"{len(counts):>9} {loop_seconds:>9.2f} {batched_seconds:>12.2f} {pool_seconds:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark the session boundary markers of plot_line: the old per-date filter + add_vline/add_annotation
+loop against report_figure.session_boundaries with one batched layout update.
+Run from the project folder: python benchmarks/bench_boundaries.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_figure import boundary_annotations, boundary_shapes, session_boundaries  # noqa: E402
+
+
+def sessions_frame(n_dates, sessions_per_date=3, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_dates * sessions_per_date
+    df = pd.DataFrame({
+        'date': pd.Timestamp('2020-01-01') + pd.to_timedelta(np.arange(n) // sessions_per_date, unit='D'),
+        'd_prime': rng.normal(1.5, 0.5, n),
+    })
+    df.index = df.index + 1  # like the apps
+    return df
+
+
+def old_boundaries(fig, df, y_axis):
+    df['date_id'] = df['date'].factorize()[0]
+    y_position = df[y_axis].max()
+    for date_id in df['date_id'].unique():
+        date = df.loc[df['date_id'] == date_id, 'date'].dt.strftime('%d/%m/%Y').iloc[0]
+        x_position = df.loc[df['date_id'] == date_id].iloc[0].name
+        fig.add_vline(x=x_position, line_dash='dash', line_color='rgb(211, 215, 222)')
+        fig.add_annotation(x=x_position - 0.3, y=y_position + 0.5, text=date, showarrow=False, textangle=270,
+                           font=dict(color='rgb(97, 98, 99)'))
+
+
+def new_boundaries(fig, df, y_axis):
+    positions, dates = session_boundaries(df)
+    fig.update_layout(shapes=boundary_shapes(positions, dict(color='rgb(211, 215, 222)', dash='dash')),
+                      annotations=boundary_annotations(positions, dates, df[y_axis].max() + 0.5, 0.3))
+
+
+def main():
+    print(f"{'dates':>6} {'old [s]':>9} {'new [s]':>9}")
+    for n_dates in (30, 300, 3000):
+        df = sessions_frame(n_dates)
+        times = {}
+        for name, add_boundaries in (('old', old_boundaries), ('new', new_boundaries)):
+            if name == 'old' and n_dates > 300:
+                times[name] = float('nan')  # minutes
+                continue
+            fig = px.line(df, y='d_prime')
+            start = time.perf_counter()
+            add_boundaries(fig, df.copy(), 'd_prime')
+            times[name] = time.perf_counter() - start
+            if name == 'old':
+                expected = fig.layout
+            else:
+                if n_dates <= 300:
+                    assert fig.layout.shapes == expected.shapes and fig.layout.annotations == expected.annotations
+        print(f"{n_dates:>6} {times['old']:>9.2f} {times['new']:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
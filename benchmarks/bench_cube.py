@@ -0,0 +1,75 @@
+"""
+Benchmark outcome_cube on synthetic experiment logs whose trials vary over every cube dimension: the
+build, and every roll-up of one to three dimensions (with and without a slice) summed from the cube
+against metrics.groupping on the raw trials.
+Run from the project folder: python benchmarks/bench_cube.py
+"""
+import io
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from log_parser import combine_logs, parse_log  # noqa: E402
+from metrics import groupping  # noqa: E402
+from outcome_cube import LAYOUT, PORT_COLUMNS, build_cube  # noqa: E402
+from synthetic import dog_names, log_text  # noqa: E402
+
+N_SESSIONS, N_TRIALS = 100, 40
+
+
+def trials(n_dogs, seed=0):
+    """Parsed logs of n_dogs dogs, with random levels, experiments, open ports, layouts and modes."""
+    frames = [parse_log(io.BytesIO(log_text(dog, N_SESSIONS, N_TRIALS, seed + i)), dog_name=dog)
+              for i, dog in enumerate(dog_names(n_dogs))]
+    df = combine_logs(frames)
+    rng = np.random.default_rng(seed)
+    n = len(df)
+    # level, experiment and mode change between sessions, the ports from trial to trial
+    session = df.groupby(['dog_name', 'date', 'num_session'], observed=True, sort=False).ngroup().to_numpy()
+    n_sessions = session.max() + 1
+    levels = rng.integers(0, 4, n_sessions)[session]
+    df['Level identity'] = pd.Categorical.from_codes(levels, [f'level_{i}' for i in range(1, 5)])
+    experiments = rng.integers(0, 2, n_sessions)[session]
+    df['Exp name'] = pd.Categorical.from_codes(experiments, ['Experiment', 'new Experiment'])
+    df['continuous_mode(0,1)'] = (rng.random(n_sessions) < 0.5)[session]
+    df['Open_port(1,2,3)'] = rng.integers(1, 4, n).astype('int8')
+    target = rng.integers(0, 3, n)
+    for i, name in enumerate(PORT_COLUMNS):
+        df[name] = np.where(target == i, 1, rng.choice([0, -1], n)).astype('int8')
+    return df
+
+
+def best(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    print(f"{'trials':>9} {'cells':>8} {'build [s]':>10} {'roll-ups':>9} {'cube max [ms]':>14} "
+          f"{'sliced max [ms]':>16} {'trials max [ms]':>16}")
+    for n_dogs in (5, 20, 50):
+        df = trials(n_dogs)
+        build_seconds, cube = best(lambda: build_cube(df), repeat=1)
+        combos = [list(c) for size in (1, 2, 3) for c in itertools.combinations(cube.dimensions, size)]
+        where = {'dog_name': cube.values('dog_name')[:2], 'Open_port(1,2,3)': 1}
+        cube_max = max(best(lambda: cube.table(by))[0] for by in combos)
+        sliced_max = max(best(lambda: cube.table(by, where))[0] for by in combos)
+        # the layout is a cube dimension only, groupping gets the ports instead
+        trials_max = max(best(lambda: groupping(df, [name for name in by if name != LAYOUT] or PORT_COLUMNS),
+                              repeat=1)[0] for by in combos)
+        print(f"{len(df):>9} {len(cube.cells):>8} {build_seconds:>10.2f} {len(combos):>9} {cube_max * 1000:>14.1f} "
+              f"{sliced_max * 1000:>16.1f} {trials_max * 1000:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark dedup.dedupe_frames on synthetic monthly workbooks: a cold run over all months against
+adding one month to months that were indexed before, and a combined workbook that repeats every
+month. Also checks the number of dropped trials, and that a workbook saved again with its rows in
+another order does not reuse the dropped positions of the first one.
+Run from the project folder: python benchmarks/bench_dedup.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from dedup import TrialIndex  # noqa: E402
+from preprocessing import preprocess_excel  # noqa: E402
+from synthetic import trial_table  # noqa: E402
+
+N_DOGS, N_SESSIONS, N_TRIALS = 20, 60, 40
+
+
+def months(n_months):
+    """One preprocessed frame per month, each 31 days after the one before."""
+    frames = []
+    for month in range(n_months):
+        df = preprocess_excel(trial_table(N_DOGS, N_SESSIONS, N_TRIALS, seed=month))
+        df['date'] = df['date'] + pd.Timedelta(days=31 * month)
+        frames.append(df)
+    return frames
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def check_reordered(frames, folder):
+    """Index [A, B], then dedupe [A, B with its rows reversed]: the same trials as a fresh index drops."""
+    first, second = frames[0], pd.concat([frames[1], frames[0].iloc[::3]], ignore_index=True)
+    reordered = second.iloc[::-1].reset_index(drop=True)
+    index_dir = os.path.join(folder, 'reordered')
+    TrialIndex(index_dir).dedupe([first, second])
+    kept, dropped = TrialIndex(index_dir).dedupe([first, reordered])
+    expected, expected_dropped = TrialIndex(os.path.join(folder, 'fresh')).dedupe([first, reordered])
+    assert dropped == expected_dropped == [0, len(frames[0].iloc[::3])]
+    pd.testing.assert_frame_equal(kept[1], expected[1])
+    pd.testing.assert_frame_equal(kept[1].reset_index(drop=True), frames[1].iloc[::-1].reset_index(drop=True))
+
+
+def main():
+    print(f"{'months':>7} {'trials':>9} {'cold [s]':>9} {'+1 month [s]':>13} {'+combined [s]':>14} {'dropped':>9}")
+    for n_months in (3, 6, 12):
+        frames = months(n_months)
+        combined = pd.concat(frames, ignore_index=True)
+        with tempfile.TemporaryDirectory() as folder:
+            cold, _ = timed(lambda: TrialIndex(os.path.join(folder, 'cold')).dedupe(frames))
+            # the months before the last one were indexed by an earlier run (on disk only)
+            index_dir = os.path.join(folder, 'warm')
+            TrialIndex(index_dir).dedupe(frames[:-1])
+            warm, (_, dropped) = timed(lambda: TrialIndex(index_dir).dedupe(frames))
+            assert dropped == [0] * n_months
+            with_combined, (_, dropped) = timed(lambda: TrialIndex(index_dir).dedupe(frames + [combined]))
+            assert dropped[-1] == len(combined)
+        print(f"{n_months:>7} {len(combined):>9} {cold:>9.3f} {warm:>13.3f} {with_combined:>14.3f} {dropped[-1]:>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        check_reordered(months(2), folder)
+    print("reordered workbook: same trials dropped as with a fresh index")
+
+
+if __name__ == '__main__':
+    main()
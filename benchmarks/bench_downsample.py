@@ -0,0 +1,52 @@
+"""
+Benchmark the d'/rate line charts with and without LTTB downsampling: figure JSON size (what is sent
+to the browser) and the time to build and serialize the figure, for growing numbers of bins.
+Run from the project folder: python benchmarks/bench_downsample.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downsample import MAX_POINTS, thin, tick_step  # noqa: E402
+
+
+def rates_frame(n_bins, seed=0):
+    rng = np.random.default_rng(seed)
+    hit_rate = np.clip(0.6 + np.cumsum(rng.normal(0, 0.01, n_bins)) + rng.normal(0, 0.1, n_bins), 0.01, 0.99)
+    fa_rate = np.clip(0.3 + rng.normal(0, 0.1, n_bins), 0.01, 0.99)
+    df = pd.DataFrame({'hit_rate': hit_rate, 'fa_rate': fa_rate})
+    df.index = df.index + 1  # like the apps
+    return df
+
+
+def chart_json(df, y_axis, dtick):
+    fig = px.line(df, y=y_axis)
+    fig.update_layout(xaxis=dict(rangeslider=dict(visible=True), type='linear'))
+    fig.update_xaxes(range=[0, len(df) + 1], tickmode='linear', tick0=0, dtick=dtick)
+    return fig.to_json()
+
+
+def main():
+    y_axis = ['hit_rate', 'fa_rate']
+    print(f"max points: {MAX_POINTS}")
+    print(f"{'bins':>9} {'full [MB]':>10} {'full [s]':>9} {'thin [MB]':>10} {'thin [s]':>9}")
+    for n_bins in (1_000, 10_000, 100_000, 1_000_000):
+        df = rates_frame(n_bins)
+
+        start = time.perf_counter()
+        full = chart_json(df, y_axis, 1)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        thinned = chart_json(thin(df, y_axis), y_axis, tick_step(n_bins))
+        thin_time = time.perf_counter() - start
+        print(f"{n_bins:>9} {len(full) / 1e6:>10.2f} {full_time:>9.2f} {len(thinned) / 1e6:>10.2f} {thin_time:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark d' from counts: scipy norm.ppf on the rates against the dprime lookup table / AS241 fallback.
+Also reports the import cost of both.
+Run from the project folder: python benchmarks/bench_dprime.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def import_time(module):
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout)
+
+
+def main():
+    print(f"import scipy.stats: {import_time('scipy.stats'):.3f} s, import dprime: {import_time('dprime'):.3f} s")
+
+    from scipy.stats import norm
+    from dprime import d_prime_from_counts
+
+    rng = np.random.default_rng(0)
+    print(f"{'groups':>9} {'scipy [ms]':>11} {'table [ms]':>11} {'max diff':>10}")
+    for n_groups in (1_000, 100_000, 1_000_000):
+        # bins of up to 50 trials, a few long sessions beyond the table
+        n = rng.integers(0, 50, (4, n_groups))
+        n[:, ::1000] = rng.integers(500, 5000, (4, len(n[0, ::1000])))
+        hit, miss, fa, cr = n
+
+        start = time.perf_counter()
+        hit_rate = np.clip(np.divide(hit, hit + miss, out=np.zeros(n_groups), where=hit + miss > 0), 0.01, 0.99)
+        fa_rate = np.clip(np.divide(fa, fa + cr, out=np.zeros(n_groups), where=fa + cr > 0), 0.01, 0.99)
+        expected = norm.ppf(hit_rate) - norm.ppf(fa_rate)
+        scipy_t = time.perf_counter() - start
+
+        d_prime_from_counts(hit[:1], miss[:1], fa[:1], cr[:1])  # the table is built once per process
+        start = time.perf_counter()
+        got = d_prime_from_counts(hit, miss, fa, cr)[2]
+        table_t = time.perf_counter() - start
+        print(f"{n_groups:>9} {scipy_t * 1000:>11.1f} {table_t * 1000:>11.1f} {np.max(np.abs(got - expected)):>10.1e}")
+
+
+if __name__ == '__main__':
+    main()
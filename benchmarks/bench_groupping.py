@@ -0,0 +1,90 @@
+"""
+Benchmark the vectorized metrics.groupping against the old groupby/apply version.
+Run from the project folder: python benchmarks/bench_groupping.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metrics import groupping  # noqa: E402
+
+
+# === The implementation that used to live in every app (kept here only for comparison) ===
+def hit_rate_cal(trials_score):
+    hit = trials_score.eq("HIT").sum()
+    miss = trials_score.eq("MISS").sum()
+    hit_rate = hit / (hit + miss) if (hit + miss) > 0 else 0
+    return min(max(hit_rate, 0.01), 0.99)
+
+
+def fa_rate_cal(mice_trails):
+    fa = mice_trails.eq("FA").sum()
+    cr = mice_trails.eq("CR").sum()
+    fa_rate = fa / (fa + cr) if (fa + cr) > 0 else 0
+    return min(max(fa_rate, 0.01), 0.99)
+
+
+def old_groupping(df, group_by_lst):
+    v_count = df.groupby(group_by_lst)['score (Hit/miss)'].apply('value_counts')
+    hit_rate = df.groupby(group_by_lst)['score (Hit/miss)'].apply(hit_rate_cal)
+    hit_rate.rename("hit_rate", inplace=True)
+    fa_rate = df.groupby(group_by_lst)['score (Hit/miss)'].apply(fa_rate_cal)
+    fa_rate.rename("fa_rate", inplace=True)
+    all_data = pd.merge(v_count, hit_rate, left_on=group_by_lst, right_index=True, how='left')
+    all_data = pd.merge(all_data, fa_rate, left_on=group_by_lst, right_index=True, how='left')
+    all_data['d_prime'] = norm.ppf(all_data['hit_rate']) - norm.ppf(all_data['fa_rate'])
+    all_data = all_data.reset_index()
+    all_data_remove_duplicates = all_data.drop_duplicates(subset=group_by_lst, keep='last').reset_index()
+    return all_data_remove_duplicates, all_data
+
+
+def make_trials(n_trials, n_dogs=20, trials_per_session=40, seed=0):
+    rng = np.random.default_rng(seed)
+    dog = rng.integers(0, n_dogs, n_trials)
+    session = rng.integers(0, max(n_trials // (n_dogs * trials_per_session), 1), n_trials)
+    return pd.DataFrame({
+        'dog_name': np.array([f"dog_{i}" for i in range(n_dogs)])[dog],
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(session // 3, unit='D'),
+        'num_session': session % 3 + 1,
+        'score (Hit/miss)': rng.choice(['HIT', 'MISS', 'FA', 'CR'], n_trials, p=[0.3, 0.1, 0.1, 0.5]),
+    })
+
+
+def check_same(new, old, group_by_lst):
+    """The per-group frame must match; per-score rows must match up to the order of tied counts."""
+    cols = group_by_lst + ['count', 'hit_rate', 'fa_rate', 'd_prime']
+    pd.testing.assert_frame_equal(new[0][cols], old[0][cols], check_dtype=False)
+    key = group_by_lst + ['score (Hit/miss)']
+    a = new[1].sort_values(key).reset_index(drop=True)
+    b = old[1].sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a[key + cols[len(group_by_lst):]], b[key + cols[len(group_by_lst):]],
+                                  check_dtype=False)
+
+
+def timeit(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    group_by_lst = ['dog_name', 'date', 'num_session']
+    print(f"{'trials':>10} {'old [s]':>10} {'new [s]':>10} {'speedup':>8}")
+    for n_trials in (10_000, 100_000, 1_000_000):
+        df = make_trials(n_trials)
+        check_same(groupping(df, group_by_lst), old_groupping(df, group_by_lst), group_by_lst)
+        old_t = timeit(old_groupping, df, group_by_lst, repeat=1 if n_trials >= 1_000_000 else 3)
+        new_t = timeit(groupping, df, group_by_lst)
+        print(f"{n_trials:>10} {old_t:>10.3f} {new_t:>10.3f} {old_t / new_t:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark parallel workbook loading (workbook_loader.load_workbooks) against the sequential loop.
+The cache is bypassed so every workbook is really parsed.
+Run from the project folder: python benchmarks/bench_loading.py
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from preprocessing import read_workbook  # noqa: E402
+from workbook_loader import load_workbooks  # noqa: E402
+
+WORKBOOKS = ['North.data.March.edited.xlsx', 'North.data.May.edited.xlsx', 'North.data.june.edited_2.xlsx',
+             'North.data.combined.edit.xlsx']
+
+
+def sequential(paths):
+    return [read_workbook(path) for path in paths]
+
+
+def main():
+    print(f"{'files':>6} {'sequential [s]':>15} {'parallel [s]':>13} {'speedup':>8}")
+    for n_files in (1, 2, 4, 8, 16):
+        paths = [os.path.join(ROOT, WORKBOOKS[i % len(WORKBOOKS)]) for i in range(n_files)]
+
+        start = time.perf_counter()
+        expected = sequential(paths)
+        seq_t = time.perf_counter() - start
+
+        start = time.perf_counter()
+        frames, errors = load_workbooks(paths, use_cache=False)
+        par_t = time.perf_counter() - start
+
+        assert not errors
+        for a, b in zip(expected, frames):
+            pd.testing.assert_frame_equal(a, b)
+        print(f"{n_files:>6} {seq_t:>15.2f} {par_t:>13.2f} {seq_t / par_t:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the streaming log parser (log_parser.load_logs) against the old readlines/str.strip path.
+Reports wall time and peak traced memory for a synthetic log built from the bundled Wuff log, and
+checks that whitespace around the cells (e.g. 'True \n') parses like the bundled log.
+Run from the project folder: python benchmarks/bench_log_parser.py
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from log_parser import load_logs, parse_log  # noqa: E402
+
+
+def old_load(uploaded_files):
+    """The text-log path main_stream used before (load_data + the per-cell strip in main)."""
+    all_files = []
+    for uploaded_file in uploaded_files:
+        lines = uploaded_file.readlines()
+        file_name = uploaded_file.name.split("_")[0]
+        lines = [file_name + '; ' + line.decode('utf-8') for line in lines]
+        all_files += lines
+    data = [line.strip().split(';') for line in all_files]
+    df = pd.DataFrame(data)
+    df.columns = df.iloc[0]
+    df = df.drop(columns=df.columns[0])
+    df = df.rename(columns=lambda x: x.strip() if x is not None else x)
+    df = df.map(lambda x: x.strip() if isinstance(x, str) else x)
+    return df.loc[df['date'] != "date"]
+
+
+def make_log(n_trials):
+    with open(os.path.join(ROOT, 'Wuff_dog_1_new Experiment.txt'), 'rb') as f:
+        header, *rows = f.read().splitlines(keepends=True)
+    rows[-1] = rows[-1].rstrip() + b'\n'
+    body = []
+    while len(body) < n_trials:
+        body.append(header)  # the rig writes the header again at every session
+        body.extend(rows)
+    return b''.join(body[:n_trials])
+
+
+def measure(func, data):
+    upload = io.BytesIO(data)
+    upload.name = 'Wuff_dog_1_new Experiment.txt'
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = func([upload])
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, df.memory_usage(deep=True).sum(), len(df)
+
+
+def check_whitespace():
+    """The bundled log with a space around every cell (and before each line end) gives the same frame."""
+    with open(os.path.join(ROOT, 'Wuff_dog_1_new Experiment.txt'), 'rb') as f:
+        header, *rows = f.read().splitlines(keepends=True)
+    padded = header + b''.join(b' ; '.join(cell.strip() for cell in row.split(b';')) + b' \n' for row in rows)
+    pd.testing.assert_frame_equal(parse_log(io.BytesIO(header + b''.join(rows))), parse_log(io.BytesIO(padded)))
+
+
+def main():
+    check_whitespace()
+    print(f"{'lines':>9} {'old [s]':>8} {'new [s]':>8} {'old peak MB':>12} {'new peak MB':>12} "
+          f"{'old frame MB':>13} {'new frame MB':>13}")
+    for n_trials in (10_000, 100_000, 500_000):
+        data = make_log(n_trials)
+        old_t, old_peak, old_size, old_rows = measure(old_load, data)
+        new_t, new_peak, new_size, new_rows = measure(load_logs, data)
+        assert old_rows == new_rows
+        mb = 1024 * 1024
+        print(f"{n_trials:>9} {old_t:>8.2f} {new_t:>8.2f} {old_peak / mb:>12.1f} {new_peak / mb:>12.1f} "
+              f"{old_size / mb:>13.1f} {new_size / mb:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark the combined report figure of App.run_analysis: the old per-dog plot_line figures copied
+trace by trace into make_subplots against report_figure.combined_figure.
+Run from the project folder: python benchmarks/bench_report_figure.py
+"""
+import json
+import os
+import sys
+import time
+
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_groupping import make_trials  # noqa: E402
+from aggregate_store import session_counts  # noqa: E402
+from metrics import groupping_counts  # noqa: E402
+from report_figure import combined_figure  # noqa: E402
+
+
+# === The figure code that used to live in App.run_analysis (kept here only for comparison) ===
+def old_plot_line(df, y_axis, x_axis_tlt, y_axis_tlt, title, if_sessions=False):
+    if df.shape[0] < 2:
+        fig = px.scatter(df, y=y_axis, title=title)
+    else:
+        fig = px.line(df, y=y_axis, title=title)
+        if y_axis == 'd_prime':
+            fig.update_traces(line=dict(color='green'))
+        if if_sessions:
+            df['date_id'] = df['date'].factorize()[0]
+            y_position = df[y_axis].max()
+            annotations = []
+            for date_id in df['date_id'].unique():
+                x_position = df.loc[df['date_id'] == date_id].iloc[0].name
+                date = df.loc[df['date_id'] == date_id, 'date'].dt.strftime('%d/%m/%Y').iloc[0]
+                fig.add_vline(x=x_position, line_dash='dash', line_color='rgb(150, 160, 165)')
+                annotations.append(dict(x=x_position - 0.1, y=y_position + 0.1, text=date, showarrow=False,
+                                        textangle=270, font=dict(color='rgb(97, 98, 99)')))
+            for annotation in annotations:
+                fig.add_annotation(**annotation)
+    return fig
+
+
+def old_plot_score_dist(df):
+    dog_names = df['dog_name'].unique()
+    color_map = ['blue', 'green', 'red', 'purple', 'orange', 'pink', 'brown', 'cyan']
+    fig = make_subplots(rows=1, cols=len(dog_names), subplot_titles=dog_names)
+    for i, dog in enumerate(dog_names):
+        dog_data = df[df['dog_name'] == dog]
+        fig.add_trace(go.Bar(x=dog_data['score (Hit/miss)'], y=dog_data['count'], name=dog,
+                             marker=dict(color=color_map[i % len(color_map)]),
+                             text=dog_data['count'], textposition='auto'), row=1, col=i + 1)
+    return fig
+
+
+def old_combined_figure(res, with_duplicates, tlt_x_axis, if_sessions):
+    all_dogs = res["dog_name"].unique()
+    fig_combined = make_subplots(
+        rows=len(all_dogs) * 2 + 1, cols=1,
+        subplot_titles=["Score Distribution"] +
+                       [f"{dog}: D-Prime over time" if i % 2 == 0 else f"{dog}: Hit and FA rates over time"
+                        for dog in all_dogs for i in range(2)],
+        vertical_spacing=0.05)
+    score_dist = with_duplicates.groupby(['dog_name', 'score (Hit/miss)'])['count'].sum().reset_index()
+    for trace in old_plot_score_dist(score_dist).data:
+        fig_combined.add_trace(trace, row=1, col=1)
+    row_counter = 2
+    for dog in all_dogs:
+        selected_dog = res[res["dog_name"] == dog]
+        selected_dog.reset_index(inplace=True)
+        for y_axis, y_axis_tlt, title, with_annotations in (
+                ('d_prime', 'D prime', f"{dog}: D-Prime over time", True),
+                (['hit_rate', 'fa_rate'], 'Rate', f"{dog}: Hit and FA rates over time", False)):
+            fig = old_plot_line(selected_dog, y_axis, tlt_x_axis, y_axis_tlt, title, if_sessions)
+            for trace in fig.data:
+                fig_combined.add_trace(trace, row=row_counter, col=1)
+            for shape in fig.layout.shapes:
+                fig_combined.add_shape(type=shape['type'], x0=shape['x0'], x1=shape['x1'], y0=shape['y0'],
+                                       y1=shape['y1'],
+                                       line=dict(color=shape['line']['color'], width=shape['line']['width'],
+                                                 dash='dash'),
+                                       xref=f'x{row_counter}', yref=f'y{row_counter}')
+            if with_annotations:
+                for annotation in fig.layout.annotations:
+                    fig_combined.add_annotation(x=annotation.x, y=annotation.y, text=annotation.text,
+                                                showarrow=annotation.showarrow, textangle=annotation.textangle,
+                                                font=dict(color=annotation.font.color),
+                                                xref=f'x{row_counter}', yref=f'y{row_counter}')
+            row_counter += 1
+    return fig_combined
+
+
+def report_frames(n_dogs, trials_per_dog=2_000):
+    df = make_trials(n_dogs * trials_per_dog, n_dogs=n_dogs)
+    return groupping_counts(session_counts(df), ['dog_name', 'date', 'num_session'])
+
+
+def _rounded(obj):
+    """JSON-able copy with floats rounded (subplot domains differ from make_subplots in the last bits)."""
+    if isinstance(obj, dict):
+        return {key: _rounded(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_rounded(value) for value in obj]
+    if isinstance(obj, float):
+        return round(obj, 9)
+    return obj
+
+
+def check_same(new, old):
+    new, old = [json.loads(fig.to_json()) for fig in (new, old)]
+    assert _rounded(new['data']) == _rounded(old['data'])
+    for key in ('shapes', 'annotations'):
+        assert _rounded(new['layout'].get(key)) == _rounded(old['layout'].get(key)), key
+    for key, axis in old['layout'].items():
+        if key.startswith(('xaxis', 'yaxis')):
+            assert _rounded(new['layout'][key]['domain']) == _rounded(axis['domain']), key
+
+
+def main():
+    print(f"{'dogs':>5} {'old [s]':>9} {'new [s]':>9} {'html [MB]':>10}")
+    for n_dogs in (5, 50, 200):
+        res, with_duplicates = report_frames(n_dogs)
+
+        start = time.perf_counter()
+        new = combined_figure(res, with_duplicates, 'session', True)
+        new_time = time.perf_counter() - start
+        html_mb = len(new.to_html(full_html=False)) / 1e6
+
+        if n_dogs <= 10:  # make_subplots refuses vertical_spacing=0.05 above 10 dogs
+            start = time.perf_counter()
+            old = old_combined_figure(res, with_duplicates, 'session', True)
+            old_time = f"{time.perf_counter() - start:9.2f}"
+            check_same(new, old)
+        else:
+            old_time = f"{'fails':>9}"
+        print(f"{n_dogs:>5} {old_time} {new_time:9.2f} {html_mb:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
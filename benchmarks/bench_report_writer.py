@@ -0,0 +1,71 @@
+"""
+Benchmark the report pages: the old single file (combined_figure.to_html with plotly.js inlined, built
+as one string) against report_writer.write_report (streamed, shared local plotly.js, one fragment per
+dog). Sizes are what is written per run and what a browser has to load before it draws the first plot;
+a rerun of the same report only rewrites the page.
+Run from the project folder: python benchmarks/bench_report_writer.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_report_figure import report_frames  # noqa: E402
+from report_figure import combined_figure, report_sections  # noqa: E402
+from report_writer import ASSET_DIR, write_report  # noqa: E402
+
+OLD_PAGE = """<html><head></head><body><div class="scroll-container">{figure}</div></body></html>"""
+
+
+def old_write_report(path, res, with_duplicates):
+    fig = combined_figure(res, with_duplicates, 'session', True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(OLD_PAGE.format(figure=fig.to_html(full_html=False)))
+
+
+def folder_mb(folder, skip=()):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder)
+               for name in names if not any(part in root for part in skip)) / 1e6
+
+
+def newest_mb(folder, since):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names
+               if os.path.getmtime(os.path.join(root, name)) >= since) / 1e6
+
+
+def main():
+    print(f"{'dogs':>5} {'old [s]':>8} {'old [MB]':>9} {'new [s]':>8} {'new [MB]':>9} {'rerun [s]':>10} "
+          f"{'rerun [MB]':>11} {'first paint old/new [MB]':>25}")
+    for n_dogs in (5, 50, 200):
+        res, with_duplicates = report_frames(n_dogs)
+        with tempfile.TemporaryDirectory() as old_dir, tempfile.TemporaryDirectory() as new_dir:
+            start = time.perf_counter()
+            old_write_report(os.path.join(old_dir, 'combined_analysis.html'), res, with_duplicates)
+            old_time = time.perf_counter() - start
+            old_mb = folder_mb(old_dir)
+
+            path = os.path.join(new_dir, 'combined_analysis.html')
+            start = time.perf_counter()
+            write_report(path, report_sections(res, with_duplicates, 'session', True))
+            new_time = time.perf_counter() - start
+            new_mb = folder_mb(new_dir, skip=(ASSET_DIR,))  # plotly.js is written once per folder
+
+            time.sleep(0.01)
+            rerun_start = time.time()
+            start = time.perf_counter()
+            write_report(path, report_sections(res, with_duplicates, 'session', True))
+            rerun_time = time.perf_counter() - start
+            rerun_mb = newest_mb(new_dir, rerun_start)
+
+            # the new page draws the score distribution, then loads the dogs near the screen (about 2)
+            fragments = sorted(os.listdir(os.path.join(new_dir, 'combined_analysis_files')))
+            first_paint = (os.path.getsize(path) + folder_mb(os.path.join(new_dir, ASSET_DIR)) * 1e6 +
+                           sum(os.path.getsize(os.path.join(new_dir, 'combined_analysis_files', name))
+                               for name in fragments[:2])) / 1e6
+        print(f"{n_dogs:>5} {old_time:>8.2f} {old_mb:>9.2f} {new_time:>8.2f} {new_mb:>9.2f} {rerun_time:>10.2f} "
+              f"{rerun_mb:>11.2f} {old_mb:>12.2f} / {first_paint:<10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark the compact trial schema: memory of the trial table and time of the usual groupings with
+plain object/int64 columns against schema.TRIAL_SCHEMA types, on the bundled North.data workbooks
+repeated to larger sizes (each copy under another dog name).
+Run from the project folder: python benchmarks/bench_schema.py
+"""
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from metrics import groupping  # noqa: E402
+from preprocessing import preprocess_excel  # noqa: E402
+from schema import apply_schema, concat_frames  # noqa: E402
+
+GROUPINGS = (['dog_name', 'date'], ['dog_name', 'num_session'], ['dog_name', 'training'])
+
+
+def tiled(frames, copies):
+    out = []
+    for i in range(copies):
+        for df in frames:
+            df = df.copy()
+            df['dog_name'] = df['dog_name'].astype(str) + f'_{i}'
+            out.append(df)
+    return out
+
+
+def time_groupings(df, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for keys in GROUPINGS:
+            groupping(df, keys)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    paths = sorted(glob.glob(os.path.join(ROOT, 'North.data*.xlsx')))
+    if not paths:
+        sys.exit("no North.data*.xlsx workbooks in the project folder")
+    frames = [preprocess_excel(pd.read_excel(path), typed=False) for path in paths]
+
+    print(f"{'trials':>9} {'plain [MB]':>11} {'typed [MB]':>11} {'plain [s]':>10} {'typed [s]':>10}")
+    for copies in (1, 10, 100):
+        parts = tiled(frames, copies)
+        plain = pd.concat(parts, ignore_index=True)
+        typed = concat_frames([apply_schema(df) for df in parts])
+        row = [len(plain)]
+        row += [df.memory_usage(deep=True).sum() / 1e6 for df in (plain, typed)]
+        row += [time_groupings(df) for df in (plain, typed)]
+        print(f"{row[0]:>9} {row[1]:>11.2f} {row[2]:>11.2f} {row[3]:>10.3f} {row[4]:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark the cold start of new_run_all: the import cost of the launcher (before and after the heavy
+imports were deferred to the page) and the time until the Streamlit server answers its health check.
+Run from the project folder: python benchmarks/bench_startup.py
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# What new_run_all imported at module level before the imports were made lazy
+EAGER_IMPORTS = 'pandas, scipy.stats, plotly.express, plotly.subplots, plotly.graph_objects, streamlit'
+
+
+def import_time(statement):
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_page(single_process, timeout=120):
+    """Seconds from starting new_run_all until /_stcore/health answers."""
+    port = free_port()
+    command = [sys.executable, 'new_run_all.py', '--no-browser', f'--port={port}']
+    if single_process:
+        command.append('--single-process')
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f'http://localhost:{port}/_stcore/health', timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        return float('nan')
+    finally:
+        proc.terminate()
+        proc.wait()
+        if not single_process:
+            # the server child is not stopped when the launcher is terminated by a signal
+            subprocess.run(['pkill', '-f', f'server.port={port}'])
+
+
+def main():
+    runs = 3
+    eager = min(import_time(f'import {EAGER_IMPORTS}') for _ in range(runs))
+    lazy = min(import_time('import new_run_all') for _ in range(runs))
+    print(f"launcher imports: eager {eager:.3f} s, lazy {lazy:.3f} s")
+    for single_process in (True, False):
+        mode = 'single process' if single_process else 'subprocess'
+        times = [time_to_first_page(single_process) for _ in range(runs)]
+        print(f"time to first page ({mode}): best {min(times):.2f} s of {runs}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark the trial warehouse on synthetic monthly data: import time, and "one dog, last 30 days, by
+session" answered from SQL against loading the preprocessed frames and grouping them in pandas.
+Run from the project folder: python benchmarks/bench_warehouse.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from aggregate_store import SESSION_KEYS  # noqa: E402
+from bench_dedup import months  # noqa: E402
+from metrics import groupping  # noqa: E402
+from warehouse import Warehouse  # noqa: E402
+
+DOG = 'touch'
+DAYS = 30
+
+
+def best(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def in_pandas(frames):
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df['dog_name'] == DOG]
+    df = df[df['date'] > df['date'].max() - pd.Timedelta(days=DAYS)]
+    return groupping(df, SESSION_KEYS)[0]
+
+
+def main():
+    print(f"{'months':>7} {'trials':>9} {'import [s]':>11} {'pandas [ms]':>12} {'sql [ms]':>9} {'sessions':>9}")
+    for n_months in (1, 6, 12):
+        frames = months(n_months)
+        with tempfile.TemporaryDirectory() as folder:
+            warehouse = Warehouse(os.path.join(folder, 'trials.sqlite'))
+            import_seconds, _ = best(lambda: warehouse.import_frames(frames, range(n_months)), repeat=1)
+            pandas_seconds, expected = best(lambda: in_pandas(frames))
+            sql_seconds, counts = best(lambda: warehouse.counts_by(SESSION_KEYS, dogs=[DOG], days=DAYS))
+        assert len(counts) == len(expected)
+        print(f"{n_months:>7} {sum(map(len, frames)):>9} {import_seconds:>11.2f} {pandas_seconds * 1000:>12.1f} "
+              f"{sql_seconds * 1000:>9.1f} {len(counts):>9}")
+
+
+if __name__ == '__main__':
+    main()
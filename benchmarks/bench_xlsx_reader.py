@@ -0,0 +1,100 @@
+"""
+Benchmark xlsx_reader.read_columns against pd.read_excel: parse time and peak memory (tracemalloc)
+per workbook, on the bundled North.data workbooks and on synthetic ones of growing size. Checks
+that both give the same preprocessed frame, also for copies of a workbook whose rows and cells carry
+no references (r attributes are optional in OOXML) or whose header repeats a name.
+Run from the project folder: python benchmarks/bench_xlsx_reader.py
+"""
+import gc
+import glob
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import openpyxl
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from preprocessing import DROP_COLUMNS, preprocess_excel  # noqa: E402
+from synthetic import write_workbook  # noqa: E402
+from xlsx_reader import ENGINE, read_columns  # noqa: E402
+
+# (dogs, sessions per dog, trials per session) of the synthetic workbooks
+SYNTHETIC = ((3, 20, 40), (10, 50, 40), (20, 100, 40))
+
+
+def measure(func, repeat=3):
+    """Best time over repeat runs, and peak traced memory (MB) of one run."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    del result
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return best, peak
+
+
+def without_references(path, copy_path):
+    """Copy of the workbook at path with the r attributes of its <row> and <c> elements removed."""
+    with zipfile.ZipFile(path) as source, zipfile.ZipFile(copy_path, 'w', zipfile.ZIP_DEFLATED) as copy:
+        for item in source.infolist():
+            data = source.read(item)
+            if item.filename.startswith('xl/worksheets/'):
+                data = re.sub(rb'(<(?:row|c)\b[^>]*?)\s+r="[^"]*"', rb'\1', data)
+            copy.writestr(item, data)
+    return copy_path
+
+
+def with_repeated_header(path, copy_path, name='score_ID'):
+    """Copy of the workbook at path whose last named column is renamed like another column (name)."""
+    workbook = openpyxl.load_workbook(path)
+    sheet = workbook.worksheets[0]
+    [cell for cell in sheet[1] if cell.value is not None][-1].value = name
+    workbook.save(copy_path)
+    return copy_path
+
+
+def same_frame(path, copy_path, what):
+    pd.testing.assert_frame_equal(preprocess_excel(pd.read_excel(copy_path)),
+                                  preprocess_excel(read_columns(copy_path, drop=DROP_COLUMNS)))
+    print(f"{os.path.basename(path)} {what}: same frame")
+
+
+def compare(path):
+    old = preprocess_excel(pd.read_excel(path))
+    new = preprocess_excel(read_columns(path, drop=DROP_COLUMNS))
+    pd.testing.assert_frame_equal(old, new)
+    old_time, old_peak = measure(lambda: pd.read_excel(path))
+    new_time, new_peak = measure(lambda: read_columns(path, drop=DROP_COLUMNS))
+    name = os.path.basename(path)
+    print(f"{name[:34]:<34} {len(old):>8} {old_time:>10.3f} {new_time:>10.3f} {old_peak:>10.1f} {new_peak:>10.1f}")
+
+
+def main():
+    print(f"read_columns engine: {ENGINE or 'expat'}")
+    print(f"{'workbook':<34} {'trials':>8} {'excel [s]':>10} {'reader [s]':>10} {'excel [MB]':>10} {'reader [MB]':>10}")
+    for path in sorted(glob.glob(os.path.join(ROOT, 'North.data*.xlsx'))):
+        compare(path)
+    with tempfile.TemporaryDirectory() as folder:
+        for n_dogs, n_sessions, n_trials in SYNTHETIC:
+            path = os.path.join(folder, f"synthetic_{n_dogs * n_sessions * n_trials}.xlsx")
+            compare(write_workbook(path, n_dogs, n_sessions, n_trials))
+        path = sorted(glob.glob(os.path.join(ROOT, 'North.data*.xlsx')))[0]
+        same_frame(path, without_references(path, os.path.join(folder, 'no_references.xlsx')),
+                   "without cell references")
+        same_frame(path, with_repeated_header(path, os.path.join(folder, 'repeated_header.xlsx')),
+                   "with a repeated header")
+
+
+if __name__ == '__main__':
+    main()
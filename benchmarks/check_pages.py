@@ -0,0 +1,68 @@
+"""
+Run the two Streamlit pages headless (streamlit.testing AppTest) on the bundled files, through every
+display mode and for every dog (new_run_all also from the trial warehouse the uploads were imported
+into, a temporary one), and fail on the first exception a page raises.
+Run from the project folder: python benchmarks/check_pages.py
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from new_run_all import PAGE_ENV  # noqa: E402
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+MODES = ("By Sessions", "All Together", "By Bin Size", "Moving Window", "Drill Down")
+PAGES = {
+    'new_run_all.py': ['North.data.March.edited.xlsx', 'North.data.May.edited.xlsx'],
+    'main_stream.py': ['Ruff_dog_1_new Experiment.txt', 'Wuff_dog_1_new Experiment.txt'],
+}
+MIME_TYPES = {'.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.txt': 'text/plain'}
+
+
+def widget(widgets, label):
+    return next(item for item in widgets if item.label == label)
+
+
+def check_modes(at, page):
+    for mode in MODES:
+        widget(at.sidebar.radio, "Display Options").set_value(mode).run()
+        assert not at.exception, f"{page}, {mode}: {at.exception[0].value}"
+        if mode == "Drill Down":
+            print(f"{page}: {mode} ok")
+            continue
+        dogs = widget(at.sidebar.selectbox, "Select a Name")
+        for dog in dogs.options:
+            dogs.set_value(dog).run()
+            assert not at.exception, f"{page}, {mode}, {dog}: {at.exception[0].value}"
+        print(f"{page}: {mode} ok for {len(dogs.options)} dog(s)")
+
+
+def check(page, names):
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=120).run()
+    uploader = at.sidebar.file_uploader[0]
+    for name in names:
+        with open(os.path.join(ROOT, name), 'rb') as f:
+            uploader.upload(name, f.read(), MIME_TYPES[os.path.splitext(name)[1]])
+    uploader.run()
+    check_modes(at, page)
+    if page == 'new_run_all.py':
+        # the uploads were imported into the warehouse: group them again from there
+        widget(at.sidebar.radio, "Data source").set_value("Trial warehouse").run()
+        assert not at.exception, f"{page}, warehouse: {at.exception[0].value}"
+        check_modes(at, f"{page} (warehouse)")
+
+
+def main():
+    os.environ[PAGE_ENV] = '1'  # new_run_all renders the page instead of launching a server
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ['DOGS_WAREHOUSE'] = os.path.join(folder, 'trials.sqlite')  # not the user's warehouse
+        for page, names in PAGES.items():
+            check(page, names)
+
+
+if __name__ == '__main__':
+    main()
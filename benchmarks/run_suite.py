@@ -0,0 +1,170 @@
+"""
+Benchmark suite: time every stage of the report pipeline on synthetic data (see synthetic.py) at
+several scales and save the timings as JSON, to compare a change against an earlier commit.
+
+Stages: read (xlsx_reader.read_columns of the workbooks), preprocess (preprocess_excel and combine), logs
+(parse_log of the experiment logs), group (groupping by session and by dog), bin (BinEngine bins and
+moving windows), figure (report_sections of the session report) and html (write_report).
+
+    python benchmarks/run_suite.py -o before.json                 # on the old commit
+    python benchmarks/run_suite.py -o after.json --compare before.json
+
+--compare prints the ratio per stage and exits with 1 when a stage got slower than --threshold
+(default 1.25 = 25% slower). Generated files are kept with --data-dir (and reused when present).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from binning import BinEngine  # noqa: E402
+from log_parser import dog_name_from_file, parse_log  # noqa: E402
+from metrics import groupping, groupping_counts  # noqa: E402
+from preprocessing import DROP_COLUMNS, combine_frames, preprocess_excel  # noqa: E402
+from report_figure import report_sections  # noqa: E402
+from report_writer import write_report  # noqa: E402
+from synthetic import write_dataset  # noqa: E402
+from xlsx_reader import read_columns  # noqa: E402
+
+# name -> (dogs, sessions per dog, trials per session, workbooks)
+SCALES = {
+    'small': (3, 10, 40, 1),
+    'medium': (10, 50, 40, 2),
+    'large': (30, 100, 40, 4),
+}
+STAGES = ('read', 'preprocess', 'logs', 'group', 'bin', 'figure', 'html')
+# a stage only counts as slower when it also lost this many seconds (timer noise of the fast stages)
+MIN_DELTA = 0.05
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset(scale, data_dir):
+    """Paths of the workbooks and logs of a scale, generated unless they are already in data_dir."""
+    n_dogs, n_sessions, n_trials, n_workbooks = SCALES[scale]
+    folder = os.path.join(data_dir, scale)
+    marker = os.path.join(folder, 'files.json')
+    if os.path.exists(marker):
+        with open(marker) as f:
+            return json.load(f), 0.0
+    start = time.perf_counter()
+    workbooks, logs = write_dataset(folder, n_dogs, n_sessions, n_trials, n_workbooks, logs=True)
+    with open(marker, 'w') as f:
+        json.dump([workbooks, logs], f)
+    return [workbooks, logs], time.perf_counter() - start
+
+
+def run_stages(workbooks, logs, html_path):
+    """Seconds per stage for one pass over the data set."""
+    times = {}
+
+    def timed(stage, func):
+        start = time.perf_counter()
+        result = func()
+        times[stage] = time.perf_counter() - start
+        return result
+
+    raw = timed('read', lambda: [read_columns(path, drop=DROP_COLUMNS) for path in workbooks])
+    df = timed('preprocess', lambda: combine_frames([preprocess_excel(sheet) for sheet in raw]))
+    timed('logs', lambda: [parse_log(path, dog_name=dog_name_from_file(path)) for path in logs])
+
+    def group():
+        groupping(df, 'dog_name')
+        return groupping(df, ['dog_name', 'date', 'num_session'])
+
+    def bins():
+        engine = BinEngine(df, order_by=['dog_name', 'date'])
+        groupping_counts(engine.bins(10), ['dog_name', 'bin'])
+        groupping_counts(engine.windows(50, 5), ['dog_name', 'window'])
+
+    res, with_duplicates = timed('group', group)
+    timed('bin', bins)
+    sections = timed('figure', lambda: list(report_sections(res, with_duplicates, 'session', True)))
+    timed('html', lambda: write_report(html_path, sections))
+    return times, len(df)
+
+
+def run_suite(scales, repeat, data_dir):
+    results = {}
+    for scale in scales:
+        (workbooks, logs), generate_seconds = dataset(scale, data_dir)
+        html_path = os.path.join(data_dir, scale, 'report.html')
+        runs = []
+        for _ in range(repeat):
+            times, trials = run_stages(workbooks, logs, html_path)
+            runs.append(times)
+        best = {stage: min(run[stage] for run in runs) for stage in STAGES}
+        results[scale] = dict(trials=trials, dogs=SCALES[scale][0], generate_seconds=generate_seconds,
+                              best=best, runs=runs)
+        print(f"{scale:>8} {trials:>9} " + " ".join(f"{best[stage]:>10.3f}" for stage in STAGES), flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the ratio new / old per scale and stage; returns the (scale, stage) pairs slower than threshold
+    (and by more than MIN_DELTA seconds).
+    """
+    slower = []
+    print(f"\nnew / old (>{threshold:.2f} is a regression)")
+    print(f"{'scale':>8} " + " ".join(f"{stage:>10}" for stage in STAGES))
+    for scale, result in results.items():
+        old = baseline['scales'].get(scale)
+        if old is None:
+            continue
+        ratios = {stage: result['best'][stage] / old['best'][stage] if old['best'].get(stage) else float('nan')
+                  for stage in STAGES}
+        slower += [(scale, stage) for stage, ratio in ratios.items()
+                   if ratio > threshold and result['best'][stage] - old['best'][stage] > MIN_DELTA]
+        print(f"{scale:>8} " + " ".join(f"{ratios[stage]:>10.2f}" for stage in STAGES))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the report pipeline on synthetic data.")
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=3, help="runs per scale, the fastest is kept")
+    parser.add_argument('-o', '--out', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="results JSON of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--data-dir', help="keep the generated files here (default: a temporary folder)")
+    args = parser.parse_args()
+
+    print(f"{'scale':>8} {'trials':>9} " + " ".join(f"{stage + ' [s]':>10}" for stage in STAGES))
+    if args.data_dir:
+        results = run_suite(args.scales, args.repeat, args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory() as data_dir:
+            results = run_suite(args.scales, args.repeat, data_dir)
+
+    report = dict(commit=git_commit(), created=time.strftime('%Y-%m-%dT%H:%M:%S'), python=platform.python_version(),
+                  pandas=pd.__version__, machine=platform.machine(), cpus=os.cpu_count(), scales=results)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"(baseline: commit {baseline.get('commit')}, {baseline.get('created')})")
+        slower = compare(results, baseline, args.threshold)
+        if slower:
+            print("slower: " + ", ".join(f"{scale}/{stage}" for scale, stage in slower))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Synthetic trial data for the benchmarks: North.data-shaped workbooks and experiment logs with a chosen
+number of dogs, sessions per dog and trials per session. The scores follow a per-dog d' that improves
+over the sessions, so the reports look like real ones. The same seed gives the same files.
+
+Write a data set to a folder with:
+    python benchmarks/synthetic.py OUT_DIR --dogs 10 --sessions 50 --trials 40 [--logs]
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+DOG_NAMES = ['touch', 'puma', 'sufa', 'ruff', 'wuff', 'bella', 'luna', 'max', 'rex', 'kira']
+LOG_HEADER = ('dog_name; date; num_session; Time stamp of trial initiation; termination ; Exp name; Level identity; '
+              'score (Hit/miss); Port1 (1-Target,0-non-Target,-1-Distractor); Port2;Port 3; Open_port(1,2,3);'
+              'continuous_mode(0,1)')
+
+
+def dog_names(n_dogs):
+    return [DOG_NAMES[i % len(DOG_NAMES)] + (f'_{i // len(DOG_NAMES)}' if i >= len(DOG_NAMES) else '')
+            for i in range(n_dogs)]
+
+
+def _scores(rng, n_dogs, n_sessions, n_trials):
+    """Score labels ('hit', 'miss', 'fp', 'cr') of every trial, dog by dog and session by session."""
+    shape = (n_dogs, n_sessions, n_trials)
+    d_prime = np.linspace(0.2, 2.5, n_sessions)[None, :, None] + rng.normal(0, 0.3, (n_dogs, 1, 1))
+    target = rng.random(shape) < 0.5
+    # equal-variance signal detection with the criterion in the middle
+    hit = rng.random(shape) < _norm_cdf(d_prime / 2)
+    false_alarm = rng.random(shape) < _norm_cdf(-d_prime / 2)
+    scores = np.where(target, np.where(hit, 'hit', 'miss'), np.where(false_alarm, 'fp', 'cr'))
+    return scores.reshape(-1), target.reshape(-1)
+
+
+def _norm_cdf(x):
+    return 0.5 * (1 + np.vectorize(math.erf)(np.asarray(x) / math.sqrt(2)))
+
+
+def trial_table(n_dogs=3, n_sessions=10, n_trials=40, seed=0):
+    """A raw North.data sheet (the columns of the bundled workbooks, before preprocess_excel)."""
+    rng = np.random.default_rng(seed)
+    n = n_dogs * n_sessions * n_trials
+    scores, target = _scores(rng, n_dogs, n_sessions, n_trials)
+    dog = np.repeat(np.arange(n_dogs), n_sessions * n_trials)
+    session = np.tile(np.repeat(np.arange(n_sessions), n_trials), n_dogs)
+    # two sessions a day, one day after the other
+    days = pd.Timestamp('2024-01-01') + pd.to_timedelta(session // 2, unit='D')
+    return pd.DataFrame({
+        'area': 'north',
+        'date': days.strftime('%d%m%y').astype(int),
+        'training': 1 + session * 3 // max(n_sessions, 1),
+        'dog': np.array(dog_names(n_dogs))[dog],
+        'dog_ID': dog + 1,
+        'session': session % 2 + 1,
+        'trial': np.tile(np.arange(1, n_trials + 1), n_dogs * n_sessions),
+        'score': scores,
+        'score_ID': pd.Series(scores).map({'hit': 1, 'miss': 2, 'fp': 3, 'cr': 4}).to_numpy(),
+        'target_bin': np.where(target, '[0 0 1]', '[0 0 0]'),
+        'target_ID': rng.integers(1, 4, n),
+        'trial_ID': rng.integers(1, 4, n),
+        'trial_total': 1,
+        'click_time': '00:30:00',
+        'choice_time': '00:31:00',
+        'tester': 'Ira',
+        'video': 9000 + session,
+    })
+
+
+def write_workbook(path, n_dogs=3, n_sessions=10, n_trials=40, seed=0):
+    trial_table(n_dogs, n_sessions, n_trials, seed).to_excel(path, index=False)
+    return path
+
+
+def log_text(dog, n_sessions=10, n_trials=40, seed=0):
+    """An experiment log of one dog (bytes); the rig writes the header again at the start of every session."""
+    rng = np.random.default_rng(seed)
+    scores, target = _scores(rng, 1, n_sessions, n_trials)
+    labels = pd.Series(scores).map({'hit': 'HIT', 'miss': 'MISS', 'fp': 'FA', 'cr': 'CR'}).to_numpy()
+    port = np.where(target, 1, -1)
+    lines = []
+    for session in range(n_sessions):
+        lines.append(LOG_HEADER)
+        day = (pd.Timestamp('2024-01-01') + pd.Timedelta(days=session // 2)).strftime('%d/%m/%Y')
+        for trial in range(n_trials):
+            i = session * n_trials + trial
+            start = 9 * 3600 + (session % 2) * 4 * 3600 + trial * 30
+            lines.append(f"{dog}; {day}; {session % 2 + 1}; {_clock(start)}; {_clock(start + 12)}; "
+                         f"dog_1_new Experiment; dog_1__level_1; {labels[i]}; {port[i]}; 0; {-port[i]}; 1; False")
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _clock(seconds):
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def write_log(path, dog, n_sessions=10, n_trials=40, seed=0):
+    with open(path, 'wb') as f:
+        f.write(log_text(dog, n_sessions, n_trials, seed))
+    return path
+
+
+def write_dataset(out_dir, n_dogs=3, n_sessions=10, n_trials=40, n_workbooks=1, logs=False, seed=0):
+    """
+    Write n_workbooks workbooks (the dogs split between them) and, with logs, one log per dog.
+    Returns (workbook paths, log paths).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    table = trial_table(n_dogs, n_sessions, n_trials, seed)
+    workbooks = []
+    for i, dogs in enumerate(np.array_split(np.array(dog_names(n_dogs)), n_workbooks)):
+        path = os.path.join(out_dir, f'North.data.synthetic_{i + 1}.xlsx')
+        table[table['dog'].isin(dogs)].to_excel(path, index=False)
+        workbooks.append(path)
+    log_paths = [write_log(os.path.join(out_dir, f'{dog}_dog_1_new Experiment.txt'), dog, n_sessions, n_trials,
+                           seed + i + 1)
+                 for i, dog in enumerate(dog_names(n_dogs))] if logs else []
+    return workbooks, log_paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic North.data workbooks and experiment logs.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--dogs', type=int, default=3)
+    parser.add_argument('--sessions', type=int, default=10, help="sessions per dog")
+    parser.add_argument('--trials', type=int, default=40, help="trials per session")
+    parser.add_argument('--workbooks', type=int, default=1)
+    parser.add_argument('--logs', action='store_true', help="also write one experiment log per dog")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    workbooks, logs = write_dataset(args.out_dir, args.dogs, args.sessions, args.trials, args.workbooks, args.logs,
+                                    args.seed)
+    for path in workbooks + logs:
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Bin and moving-window engine for d' trajectories.
+
+The trials are sorted once; per score label a prefix sum over the sorted trials is kept, with every
+dog occupying one contiguous run. The counts of any run of a dog's trials are then the difference
+of two prefix-sum rows, so a new bin size (or window/stride) costs O(number of bins), not a new
+sort and regroup of the trials.
+"""
+import numpy as np
+import pandas as pd
+
+from metrics import SCORE_COL
+from instrumentation import timed
+
+
+class BinEngine:
+    @timed('bin_index')
+    def __init__(self, df, order_by=('dog_name', 'date')):
+        order_by = list(order_by)
+        if order_by[0] != 'dog_name':
+            order_by = ['dog_name'] + order_by
+        df = df.sort_values(by=order_by, kind='stable')
+
+        dogs = df['dog_name'].to_numpy()
+        # first row of every dog's run of trials
+        starts = np.flatnonzero(np.r_[True, dogs[1:] != dogs[:-1]]) if len(dogs) else np.array([], dtype=int)
+        self.dog_names = dogs[starts]
+        self.starts = starts
+        self.ends = np.r_[starts[1:], len(dogs)].astype(int)
+
+        codes, labels = pd.factorize(df[SCORE_COL], sort=True)
+        self.labels = [str(label) for label in labels]
+        one_hot = np.zeros((len(codes), len(self.labels)), dtype=np.int32)
+        valid = codes >= 0  # missing scores are not counted, like value_counts
+        one_hot[np.flatnonzero(valid), codes[valid]] = 1
+        self.prefix = np.zeros((len(codes) + 1, len(self.labels)), dtype=np.int64)
+        np.cumsum(one_hot, axis=0, out=self.prefix[1:])
+
+    def _counts(self, dog_idx, first, last, numbers, level):
+        counts = self.prefix[last] - self.prefix[first]
+        index = pd.MultiIndex.from_arrays([self.dog_names[dog_idx], numbers + 1], names=['dog_name', level])
+        return pd.DataFrame(counts, index=index, columns=pd.Index(self.labels, name=SCORE_COL))
+
+    @timed('bins', rows=len)
+    def bins(self, bin_size):
+        """Counts per (dog_name, bin) for consecutive bins of bin_size trials (the last bin may be shorter)."""
+        lengths = self.ends - self.starts
+        n_bins = -(-lengths // bin_size)
+        dog_idx = np.repeat(np.arange(len(self.starts)), n_bins)
+        bin_no = np.arange(n_bins.sum()) - np.repeat(np.cumsum(n_bins) - n_bins, n_bins)
+        first = self.starts[dog_idx] + bin_no * bin_size
+        last = np.minimum(first + bin_size, self.ends[dog_idx])
+        return self._counts(dog_idx, first, last, bin_no, 'bin')
+
+    @timed('windows', rows=len)
+    def windows(self, window, stride=1):
+        """
+        Counts per (dog_name, window) for overlapping windows of `window` trials moved by `stride`.
+        A dog with fewer trials than the window gets a single window over all of them.
+        """
+        lengths = self.ends - self.starts
+        n_windows = np.maximum((lengths - window) // stride + 1, 1)
+        dog_idx = np.repeat(np.arange(len(self.starts)), n_windows)
+        win_no = np.arange(n_windows.sum()) - np.repeat(np.cumsum(n_windows) - n_windows, n_windows)
+        first = self.starts[dog_idx] + win_no * stride
+        last = np.minimum(first + window, self.ends[dog_idx])
+        return self._counts(dog_idx, first, last, win_no, 'window')
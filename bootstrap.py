@@ -0,0 +1,71 @@
+"""
+Bootstrap confidence intervals of d' per group (session, bin, window, ...).
+
+The trials of a group are resampled with replacement, the signal and the noise trials separately (so
+every resample has the group's number of targets and non-targets): the hits of a resample are one
+binomial draw from the signal trials at the observed hit rate, the false alarms one from the noise
+trials at the observed FA rate. All resamples of a batch of groups are drawn at once as a
+(groups x resamples) array and their d' computed with dprime.z_scores, so there is no Python loop
+over resamples. The interval is the percentile interval of the resampled d' values.
+
+Batches of groups are spread over a process pool (DOGS_BOOTSTRAP_WORKERS, 0 = one worker per CPU).
+Each batch has its own seed derived from `seed`, so the intervals do not depend on the number of
+workers.
+
+Time it with:  python benchmarks/bench_bootstrap.py
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dprime import z_scores
+from instrumentation import timed
+
+N_RESAMPLES = 2000
+CI_LEVEL = 0.95
+BOOTSTRAP_WORKERS = int(os.environ.get('DOGS_BOOTSTRAP_WORKERS', 0))
+# groups x resamples drawn at once (two int64 and a few float arrays of this size per batch)
+BATCH_CELLS = 2_000_000
+
+
+def _batch_ci(hit, miss, fa, cr, n_resamples, level, correction, seed):
+    """Lower and upper bound of d' for one batch of groups."""
+    rng = np.random.default_rng(seed)
+    signal = hit + miss
+    noise = fa + cr
+    shape = (len(hit), n_resamples)
+    hit_rate = np.divide(hit, signal, out=np.zeros(len(hit)), where=signal > 0)
+    fa_rate = np.divide(fa, noise, out=np.zeros(len(fa)), where=noise > 0)
+    hits = rng.binomial(signal[:, None], hit_rate[:, None], size=shape)
+    false_alarms = rng.binomial(noise[:, None], fa_rate[:, None], size=shape)
+    d_prime = (z_scores(hits, np.broadcast_to(signal[:, None], shape), correction) -
+               z_scores(false_alarms, np.broadcast_to(noise[:, None], shape), correction))
+    tail = (1 - level) / 2
+    low, high = np.quantile(d_prime, [tail, 1 - tail], axis=1)
+    return low, high
+
+
+@timed('bootstrap', rows=lambda result: len(result[0]))
+def d_prime_ci(hit, miss, fa, cr, n_resamples=N_RESAMPLES, level=CI_LEVEL, correction=None, seed=0,
+               max_workers=BOOTSTRAP_WORKERS):
+    """(low, high) arrays: the bootstrap interval of d' for every group of the outcome count arrays."""
+    hit, miss, fa, cr = (np.asarray(counts, dtype=np.int64) for counts in (hit, miss, fa, cr))
+    n_groups = len(hit)
+    batch = max(1, BATCH_CELLS // n_resamples)
+    starts = range(0, n_groups, batch)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    jobs = [(hit[i:i + batch], miss[i:i + batch], fa[i:i + batch], cr[i:i + batch], n_resamples, level, correction,
+             batch_seed) for i, batch_seed in zip(starts, seeds)]
+
+    if not max_workers:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(jobs))
+    if max_workers <= 1:
+        results = [_batch_ci(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_batch_ci, *zip(*jobs)))
+    if not results:
+        return np.empty(0), np.empty(0)
+    return np.concatenate([low for low, _ in results]), np.concatenate([high for _, high in results])
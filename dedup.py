@@ -0,0 +1,227 @@
+"""
+Drop trials that appear in more than one of the loaded files.
+
+North.data.combined.edit.xlsx also holds the trials of the monthly workbooks, so loading it together
+with them counted those trials twice. A trial is identified by KEY_COLUMNS. The same key occurs
+several times in one workbook (the n-th occurrence is its own trial), so the identity of a trial is a
+hash of its key and occurrence number. Files are taken in the order given: a trial is kept in the
+first file that has it and dropped from the later ones.
+
+For every prefix of the file list, named by a digest chained over the frames (their rows in order,
+as the entries hold row positions), the index stores what its last frame added: the sorted
+identities of its new trials and the positions of the dropped ones
+(in memory up to MEMORY_MB, and as .npz files in a subfolder of the workbook cache, bounded and
+cleared with it, see excel_cache.prune_folder). So the index grows with the number of trials, not
+with trials x prefixes. Loading the same files plus one new month reads the stored entries of the
+earlier months and only hashes the new one; an entry evicted meanwhile is hashed again from its
+frame. The chain starts from INDEX_VERSION and KEY_COLUMNS, so a change to either does not reuse old
+entries. Frames without the key columns (experiment logs) are passed through unchanged.
+
+Show what the bundled workbooks have in common with:  python dedup.py
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from excel_cache import CACHE_DIR, prune_folder, touch
+from instrumentation import timed
+
+KEY_COLUMNS = ['dog_name', 'date', 'num_session', 'trial', 'score (Hit/miss)']
+# experiment logs have no trial number: their trials are known by when they started (older rigs also
+# write no session number, see identity_columns)
+LOG_KEY_COLUMNS = ['dog_name', 'date', 'num_session', 'Time stamp of trial initiation', 'score (Hit/miss)']
+INDEX_DIR = os.path.join(CACHE_DIR, 'trial_index')  # one of excel_cache.DERIVED_DIRS
+# Bump when trial_keys or the stored entries change so old entries are not reused
+INDEX_VERSION = 3
+MEMORY_MB = 64
+EMPTY_KEYS = np.empty(0, dtype=np.uint64)
+
+
+def has_trial_key(df):
+    return all(name in df.columns for name in KEY_COLUMNS)
+
+
+def identity_columns(df):
+    """The columns that identify a trial of df: KEY_COLUMNS for a workbook, those of LOG_KEY_COLUMNS a log has."""
+    if has_trial_key(df):
+        return KEY_COLUMNS
+    if all(name in df.columns for name in ('dog_name', 'date', 'Time stamp of trial initiation')):
+        return [name for name in LOG_KEY_COLUMNS if name in df.columns]
+    return None
+
+
+def trial_keys(df, columns=KEY_COLUMNS):
+    """Identity of every trial of df (uint64): hash of its key columns and of its occurrence number."""
+    key = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    occurrence = pd.Series(key).groupby(key).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(pd.DataFrame({'key': key, 'occurrence': occurrence}), index=False).to_numpy()
+
+
+def _chain(previous, df):
+    """Digest of previous and of df's rows in their order."""
+    digest = hashlib.blake2b(f"{previous}:".encode(), digest_size=12)
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# the chain of the empty file list
+CHAIN_START = _chain(f"{INDEX_VERSION}:{','.join(KEY_COLUMNS)}", pd.DataFrame())
+
+
+def _seen(sorted_keys, keys):
+    """Which of keys are in sorted_keys."""
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[positions] == keys
+
+
+def _merged(sorted_keys, fresh):
+    """sorted_keys with the sorted, unique fresh keys (none of them in sorted_keys) inserted."""
+    return np.insert(sorted_keys, np.searchsorted(sorted_keys, fresh), fresh)
+
+
+class TrialIndex:
+    def __init__(self, index_dir=INDEX_DIR, memory_mb=MEMORY_MB):
+        self.index_dir = index_dir
+        self.max_bytes = memory_mb * 1024 * 1024
+        # chain digest -> {'fresh': identities the prefix's last frame added, sorted; 'dropped': its
+        # dropped row positions}, least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()  # the Streamlit sessions share the index
+
+    def _path(self, chain):
+        return os.path.join(self.index_dir, f"{chain}.npz")
+
+    def _read(self, chain):
+        """The entry of a stored prefix, or None when that prefix is not (or no longer) indexed."""
+        with self.lock:
+            entry = self.entries.get(chain)
+            if entry is not None:
+                self.entries.move_to_end(chain)
+                return entry
+        path = self._path(chain)
+        try:
+            with np.load(path) as stored:
+                if int(stored['version']) != INDEX_VERSION:
+                    return None
+                entry = {'fresh': stored['fresh'], 'dropped': stored['dropped']}
+        except (OSError, ValueError, KeyError):
+            return None
+        touch(path)
+        self._remember(chain, entry)
+        return entry
+
+    def _remember(self, chain, entry):
+        with self.lock:
+            self.entries[chain] = entry
+            self.entries.move_to_end(chain)
+            total = sum(e['fresh'].nbytes + e['dropped'].nbytes for e in self.entries.values())
+            while total > self.max_bytes and len(self.entries) > 1:
+                _, e = self.entries.popitem(last=False)
+                total -= e['fresh'].nbytes + e['dropped'].nbytes
+
+    def _write(self, chain, fresh, dropped):
+        self._remember(chain, {'fresh': fresh, 'dropped': dropped})
+        path = self._path(chain)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, version=INDEX_VERSION, fresh=fresh, dropped=dropped)
+            os.replace(tmp_path, path)
+            prune_folder(self.index_dir)
+        except OSError:
+            pass  # the in-memory entry is enough for this run
+
+    def _fresh(self, chain, df, dropped):
+        """The identities a frame added to the index: stored, or hashed again when the entry was evicted."""
+        entry = self._read(chain)
+        if entry is not None:
+            return entry['fresh']
+        return np.unique(np.delete(trial_keys(df), dropped))
+
+    def dedupe(self, dataframes):
+        """
+        The frames without the trials of earlier frames, and the number of trials dropped from each
+        (None for a frame without the key columns).
+        """
+        frames, dropped_counts = [], []
+        chain, keys = CHAIN_START, EMPTY_KEYS
+        pending = []  # (chain, frame, dropped) of the indexed frames whose identities are not in keys yet
+        for df in dataframes:
+            if not has_trial_key(df):
+                frames.append(df)
+                dropped_counts.append(None)
+                continue
+            chain = _chain(chain, df)
+            entry = self._read(chain)
+            if entry is None:
+                # a new prefix: look the frame up in the identities of the files before it
+                for pending_chain, pending_df, pending_dropped in pending:
+                    keys = _merged(keys, self._fresh(pending_chain, pending_df, pending_dropped))
+                pending = []
+                identities = trial_keys(df)
+                seen = _seen(keys, identities)
+                dropped = np.flatnonzero(seen)
+                fresh = np.unique(identities[~seen])
+                keys = _merged(keys, fresh)
+                self._write(chain, fresh, dropped)
+            else:
+                dropped = entry['dropped']
+                pending.append((chain, df, dropped))
+            if len(dropped):
+                keep = np.ones(len(df), dtype=bool)
+                keep[dropped] = False
+                df = df[keep]
+            frames.append(df)
+            dropped_counts.append(len(dropped))
+        return frames, dropped_counts
+
+
+_default_index = None
+
+
+def get_index():
+    global _default_index
+    if _default_index is None:
+        _default_index = TrialIndex()
+    return _default_index
+
+
+@timed('dedupe', rows=lambda result: sum(len(df) for df in result[0]))
+def dedupe_frames(dataframes):
+    """Drop the trials already loaded from an earlier frame; returns (frames, dropped per frame)."""
+    return get_index().dedupe(dataframes)
+
+
+def dropped_lines(names, dropped_counts):
+    """'<name>: N duplicate trial(s) dropped' for every file that lost trials."""
+    return [f"{name}: {dropped} duplicate trial(s) dropped"
+            for name, dropped in zip(names, dropped_counts) if dropped]
+
+
+def main():
+    from workbook_loader import load_workbooks
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                   if name.startswith('North.data') and name.endswith('.xlsx'))
+    dataframes, errors = load_workbooks(paths)
+    for name, e in errors:
+        print(f"Failed to load {name}: {e}")
+    failed = {name for name, _ in errors}
+    names = [os.path.basename(path) for path in paths if path not in failed]
+    frames, dropped_counts = dedupe_frames(dataframes)
+    for name, df, dropped in zip(names, dataframes, dropped_counts):
+        print(f"{name}: {len(df)} trials, {dropped} already in an earlier file")
+    print(f"{sum(len(df) for df in dataframes)} trials loaded, "
+          f"{sum(len(df) for df in frames)} after dropping duplicates")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Downsampling of long d' / rate series before they are sent to the browser.
+
+Largest-Triangle-Three-Buckets (LTTB) keeps at most MAX_POINTS points of a series while keeping its
+shape (peaks and dips survive, flat stretches are thinned). The Streamlit pages downsample only the
+range chosen with their range slider, so narrowing the range brings back the full detail; the tick
+spacing follows the shown range as well.
+"""
+import os
+
+import numpy as np
+
+MAX_POINTS = int(os.environ.get('DOGS_MAX_POINTS', 2000))
+MAX_TICKS = 40
+
+
+def lttb(x, y, n_out):
+    """Positions of the n_out points LTTB keeps of the series (x, y), first and last included."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the first and the last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # the point of this bucket spanning the largest triangle with the last kept point and the
+        # average of the next bucket
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def thin(df, y_cols, max_points=MAX_POINTS):
+    """Rows of df to plot: the union of the LTTB points of every y column (at most max_points in all)."""
+    y_cols = [y_cols] if isinstance(y_cols, str) else list(y_cols)
+    if len(df) <= max_points:
+        return df
+    x = df.index.to_numpy()
+    per_col = max(max_points // len(y_cols), 3)
+    rows = np.unique(np.concatenate([lttb(x, df[col].to_numpy(), per_col) for col in y_cols]))
+    return df.iloc[rows]
+
+
+def tick_step(span, max_ticks=MAX_TICKS):
+    """Smallest 1, 2 or 5 x 10^k step (at least 1) that puts at most max_ticks ticks on `span`."""
+    raw = max(span / max_ticks, 1)
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for step in (1, 2, 5, 10):
+        if step * magnitude >= raw:
+            return int(step * magnitude)
@@ -0,0 +1,220 @@
+"""
+On-disk cache of preprocessed North.data workbooks.
+
+Every workbook is parsed (xlsx_reader) and preprocessed once; the result is stored as an
+uncompressed Arrow IPC (feather) file so the next load of the same workbook is a memory-mapped read.
+Entries are keyed by the content hash of the workbook; path, size and mtime are remembered so an
+unchanged file on disk is recognized without hashing it again. The cache is bounded in size and
+evicts the least recently used entries. The tables derived from the loaded frames live in
+subfolders (DERIVED_DIRS); each is bounded to DERIVED_SHARE of the budget in the same way (see
+prune_folder) and is removed with the cache.
+
+Clear it from the command line with:  python excel_cache.py clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from preprocessing import read_workbook
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # the cache is optional, without pyarrow every load parses the workbook
+    feather = None
+
+CACHE_DIR = os.environ.get('DOGS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.dogs_cache'))
+CACHE_MAX_MB = float(os.environ.get('DOGS_CACHE_MAX_MB', 512))
+# Bump when preprocess_excel changes so old entries are not reused
+CACHE_VERSION = 2
+INDEX_NAME = 'index.json'
+# subfolders of tables derived from the loaded frames (aggregate_store.AGGREGATE_DIR, dedup.INDEX_DIR),
+# and the part of CACHE_MAX_MB each may use
+DERIVED_DIRS = ('aggregates', 'trial_index')
+DERIVED_SHARE = 0.25
+
+
+def touch(path):
+    """Mark a file of a derived folder as used (prune_folder evicts the oldest modification times first)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_folder(folder, max_bytes=int(CACHE_MAX_MB * DERIVED_SHARE * 1024 * 1024)):
+    """Delete the least recently used files of folder until the others fit in max_bytes (the newest one stays)."""
+    try:
+        files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                 for entry in os.scandir(folder) if entry.is_file()]
+    except OSError:
+        return
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files)[:-1]:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass  # in use (memory-mapped on Windows) or already gone
+
+
+class WorkbookCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=int(CACHE_MAX_MB * 1024 * 1024)):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, INDEX_NAME)
+
+    # --- index handling ---
+    def _read_index(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {'version': CACHE_VERSION, 'files': {}, 'entries': {}}
+        if index.get('version') != CACHE_VERSION:
+            return {'version': CACHE_VERSION, 'files': {}, 'entries': {}}
+        return index
+
+    def _write_index(self, index):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _entry_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.arrow")
+
+    # --- keys ---
+    @staticmethod
+    def _hash_bytes(data):
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+    def _digest(self, source, index):
+        """Content hash of a path or an uploaded file; unchanged paths reuse the hash stored in the index."""
+        if isinstance(source, (str, os.PathLike)):
+            path = os.path.abspath(source)
+            stat = os.stat(path)
+            known = index['files'].get(path)
+            if known and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime_ns:
+                return known['digest']
+            with open(path, 'rb') as f:
+                digest = self._hash_bytes(f.read())
+            index['files'][path] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'digest': digest}
+            return digest
+        # Streamlit UploadedFile and other in-memory buffers
+        data = source.getvalue()
+        return self._hash_bytes(data)
+
+    # --- public api ---
+    def get(self, source):
+        """Cached preprocessed DataFrame of a workbook, or None when it has not been cached yet."""
+        if feather is None:
+            return None
+        index = self._read_index()
+        digest = self._digest(source, index)
+        entry_path = self._entry_path(digest)
+        entry = index['entries'].get(digest)
+        if entry is None or not os.path.exists(entry_path):
+            self._write_index(index)  # keep the freshly computed file hash
+            return None
+        df = feather.read_table(entry_path, memory_map=True).to_pandas()
+        entry['last_used'] = time.time()
+        self._write_index(index)
+        return df
+
+    def put(self, source, df):
+        """Store the preprocessed DataFrame of a workbook and evict old entries if needed."""
+        if feather is None:
+            return
+        index = self._read_index()
+        digest = self._digest(source, index)
+        entry_path = self._entry_path(digest)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, entry_path)
+        index['entries'][digest] = {'bytes': os.path.getsize(entry_path), 'last_used': time.time()}
+        self._evict(index)
+        self._write_index(index)
+
+    def load(self, source):
+        """Return the preprocessed DataFrame of a workbook, from the cache when possible."""
+        df = self.get(source)
+        if df is None:
+            df = read_workbook(source)
+            self.put(source, df)
+        return df
+
+    def _evict(self, index):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = index['entries']
+        total = sum(e['bytes'] for e in entries.values())
+        for digest in sorted(entries, key=lambda d: entries[d]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entries[digest]['bytes']
+            del entries[digest]
+            try:
+                os.remove(self._entry_path(digest))
+            except OSError:
+                pass
+        live = set(entries)
+        index['files'] = {p: f for p, f in index['files'].items() if f['digest'] in live}
+
+    def size(self):
+        return sum(e['bytes'] for e in self._read_index()['entries'].values())
+
+    def clear(self):
+        """Delete every cached workbook and the derived folders; returns the number of workbooks removed."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.arrow'):
+                removed += 1
+            if name.endswith(('.arrow', '.tmp')) or name == INDEX_NAME:
+                os.remove(os.path.join(self.cache_dir, name))
+        for name in DERIVED_DIRS:
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+        return removed
+
+
+_default_cache = None
+
+
+def get_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = WorkbookCache()
+    return _default_cache
+
+
+def load_workbook(source):
+    """Preprocessed DataFrame of one workbook (path or uploaded file), served from the shared cache."""
+    return get_cache().load(source)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the preprocessed workbook cache.")
+    parser.add_argument('command', choices=['clear', 'info'])
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    cache = WorkbookCache(args.cache_dir)
+    if args.command == 'clear':
+        print(f"Removed {cache.clear()} cached workbook(s) and the derived tables from {cache.cache_dir}")
+    else:
+        index = cache._read_index()
+        print(f"{cache.cache_dir}: {len(index['entries'])} workbook(s), "
+              f"{cache.size() / 1024 / 1024:.1f} MB of {cache.max_bytes / 1024 / 1024:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
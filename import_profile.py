@@ -0,0 +1,65 @@
+"""
+Import-time profiling for the startup path (what `python -X importtime` reports, summarized).
+
+    python new_run_all.py --profile-imports
+"""
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+
+def _importtime_lines(modules, cwd=None):
+    """
+    (self us, cumulative us, name) of the imports of `modules` run in cwd; the imports of the
+    interpreter start-up (site, encodings, ...) are left out.
+    """
+    code = 'import ' + ', '.join(modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            cwd=cwd)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise RuntimeError(f"{code!r} failed in {cwd or os.getcwd()}: {error[-1] if error else result.returncode}")
+    # the module and its parent packages are imported at the top level, everything else nested in them
+    wanted = {'.'.join(parts[:i]) for parts in (module.split('.') for module in modules)
+              for i in range(1, len(parts) + 1)}
+    nested = []  # lines come after the imports nested in them
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        nested.append((int(self_us), int(cumulative_us), name.rstrip()[1:]))  # nested imports stay indented
+        if not name[1:].startswith(' '):
+            if name.strip() in wanted:
+                yield from nested
+            nested = []
+
+
+def profile_imports(modules, cwd=None):
+    """
+    (self seconds, cumulative seconds, module) for every module imported by `modules` (from cwd),
+    slowest first; raises RuntimeError when the import fails. A frozen (PyInstaller) build cannot run
+    -X importtime, so only the listed modules are timed there.
+    """
+    if getattr(sys, 'frozen', False):
+        rows = []
+        for module in modules:
+            start = time.perf_counter()
+            importlib.import_module(module)
+            elapsed = time.perf_counter() - start
+            rows.append((elapsed, elapsed, module))
+    else:
+        rows = [(s / 1e6, c / 1e6, name) for s, c, name in _importtime_lines(modules, cwd)]
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+def print_report(modules, top=25, file=None, cwd=None):
+    rows = profile_imports(modules, cwd)
+    file = file or sys.stdout
+    top_level = sum(c for s, c, name in rows if not name.startswith(' '))
+    print(f"Import time of {', '.join(modules)}: {top_level:.2f} s", file=file)
+    print(f"{'self [s]':>9} {'cumulative [s]':>15}  module", file=file)
+    for self_s, cumulative_s, name in rows[:top]:
+        print(f"{self_s:>9.3f} {cumulative_s:>15.3f}  {name}", file=file)
+    return top_level
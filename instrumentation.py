@@ -0,0 +1,187 @@
+"""
+Timing and memory of the pipeline stages (load, preprocess, group, bin, figure, ...).
+
+    with span('combine', rows=len(df)):       # or span.rows = ... inside the block
+        ...
+    @timed('load_workbooks', rows=lambda result: sum(len(df) for df in result[0]))
+    def load_workbooks(...):
+
+Every finished stage is written to the 'dogs.stages' logger as one key=value line (seconds, rows,
+growth of the peak resident memory in MB, nesting depth) and added to the current collector, so a
+page can show the stages of its last run (render_timings for Streamlit, summary for the Tk app).
+
+Set DOGS_INSTRUMENT=0 to switch it off: @timed then returns the function unchanged and span() a
+shared no-op context manager.
+"""
+import contextvars
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENABLED = os.environ.get('DOGS_INSTRUMENT', '1') != '0'
+LOG_NAME = 'dogs.stages'
+logger = logging.getLogger(LOG_NAME)
+
+_records = contextvars.ContextVar('stage_records', default=None)
+_depth = contextvars.ContextVar('stage_depth', default=0)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB (None where it cannot be read)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KB elsewhere
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss) / 1024 / 1024
+
+
+class Span:
+    def __init__(self, stage, rows=None):
+        self.stage = stage
+        self.rows = rows
+        self.seconds = None
+        self.peak_rss_delta_mb = None
+        self.depth = 0
+
+    def __enter__(self):
+        self.depth = _depth.get()
+        self._depth_token = _depth.set(self.depth + 1)
+        self._peak = peak_rss_mb()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        peak = peak_rss_mb()
+        if peak is not None and self._peak is not None:
+            self.peak_rss_delta_mb = peak - self._peak
+        _depth.reset(self._depth_token)
+        records = _records.get()
+        if records is not None:
+            records.append(self)
+        logger.info(self.log_line(failed=exc_type is not None))
+        return False
+
+    def log_line(self, failed=False):
+        fields = [f"stage={self.stage}", f"seconds={self.seconds:.4f}"]
+        if self.rows is not None:
+            fields.append(f"rows={self.rows}")
+        if self.peak_rss_delta_mb is not None:
+            fields.append(f"peak_rss_delta_mb={self.peak_rss_delta_mb:.1f}")
+        fields.append(f"depth={self.depth}")
+        if failed:
+            fields.append("failed=1")
+        return " ".join(fields)
+
+
+class _NoSpan:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass  # span.rows = ... is ignored
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage, rows=None):
+    """Context manager timing one stage; set .rows on it when the row count is only known inside."""
+    return Span(stage, rows) if ENABLED else _NO_SPAN
+
+
+def timed(stage, rows=None):
+    """Decorator timing every call of a function; rows(result) gives the rows it processed."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(stage) as current:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    current.rows = rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def collect():
+    """Collect the spans finished inside the block (in this thread): with collect() as records: ..."""
+    records = []
+    token = _records.set(records)
+    try:
+        yield records
+    finally:
+        _records.reset(token)
+
+
+def log_to_file(path=None):
+    """
+    Write the stage lines to path, by default stages.log in the workbook cache folder rather than the
+    working directory (once per process; the apps call it at start-up).
+    """
+    if path is None:
+        from excel_cache import CACHE_DIR
+        path = os.path.join(CACHE_DIR, 'stages.log')
+    if not ENABLED or any(getattr(handler, 'baseFilename', None) == os.path.abspath(path)
+                          for handler in logger.handlers):
+        return
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = logging.FileHandler(path, encoding='utf-8')
+    except OSError:
+        return  # the stages are still shown by the apps
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False  # not into new_run_all's debug log of the root logger (app_log.txt)
+
+
+def timing_rows(records):
+    """One dict per span, nested stages indented, in the order the stages started."""
+    ordered = sorted(records, key=lambda record: record._start)
+    return [dict(stage='  ' * record.depth + record.stage, seconds=round(record.seconds, 4), rows=record.rows,
+                 peak_rss_delta_mb=None if record.peak_rss_delta_mb is None else round(record.peak_rss_delta_mb, 1))
+            for record in ordered]
+
+
+def summary(records):
+    """One line with the time of every top-level stage (repeated stages added up), e.g. for a status label."""
+    seconds = {}
+    for record in sorted(records, key=lambda record: record._start):
+        if record.depth == 0:
+            seconds[record.stage] = seconds.get(record.stage, 0.0) + record.seconds
+    if not seconds:
+        return ""
+    return (" · ".join(f"{stage} {total:.2f} s" for stage, total in seconds.items()) +
+            f" (total {sum(seconds.values()):.2f} s)")
+
+
+def render_timings(container, records=None):
+    """Collapsible table of the stages of this run (default: the collector of the enclosing collect())."""
+    records = _records.get() if records is None else records
+    if not records:
+        return
+    box = container.expander("Timings")
+    box.caption(summary(records))
+    box.dataframe(timing_rows(records), hide_index=True)
@@ -0,0 +1,101 @@
+"""
+Tail-follow ingestion of experiment logs while the rig is still writing them.
+
+A LogFollower remembers, for every log file, the byte offset up to which it has parsed complete
+lines. Each poll reads only the bytes appended since then, parses them with the log parser and
+folds the new trials into running HIT/MISS/FA/CR counters per (dog, date, session). The cost of a
+poll therefore depends on the number of new trials, not on the length of the history.
+"""
+import glob
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregate_store import SESSION_KEYS, with_session
+from log_parser import dog_name_from_file, parse_body
+from metrics import OUTCOMES, SCORE_COL, rates_table
+
+
+class _FollowedLog:
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.header = None
+        self.size = 0
+
+
+class LogFollower:
+    def __init__(self, pattern):
+        """pattern: a folder (all *.txt logs in it), a glob, or a single log path."""
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.txt')
+        self.pattern = pattern
+        self.logs = {}
+        # (dog, date, session) -> counts in OUTCOMES order
+        self.counts = {}
+        self.total_trials = 0
+
+    def _read_new_bytes(self, log):
+        size = os.path.getsize(log.path)
+        log.size = size
+        if size == log.offset:
+            return b''
+        with open(log.path, 'rb') as f:
+            f.seek(log.offset)
+            if log.header is None:
+                log.header = f.readline()
+                if not log.header.endswith(b'\n'):  # header not fully written yet
+                    log.header = None
+                    return b''
+                log.offset = f.tell()
+            data = f.read(size - log.offset)
+        end = data.rfind(b'\n') + 1  # only complete lines, the rig may be mid-write
+        log.offset += end
+        return data[:end]
+
+    def poll(self):
+        """Parse the lines appended since the last poll; returns the new trials."""
+        paths = sorted(glob.glob(self.pattern))
+        if any(os.path.getsize(path) < self.logs[path].size for path in paths if path in self.logs):
+            self.reset()  # a log was truncated or replaced: rebuild the counters from scratch
+        frames = []
+        for path in paths:
+            log = self.logs.setdefault(path, _FollowedLog(path))
+            data = self._read_new_bytes(log)
+            if not data:
+                continue
+            frames.append(parse_body(io.BytesIO(data), log.header, dog_name=dog_name_from_file(path)))
+        if not frames:
+            return pd.DataFrame()
+        new_trials = pd.concat(frames, ignore_index=True)
+        self._fold(new_trials)
+        return new_trials
+
+    def _fold(self, trials):
+        trials = trials[trials[SCORE_COL].isin(OUTCOMES)]
+        if trials.empty:
+            return
+        trials = with_session(trials)  # logs of older rigs have no session column
+        new_counts = (trials.groupby(SESSION_KEYS + [SCORE_COL], observed=True).size()
+                      .unstack(SCORE_COL, fill_value=0).reindex(columns=OUTCOMES, fill_value=0))
+        for key, row in zip(new_counts.index, new_counts.to_numpy()):
+            if key in self.counts:
+                self.counts[key] += row
+            else:
+                self.counts[key] = row.astype(np.int64)
+        self.total_trials += len(trials)
+
+    def reset(self):
+        self.logs = {}
+        self.counts = {}
+        self.total_trials = 0
+
+    def session_table(self, correction=None):
+        """Per-session counts with hit_rate, fa_rate and d_prime, ordered by dog, date and session."""
+        if not self.counts:
+            return pd.DataFrame(columns=SESSION_KEYS + OUTCOMES + ['hit_rate', 'fa_rate', 'd_prime'])
+        index = pd.MultiIndex.from_tuples(list(self.counts), names=SESSION_KEYS)
+        counts = pd.DataFrame(np.vstack(list(self.counts.values())), index=index, columns=OUTCOMES)
+        return rates_table(counts.sort_index(), correction)
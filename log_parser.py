@@ -0,0 +1,144 @@
+"""
+Streaming parser for the semicolon-delimited experiment logs (*_dog_1_new Experiment.txt).
+
+The file is fed in blocks through pandas' C CSV engine with typed columns. Header lines that the
+rig repeats inside a log (every time a new session starts appending) are dropped from the byte
+stream before tokenizing, and surrounding whitespace is handled by the parser itself, so the raw
+text is never held as a list of lines or as a frame of Python strings.
+"""
+import io
+import os
+
+import pandas as pd
+
+from schema import apply_schema, concat_frames, read_dtypes
+from instrumentation import timed
+
+CHUNK_LINES = 65536
+BLOCK_SIZE = 1 << 20
+DATE_FORMAT = '%d/%m/%Y'
+
+TIME_COLUMNS = ['Time stamp of trial initiation', 'termination']
+
+
+class _SkipRepeatedHeaders(io.RawIOBase):
+    """Binary stream over a log that leaves out every copy of the header line."""
+
+    def __init__(self, raw, header):
+        self.raw = raw
+        self.header = header.strip()
+        self.tail = b''
+        self.buffer = b''
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        block = self.raw.read(BLOCK_SIZE)
+        if not block:
+            self.eof = True
+            lines, self.tail = [self.tail], b''
+        else:
+            data = self.tail + block
+            cut = data.rfind(b'\n') + 1
+            if cut == 0:  # no complete line yet
+                self.tail = data
+                return
+            lines, self.tail = data[:cut].split(b'\n'), data[cut:]
+            lines.pop()  # empty string after the last newline
+            lines = [line + b'\n' for line in lines]
+        header = self.header
+        self.buffer += b''.join(line for line in lines if line.strip() != header)
+
+    def readinto(self, b):
+        while not self.buffer and not self.eof:
+            self._fill()
+        n = min(len(b), len(self.buffer))
+        b[:n] = self.buffer[:n]
+        self.buffer = self.buffer[n:]
+        return n
+
+
+def _strip_categories(col):
+    stripped = col.cat.categories.str.strip()
+    if stripped.is_unique:
+        return col.cat.rename_categories(stripped)
+    return col.astype(str).str.strip().astype('category')
+
+
+def _decode_categories(col, convert):
+    """Convert each distinct value once and spread the result with the category codes."""
+    values = convert(col.cat.categories)
+    return pd.Series(values.take(col.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT),
+                     index=col.index, name=col.name)
+
+
+@timed('parse_log', rows=len)
+def parse_log(source, dog_name=None, chunk_lines=CHUNK_LINES):
+    """
+    Parse one experiment log (path or binary file object) into a typed DataFrame.
+    dog_name is used when the log itself has no dog_name column (older rigs).
+    """
+    raw = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    if raw is source and source.seekable():
+        source.seek(0)  # Streamlit hands back the same buffer on every rerun
+    try:
+        header = raw.readline()
+        return parse_body(raw, header, dog_name, chunk_lines)
+    finally:
+        if raw is not source:
+            raw.close()
+
+
+def log_columns(header):
+    return [name.strip() for name in header.decode('utf-8').strip().split(';')]
+
+
+def parse_body(raw, header, dog_name=None, chunk_lines=CHUNK_LINES):
+    """Parse the trial lines of a log (binary stream positioned after the header line)."""
+    names = log_columns(header)
+    dtypes = read_dtypes(names)
+    stream = io.BufferedReader(_SkipRepeatedHeaders(raw, header))
+    reader = pd.read_csv(stream, sep=';', header=None, names=names, dtype=dtypes, engine='c',
+                         skipinitialspace=True, encoding='utf-8', chunksize=chunk_lines)
+    chunks = list(reader)
+
+    df = concat_frames(chunks) if chunks else pd.DataFrame({name: pd.Series(dtype=dtypes[name]) for name in names})
+    for name in df.columns:
+        if isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = _strip_categories(df[name])
+    if 'date' in df.columns:
+        df['date'] = _decode_categories(df['date'], lambda days: pd.to_datetime(days, format=DATE_FORMAT))
+    for name in TIME_COLUMNS:
+        if name in df.columns:
+            df[name] = _decode_categories(df[name], pd.to_timedelta)
+    if 'dog_name' not in df.columns and dog_name is not None:
+        df.insert(0, 'dog_name', pd.Categorical([dog_name] * len(df)))
+    return apply_schema(df)  # validates the columns read as text and the ones added here
+
+
+def dog_name_from_file(name):
+    """The rig names logs '<dog>_dog_1_new Experiment.txt'."""
+    return os.path.basename(name).split("_")[0]
+
+
+def parse_logs(uploaded_files):
+    """Parse several logs, one typed frame per file; the file name prefix names the dog when the log does not."""
+    frames = []
+    for uploaded_file in uploaded_files:
+        name = getattr(uploaded_file, 'name', uploaded_file)
+        frames.append(parse_log(uploaded_file, dog_name=dog_name_from_file(name)))
+    return frames
+
+
+@timed('combine', rows=len)
+def combine_logs(frames):
+    if not frames:
+        return pd.DataFrame()
+    return concat_frames(frames)
+
+
+def load_logs(uploaded_files):
+    """Parse and combine several logs."""
+    return combine_logs(parse_logs(uploaded_files))
@@ -1,74 +1,63 @@
 
 import plotly.express as px
 import streamlit as st
-import pandas as pd
-from general_functions import *
+from metrics import groupping_counts
+from dprime import CORRECTIONS, DEFAULT_CORRECTION
+from bootstrap import CI_LEVEL, N_RESAMPLES
+from log_parser import combine_logs, parse_logs
+from aggregate_store import session_counts_for
+from warehouse import import_loaded
+from binning import BinEngine
+from outcome_cube import build_cube, render_drill_down
+from live_log import LogFollower
+from report_figure import boundary_annotations, boundary_shapes, ci_band, session_boundaries
+from downsample import MAX_POINTS, thin, tick_step
+from page_cache import get_page_cache, render_stats, uploads_key
+from instrumentation import collect, log_to_file, render_timings, timed
+import time
 import matplotlib.pyplot as plt
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
 
 # on the command prompt run: streamlit run C:\noam\dogs\pythonProject\main_stream.py
 def load_data(uploaded_files):
-    """Load and combine the content of selected files into a DataFrame."""
-    all_files = []
-    for uploaded_file in uploaded_files:
-        lines = uploaded_file.readlines()
-        file_name = uploaded_file.name.split("_")[0]
-        lines = [file_name + '; ' + line.decode('utf-8') for line in lines]
-        all_files += lines
-
-    data = [line.strip().split(';') for line in all_files]
-    df = pd.DataFrame(data)#, columns=["Filename", "Content"]
-    return df
-
-def groupping(df,group_by_lst):
-    v_count = df.groupby(group_by_lst)['score (Hit/miss)'].apply('value_counts')
-    hit_rate = df.groupby(group_by_lst)['score (Hit/miss)'].apply(lambda x: hit_rate_cal(x))
-    hit_rate.rename("hit_rate", inplace=True)
-    fa_rate = df.groupby(group_by_lst)['score (Hit/miss)'].apply(lambda x: fa_rate_cal(x))
-    fa_rate.rename("fa_rate", inplace=True)
-    all_data = pd.merge(v_count, hit_rate, left_on=group_by_lst, right_index=True, how='left')
-    all_data = pd.merge(all_data, fa_rate, left_on=group_by_lst, right_index=True, how='left')
-    all_data['d_prime'] = calculate_d(all_data['hit_rate'], all_data['fa_rate'])
-
-    all_data = all_data.reset_index()
-    #st.write(all_data)
-    all_data_remove_duplicates = all_data.drop_duplicates(subset=group_by_lst, keep='last')
-    all_data_remove_duplicates = all_data_remove_duplicates.reset_index()
-
-    return all_data_remove_duplicates, all_data
-
+    """
+    Load and combine the content of selected files into a typed DataFrame (see log_parser).
+    Also returns the per-session outcome counts of the files (see aggregate_store).
+    """
+    frames = parse_logs(uploaded_files)
+    import_loaded(frames, [getattr(f, 'name', f) for f in uploaded_files])  # into the local trial warehouse
+    return combine_logs(frames), session_counts_for(frames)
+
+@timed('plot_line')
 def plot_line(df,y_axis,x_axis_tlt,y_axis_tlt,title,if_sessions = False):
     # st.scatter_chart(selected_dog,y=['hit_rate','fa_rate'],use_container_width=True)
 
+    # Only the range picked on the slider is drawn, downsampled to at most MAX_POINTS points
+    first, last = (int(df.index[0]), int(df.index[-1])) if len(df) else (1, 0)
+    if len(df) > MAX_POINTS:
+        first, last = st.slider(f"{title}: range shown", first, last, (first, last), key=f"range_{title}")
+        df = df.loc[first:last]
+    shown = thin(df, y_axis)
+
     if df.shape[0] < 2:
-        fig = px.scatter(df, y=y_axis, title=title)
+        fig = px.scatter(shown, y=y_axis, title=title)
     else:
-        fig = px.line(df, y=y_axis, title=title)
+        fig = px.line(shown, y=y_axis, title=title)
         if if_sessions:
-            # Identify the index positions of the first occurrences of each date
-            df['date_id'] = df['date'].factorize()[0]
+            # First row of every date in one pass, all boundaries added in one layout update
+            positions, dates = session_boundaries(df)
             if isinstance(y_axis, list):
                 y_position = max([df[i].max() for i in y_axis])
                 st.write('list')
             else:
                 st.write('not_list')
                 y_position = df[y_axis].max()
-            for date_id in df['date_id'].unique():
-                date = df.loc[df['date_id'] == date_id, 'date'].values[0]
-                x_position = df.loc[df['date_id'] == date_id].iloc[0].name
-
-                fig.add_vline(x=x_position, line_dash='dash', line_color='rgb(211, 215, 222)')#annotation_text=f'{date}'
-                fig.add_annotation(
-                    x=x_position-0.3,
-                    y=y_position+0.5,
-                    text=date,
-                    showarrow=False,
-                    textangle=270,  # Angle of the text
-
-                    font=dict(color='rgb(97, 98, 99)')
-                )#                    xanchor='left',,
-                   # yanchor='bottom',  # Position the annotation text at the top of the plot
+            fig.update_layout(shapes=boundary_shapes(positions, dict(color='rgb(211, 215, 222)', dash='dash')),
+                              annotations=boundary_annotations(positions, dates, y_position + 0.5, 0.3))
+    if y_axis == 'd_prime' and 'd_prime_low' in shown.columns:
+        # bootstrap confidence interval, drawn first so the line stays on top
+        fig = go.Figure(data=ci_band(shown) + list(fig.data), layout=fig.layout)
 
 
     # # Customize the layout of the plot (optional)
@@ -93,15 +82,16 @@ def plot_line(df,y_axis,x_axis_tlt,y_axis_tlt,title,if_sessions = False):
     # Set the x-axis range
     # fig.update_xaxes(range=[0, selected_dog.shape[0]])
     fig.update_xaxes(
-        range=[0, df.shape[0]+1],
+        range=[first - 1, last + 1],
         tickmode='linear',
         tick0=0,
-        dtick=1
+        dtick=tick_step(last - first)  # about MAX_TICKS ticks at any zoom
     )
 
     # Display the interactive plot in Streamlit
     st.plotly_chart(fig, use_container_width=True)
 
+@timed('plot_score_dist')
 def plot_score_dist(df):
     dog_names = df['dog_name'].unique()
 
@@ -122,7 +112,42 @@ def plot_score_dist(df):
 
     st.plotly_chart(fig)
 
+def watch_logs():
+    """Follow the logs the rig is writing and redraw the session charts as trials are appended."""
+    st.title('Live Session Monitor')
+    log_source = st.sidebar.text_input("Log folder or file pattern to follow")
+    refresh = st.sidebar.number_input("Refresh every (seconds)", min_value=1, value=2)
+    correction = st.sidebar.selectbox("d' correction for rates of 0 and 1", CORRECTIONS,
+                                      index=CORRECTIONS.index(DEFAULT_CORRECTION))
+    if not log_source:
+        st.write("Enter the folder the rig writes its experiment logs to")
+        return
+
+    # The follower keeps its byte offsets and running counters between reruns
+    if st.session_state.get('follower_source') != log_source:
+        st.session_state['follower'] = LogFollower(log_source)
+        st.session_state['follower_source'] = log_source
+    follower = st.session_state['follower']
+    new_trials = follower.poll()
+    sessions = follower.session_table(correction)
+    st.caption(f"{follower.total_trials} trials so far, {len(new_trials)} new since the last refresh")
+
+    if not sessions.empty:
+        selected_name = st.sidebar.selectbox("Select a Name", sessions["dog_name"].unique())
+        selected_dog = sessions[sessions["dog_name"] == selected_name].reset_index(drop=True)
+        selected_dog.index = selected_dog.index + 1
+        st.write(selected_dog)
+        plot_line(selected_dog, 'd_prime', 'session', 'D prime', 'D-Prime over time', True)
+        plot_line(selected_dog, ['hit_rate', 'fa_rate'], 'session', 'Rate', 'Hit and FA rates over time', True)
+
+    time.sleep(refresh)
+    st.rerun()
+
 def main():
+    if st.sidebar.checkbox("Live watch mode"):
+        watch_logs()
+        return
+
     st.title('Text Files Viewer and Combiner')
 
     st.sidebar.title("Upload Text Files")
@@ -130,17 +155,12 @@ def main():
 
 
     if uploaded_files:
-        df = load_data(uploaded_files)
+        # Parsing and grouping are cached (see page_cache), a rerun for another dog only redraws
+        cache = get_page_cache()
+        data_key = uploads_key(uploaded_files)
+        df, session_counts = cache.get_or_compute('parsed', data_key, lambda: load_data(uploaded_files))
         #""" pre-processed data """
-        # set columns name
-        df.columns = df.iloc[0]
-        df.drop(columns=df.columns[0], axis=1, inplace=True)  # drop first col
-        df = df.rename(columns=lambda
-            x: x.strip() if x is not None else x)  # Remove leading and trailing spaces from all columns names
-        df = df.map(
-            lambda x: x.strip() if isinstance(x, str) else x)  # Remove leading and trailing spaces from all values
-        df = df.loc[
-            df['date'] != "date"]  # filter the wrong rows (that is actually names of the columns of the text files)
+        # column names, whitespace, types and the repeated header rows are all handled while parsing
         st.subheader("Data After pre-processing")
         st.write(df)
 
@@ -148,27 +168,55 @@ def main():
         #""" choose how to display the data """
         option = st.sidebar.radio(
             "Display Options",
-            ("By Sessions", "All Together", "By Bin Size")
+            ("By Sessions", "All Together", "By Bin Size", "Moving Window", "Drill Down")
         )
+        correction = st.sidebar.selectbox("d' correction for rates of 0 and 1", CORRECTIONS,
+                                          index=CORRECTIONS.index(DEFAULT_CORRECTION))
+        if option == "Drill Down":
+            # counts over every dimension, built once per load; each roll-up sums the cube (see outcome_cube)
+            cube = cache.get_or_compute('cube', data_key, lambda: build_cube(df))
+            render_drill_down(st, cube, correction)
+            render_stats(st.sidebar, cache)
+            return
+        # bootstrap resamples per group for the interval of d' (0: no interval)
+        ci = N_RESAMPLES if st.sidebar.checkbox(f"Bootstrap {CI_LEVEL:.0%} interval of d'") else 0
         res = []
         with_duplicates = []
         tlt_x_axis = ''
         if_sessions = False
         if option == "By Sessions":
-            res, with_duplicates = groupping(df,['dog_name', 'date', 'num_session'])
+            res, with_duplicates = cache.get_or_compute(
+                'grouped', (data_key, option, correction, ci),
+                lambda: groupping_counts(session_counts, ['dog_name', 'date', 'num_session'], correction=correction,
+                                         ci=ci))
             tlt_x_axis = 'session'
             if_sessions = True
         elif option == "All Together":
-            res, with_duplicates = groupping(df,['dog_name'])
+            res, with_duplicates = cache.get_or_compute(
+                'grouped', (data_key, option, correction, ci),
+                lambda: groupping_counts(session_counts, ['dog_name'], correction=correction, ci=ci))
             tlt_x_axis = ''
         elif option == "By Bin Size":
             bin_size = st.sidebar.number_input("Bin Size", min_value=1, value=10)
             tlt_x_axis = 'Bins: bin size=' + str(bin_size)
-            df_sorted = df.sort_values(by=['dog_name', 'date', 'Time stamp of trial initiation'])
-            df_sorted['bin'] = df_sorted.groupby('dog_name').cumcount() // bin_size + 1
+            # one sort, then every bin size is a difference of prefix sums (see binning.BinEngine)
+            bin_engine = cache.get_or_compute('bins', data_key, lambda: BinEngine(
+                df, order_by=['dog_name', 'date', 'Time stamp of trial initiation']))
             """ by_bins """
-            #st.write(df_sorted)
-            res, with_duplicates = groupping(df_sorted, ['dog_name','bin'])
+            res, with_duplicates = cache.get_or_compute(
+                'grouped', (data_key, option, bin_size, correction, ci),
+                lambda: groupping_counts(bin_engine.bins(bin_size), ['dog_name', 'bin'], correction=correction,
+                                         ci=ci))
+        elif option == "Moving Window":
+            window = st.sidebar.number_input("Window (trials)", min_value=1, value=50)
+            stride = st.sidebar.number_input("Stride (trials)", min_value=1, value=5)
+            tlt_x_axis = f'Windows: size={window}, stride={stride}'
+            bin_engine = cache.get_or_compute('bins', data_key, lambda: BinEngine(
+                df, order_by=['dog_name', 'date', 'Time stamp of trial initiation']))
+            res, with_duplicates = cache.get_or_compute(
+                'grouped', (data_key, option, window, stride, correction, ci),
+                lambda: groupping_counts(bin_engine.windows(window, stride), ['dog_name', 'window'],
+                                         correction=correction, ci=ci))
 
         unique_names = res["dog_name"].unique()
         selected_name = st.sidebar.selectbox("Select a Name", unique_names)
@@ -193,9 +241,14 @@ def main():
             # plot hit_rate and fa_rate
             plot_line(selected_dog, ['hit_rate','fa_rate'], tlt_x_axis, 'Rate','Hit and FA rates over time',if_sessions)
 
+        render_stats(st.sidebar, cache)
+
     else:
         st.write("Please upload at least one text file to display")
 
 if __name__ == "__main__":
-    main()
+    log_to_file()
+    with collect():
+        main()
+        render_timings(st.sidebar)
 
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from bootstrap import d_prime_ci
+from dprime import RATE_MAX, RATE_MIN, d_prime_from_counts, ppf
+from instrumentation import timed
+
+SCORE_COL = 'score (Hit/miss)'
+OUTCOMES = ['HIT', 'MISS', 'FA', 'CR']
+
+
+def _as_list(group_by_lst):
+    return [group_by_lst] if isinstance(group_by_lst, str) else list(group_by_lst)
+
+
+def clamp_rates(rates):
+    """Clamp rates between 0.01 and 0.99 so the inverse normal CDF stays finite."""
+    return np.clip(rates, RATE_MIN, RATE_MAX)
+
+
+def rates_from_counts(hit, miss, fa, cr, correction=None):
+    """Hit rate, FA rate and d' for whole arrays of outcome counts (correction: see dprime.CORRECTIONS)."""
+    return d_prime_from_counts(hit, miss, fa, cr, correction)
+
+
+def calculate_d(hit_rate_col, fa_rate_col):
+    return ppf(hit_rate_col) - ppf(fa_rate_col)
+
+
+def outcome_counts(df, group_by_lst):
+    """Count every score per group in one hashing pass (long format, one row per group and score)."""
+    keys = _as_list(group_by_lst)
+    return df.groupby(keys + [SCORE_COL], sort=True, observed=True).size().rename('count')
+
+
+def counts_table(long_counts):
+    """Pivot long counts to one row per group with HIT/MISS/FA/CR columns."""
+    wide = long_counts.unstack(SCORE_COL, fill_value=0)
+    return wide.reindex(columns=OUTCOMES, fill_value=0)
+
+
+def rates_table(counts, correction=None):
+    """One row per group of a HIT/MISS/FA/CR count table, with hit_rate, fa_rate and d_prime added."""
+    counts = counts.reindex(columns=OUTCOMES, fill_value=0)
+    hit_rate, fa_rate, d_prime = rates_from_counts(counts['HIT'], counts['MISS'], counts['FA'], counts['CR'],
+                                                   correction)
+    table = counts.reset_index()
+    table['hit_rate'] = hit_rate
+    table['fa_rate'] = fa_rate
+    table['d_prime'] = d_prime
+    return table
+
+
+@timed('group', rows=lambda result: len(result[0]))
+def groupping(df, group_by_lst, correction=None, ci=0):
+    """
+    Vectorized replacement for the old groupby/apply groupping.
+    Returns (one row per group, one row per group and score) exactly like before:
+    the first frame keeps the last score row of every group and carries an 'index' column.
+    With ci resamples, both frames also get the bootstrap interval of d' (d_prime_low, d_prime_high).
+    """
+    if df.empty:  # Check if the DataFrame is empty
+        return pd.DataFrame(), pd.DataFrame()  # Return empty DataFrames if there's no data
+
+    keys = _as_list(group_by_lst)
+    return _groupping_frames(outcome_counts(df, keys), keys, correction=correction, ci=ci)
+
+
+@timed('group_counts', rows=lambda result: len(result[0]))
+def groupping_counts(counts, group_by_lst, correction=None, ci=0):
+    """
+    groupping() computed from a count table instead of raw trials.
+    counts: one row per (finer) group, e.g. per (dog, date, session), indexed by the group keys and
+    with one column per score label. The result only depends on the number of rows of `counts`.
+    """
+    if counts.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    keys = _as_list(group_by_lst)
+    if list(counts.index.names) == keys and counts.index.is_unique:
+        summed = counts.sort_index()  # already one row per group (e.g. bins)
+    else:
+        summed = counts.groupby(level=keys, sort=True).sum()
+    summed = summed.reindex(columns=sorted(summed.columns))
+    summed.columns.name = SCORE_COL
+    long_counts = summed.stack()
+    long_counts = long_counts[long_counts > 0].astype('int64').rename('count')
+    return _groupping_frames(long_counts, keys, summed.reindex(columns=OUTCOMES, fill_value=0), correction, ci)
+
+
+def _groupping_frames(long_counts, keys, wide=None, correction=None, ci=0):
+    if long_counts.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    if wide is None:
+        wide = counts_table(long_counts)
+    hit_rate, fa_rate, d_prime = rates_from_counts(wide['HIT'], wide['MISS'], wide['FA'], wide['CR'], correction)
+
+    # Position of every (group, score) row's group inside the wide table
+    group_pos = wide.index.get_indexer(long_counts.index.droplevel(SCORE_COL))
+    count = long_counts.to_numpy()
+    # Same order value_counts gives: groups sorted, most frequent score first
+    order = np.lexsort((-count, group_pos))
+    group_pos = group_pos[order]
+
+    all_data = long_counts.iloc[order].reset_index()
+    all_data['hit_rate'] = hit_rate[group_pos]
+    all_data['fa_rate'] = fa_rate[group_pos]
+    all_data['d_prime'] = d_prime[group_pos]
+    if ci:
+        low, high = d_prime_ci(wide['HIT'], wide['MISS'], wide['FA'], wide['CR'], n_resamples=ci,
+                               correction=correction)
+        all_data['d_prime_low'] = low[group_pos]
+        all_data['d_prime_high'] = high[group_pos]
+
+    # Last row of every group (what drop_duplicates(keep='last') used to pick)
+    last_rows = np.flatnonzero(np.r_[group_pos[1:] != group_pos[:-1], True])
+    all_data_remove_duplicates = all_data.iloc[last_rows].reset_index()
+
+    return all_data_remove_duplicates, all_data
@@ -1,17 +1,26 @@
-import socket
+import argparse
 import subprocess
+import threading
 import time
 import logging
+import multiprocessing
 import sys
-import pandas as pd
 import os
-from scipy.stats import norm
-import plotly.express as px
-import streamlit as st
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
 
-#to executable- navigate to the directory by  "cd C:\noam\dogs\pythonProject" and the use: C:\Users\Owner\AppData\Local\Programs\Python\Python312\python.exe -m PyInstaller --onefile --hidden-import=streamlit --hidden-import=importlib_metadata --collect-all streamlit new_run_all.py
+from server_launcher import (app_version, clear_state, find_running_server, free_port, start_server,
+                             wait_until_ready, write_state)
+
+LAUNCH_START = time.perf_counter()
+# pandas, plotly, streamlit and the analysis modules are imported inside run_all_in_one_manof:
+# the launcher only needs the standard library, so it starts (and opens the browser) quickly
+
+#to executable- navigate to the directory by  "cd C:\noam\dogs\pythonProject" and the use: C:\Users\Owner\AppData\Local\Programs\Python\Python312\python.exe -m PyInstaller --onefile --hidden-import=streamlit --hidden-import=importlib_metadata --collect-all streamlit --add-data "new_run_all.py;." new_run_all.py
+# (the page script is bundled with --add-data so the single-process server can run it from the exe)
+
+# Set in the environment of the Streamlit server so this script renders the page instead of launching
+PAGE_ENV = 'DOGS_STREAMLIT_PAGE'
+# The function that renders the page; its import statements are what --profile-imports times
+PAGE_FUNCTION = 'run_all_in_one_manof'
 
 # # Increase the timeout for the Streamlit server to start
 os.environ['STREAMLIT_SERVER_STARTUP_TIMEOUT'] = '300'  # Increase to 300 seconds
@@ -32,97 +41,60 @@ def find_chrome_path():
     logging.error("Chrome not found in expected locations.")
     return None
 
-def is_server_running(host='localhost', port=8501):
-    """Check if the Streamlit server is running."""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        return sock.connect_ex((host, port)) == 0
-
 # === Your original run_all_in_one_manof() function goes here ===
 def run_all_in_one_manof():
     # Simulating what was in the 'all_in_one_manof.py'
     # This is just an example; replace it with actual code from 'all_in_one_manof.py'
     logging.info("Running logic.py")
+    import plotly.express as px
+    import streamlit as st
+    from plotly.subplots import make_subplots
+    import plotly.graph_objects as go
+    from dprime import CORRECTIONS, DEFAULT_CORRECTION
+    from bootstrap import CI_LEVEL, N_RESAMPLES
+    from aggregate_store import SESSION_KEYS, session_counts_for
+    from binning import BinEngine
+    from outcome_cube import build_cube, render_drill_down
+    from workbook_loader import load_workbooks
+    from dedup import dedupe_frames, dropped_lines
+    from warehouse import ENABLED as WAREHOUSE_ENABLED, get_warehouse, import_loaded
+    from report_modes import MODES, mode_result
+    from preprocessing import combine_frames
+    from report_figure import boundary_annotations, boundary_shapes, ci_band, session_boundaries
+    from downsample import MAX_POINTS, thin, tick_step
+    from page_cache import get_page_cache, render_stats, uploads_key
+    from instrumentation import render_timings, timed
     # Add the actual functions and logic from 'all_in_one_manof.py' here
 
-    def hit_rate_cal(trials_score):
-        # 0 = hit, 1 = FA, 2 = miss, 3 = CR.
-        hit = trials_score.eq("HIT").sum()
-        miss = trials_score.eq("MISS").sum()
-        hit_rate = hit / (hit + miss)
-        if hit == 0:
-            hit_rate = 0
-        if hit_rate == 1:
-            hit_rate = 0.99
-        if hit_rate == 0:
-            hit_rate = 0.01
-        return hit_rate
-
-    def fa_rate_cal(mice_trails):
-        # 0 = hit, 1 = FA, 2 = miss, 3 = CR.
-        fa = mice_trails.eq("FA").sum()
-        cr = mice_trails.eq("CR").sum()
-        fa_rate = fa / (fa + cr)
-        if fa == 0:
-            fa_rate = 0
-        if fa_rate == 1:
-            fa_rate = 0.99
-        if fa_rate == 0:
-            fa_rate = 0.01
-        return fa_rate
-
-    def calculate_d(hit_rate_col, fa_rate_col):
-        d = norm.ppf(hit_rate_col) - norm.ppf(fa_rate_col)
-        # if np.isnan(d):
-        #     print(d)
-        return d
-
-    def groupping(df, group_by_lst):
-        v_count = df.groupby(group_by_lst)['score (Hit/miss)'].apply('value_counts')
-        hit_rate = df.groupby(group_by_lst)['score (Hit/miss)'].apply(lambda x: hit_rate_cal(x))
-        hit_rate.rename("hit_rate", inplace=True)
-        fa_rate = df.groupby(group_by_lst)['score (Hit/miss)'].apply(lambda x: fa_rate_cal(x))
-        fa_rate.rename("fa_rate", inplace=True)
-        all_data = pd.merge(v_count, hit_rate, left_on=group_by_lst, right_index=True, how='left')
-        all_data = pd.merge(all_data, fa_rate, left_on=group_by_lst, right_index=True, how='left')
-        all_data['d_prime'] = calculate_d(all_data['hit_rate'], all_data['fa_rate'])
-
-        all_data = all_data.reset_index()
-        # st.write(all_data)
-        all_data_remove_duplicates = all_data.drop_duplicates(subset=group_by_lst, keep='last')
-        all_data_remove_duplicates = all_data_remove_duplicates.reset_index()
-
-        return all_data_remove_duplicates, all_data
-
+    @timed('plot_line')
     def plot_line(df, y_axis, x_axis_tlt, y_axis_tlt, title, if_sessions=False):
         # st.scatter_chart(selected_dog,y=['hit_rate','fa_rate'],use_container_width=True)
 
+        # Only the range picked on the slider is drawn, downsampled to at most MAX_POINTS points
+        first, last = (int(df.index[0]), int(df.index[-1])) if len(df) else (1, 0)
+        if len(df) > MAX_POINTS:
+            first, last = st.slider(f"{title}: range shown", first, last, (first, last), key=f"range_{title}")
+            df = df.loc[first:last]
+        shown = thin(df, y_axis)
+
         if df.shape[0] < 2:
-            fig = px.scatter(df, y=y_axis, title=title)
+            fig = px.scatter(shown, y=y_axis, title=title)
         else:
-            fig = px.line(df, y=y_axis, title=title)
+            fig = px.line(shown, y=y_axis, title=title)
             if if_sessions:
-                # Identify the index positions of the first occurrences of each date
-                df['date_id'] = df['date'].factorize()[0]
+                # First row of every date in one pass, all boundaries added in one layout update
+                positions, dates = session_boundaries(df)
                 if isinstance(y_axis, list):
                     y_position = max([df[i].max() for i in y_axis])
                     st.write('list')
                 else:
                     st.write('not_list')
                     y_position = df[y_axis].max()
-                for date_id in df['date_id'].unique():
-                    date = df.loc[df['date_id'] == date_id, 'date'].values[0]
-                    x_position = df.loc[df['date_id'] == date_id].iloc[0].name
-                    fig.add_vline(x=x_position, line_dash='dash',
-                                  line_color='rgb(211, 215, 222)')  # annotation_text=f'{date}'
-                    fig.add_annotation(
-                        x=x_position - 0.3,
-                        y=y_position + 0.5,
-                        text=date,
-                        showarrow=False,
-                        textangle=270,  # Angle of the text
-
-                        font=dict(color='rgb(97, 98, 99)')
-                    )
+                fig.update_layout(shapes=boundary_shapes(positions, dict(color='rgb(211, 215, 222)', dash='dash')),
+                                  annotations=boundary_annotations(positions, dates, y_position + 0.5, 0.3))
+        if y_axis == 'd_prime' and 'd_prime_low' in shown.columns:
+            # bootstrap confidence interval, drawn first so the line stays on top
+            fig = go.Figure(data=ci_band(shown) + list(fig.data), layout=fig.layout)
 
         fig.update_layout(
             xaxis_title=x_axis_tlt,
@@ -137,15 +109,16 @@ def run_all_in_one_manof():
 
         # Set the x-axis range
         fig.update_xaxes(
-            range=[0, df.shape[0] + 1],
+            range=[first - 1, last + 1],
             tickmode='linear',
             tick0=0,
-            dtick=1
+            dtick=tick_step(last - first)  # about MAX_TICKS ticks at any zoom
         )
 
         # Display the interactive plot in Streamlit
         st.plotly_chart(fig, use_container_width=True)
 
+    @timed('plot_score_dist')
     def plot_score_dist(df):
         dog_names = df['dog_name'].unique()
 
@@ -171,69 +144,126 @@ def run_all_in_one_manof():
         uploaded_files = st.sidebar.file_uploader("Choose Excel file(s)", accept_multiple_files=True, type="xlsx")
 
         if uploaded_files:
-            dataframes = []
+            def load():
+                progress = st.progress(0.0, text="Loading files...")
+
+                def on_progress(done, total, name):
+                    progress.progress(done / total, text=f"Loaded {done}/{total}: {name}")
+
+                dataframes, errors = load_workbooks(uploaded_files, on_progress=on_progress)
+                progress.empty()
+                if not dataframes:
+                    return None, None, errors, []
+                # a trial in several of the files (e.g. a month and the combined workbook) is counted once
+                failed = {name for name, _ in errors}
+                names = [f.name for f in uploaded_files if f.name not in failed]
+                import_loaded(dataframes, names)  # into the local trial warehouse, once per file content
+                dataframes, dropped = dedupe_frames(dataframes)
+                duplicates = dropped_lines(names, dropped)
+                return combine_frames(dataframes), session_counts_for(dataframes), errors, duplicates
+
+            # Loading is cached by file content (see page_cache), a rerun for another dog only redraws
+            data_key = uploads_key(uploaded_files)
+            combined_df, session_counts, errors, duplicates = cache.get_or_compute('parsed', data_key, load)
+            for name, e in errors:
+                st.error(f"Failed to load {name}: {e}")
+            for line in duplicates:
+                st.info(line)
+            failed = {name for name, _ in errors}
             for uploaded_file in uploaded_files:
-                try:
-                    df = pd.read_excel(uploaded_file)
-                    dataframes.append(df)
+                if uploaded_file.name not in failed:
                     st.write(f"Loaded {uploaded_file.name}")
-                except Exception as e:
-                    st.error(f"Failed to load {uploaded_file.name}: {e}")
 
-            if dataframes:
-                combined_df = pd.concat(dataframes, ignore_index=True)
+            if combined_df is not None:
                 st.write("Combined DataFrame:")
                 st.write(combined_df)
-                return combined_df
+                return combined_df, session_counts, data_key
             else:
                 st.write("No valid files to combine.")
         else:
             st.write("No files uploaded.")
-
-    df = combine_excel_files()
-    if not isinstance(df, type(None)):
-        df.drop(columns=['area', 'dog_ID', 'target_bin', 'trial_ID', 'trial_total', 'target_ID', 'click_time',
-                         'choice_time', 'tester'], axis=1, inplace=True)  # drop first col
-        df = df.rename(columns={'dog': 'dog_name', 'session': 'num_session', 'score': 'score (Hit/miss)'})
-        df['score (Hit/miss)'] = df['score (Hit/miss)'].replace('cr', 'CR')
-        df['score (Hit/miss)'] = df['score (Hit/miss)'].replace('hit', 'HIT')
-        df['score (Hit/miss)'] = df['score (Hit/miss)'].replace('fp', 'FA')
-        df['score (Hit/miss)'] = df['score (Hit/miss)'].replace('miss', 'MISS')
-        df['date'] = df['date'].astype(str).str.zfill(6)
-        df['date'] = pd.to_datetime(df['date'], format='%d%m%y')
-        df.sort_values(by='date', ascending=True, inplace=True)
-        df['date_str'] = df['date'].dt.strftime('%d/%m/%Y')
-        st.subheader("Combined Data")
-
-        # """ pre-processed data """
-        # filter the wrong rows (that is actually names of the columns of the text files)
-        st.subheader("Data After pre-processing")
-        st.write(df)
-
+        return None, None, None
+
+    def warehouse_data():
+        """
+        The trials of the local warehouse: the session counts are summed in SQL (warehouse.counts_by),
+        the trials themselves are only read for the modes that need them (bins, windows, drill down).
+        """
+        warehouse = get_warehouse()
+        dogs = warehouse.dog_names()
+        if not dogs:
+            st.write("The trial warehouse is empty: upload files once to import them.")
+            return None, None, None
+        selected = st.sidebar.multiselect("Dogs", dogs, default=dogs)
+        days = st.sidebar.number_input("Last days (0: all)", min_value=0, value=0)
+        if not selected:
+            st.write("Select at least one dog.")
+            return None, None, None
+        selection = dict(dogs=selected, days=days or None)
+        data_key = ('warehouse', warehouse.path, warehouse.state(), tuple(selected), days)
+        session_counts = cache.get_or_compute('warehouse_counts', data_key,
+                                              lambda: warehouse.counts_by(SESSION_KEYS, **selection))
+        if session_counts.empty:
+            st.write("No trials match.")
+            return None, None, None
+        st.write(f"{int(session_counts.to_numpy().sum())} trial(s) in {len(session_counts)} session(s) "
+                 f"from {warehouse.path}")
+        return (lambda: cache.get_or_compute('trials', data_key, lambda: warehouse.trials(**selection)),
+                session_counts, data_key)
+
+    cache = get_page_cache()
+    source = "Uploaded files"
+    if WAREHOUSE_ENABLED:
+        source = st.sidebar.radio("Data source", ("Uploaded files", "Trial warehouse"))
+    if source == "Trial warehouse":
+        get_trials, session_counts, data_key = warehouse_data()
+    else:
+        df, session_counts, data_key = combine_excel_files()
+        get_trials = None if df is None else (lambda: df)
+        if df is not None:
+            st.subheader("Combined Data")
+
+            # """ pre-processed data """
+            # filter the wrong rows (that is actually names of the columns of the text files)
+            st.subheader("Data After pre-processing")
+            st.write(df)
+    if session_counts is not None:
         # """ choose how to display the data """
         option = st.sidebar.radio(
             "Display Options",
-            ("By Sessions", "All Together", "By Bin Size")
+            ("By Sessions", "All Together", "By Bin Size", "Moving Window", "Drill Down")
         )
-        res = []
-        with_duplicates = []
-        tlt_x_axis = ''
-        if_sessions = False
-        if option == "By Sessions":
-            res, with_duplicates = groupping(df, ['dog_name', 'date', 'num_session'])
-            tlt_x_axis = 'session'
-            if_sessions = True
-        elif option == "All Together":
-            res, with_duplicates = groupping(df, ['dog_name'])
-            tlt_x_axis = ''
-        elif option == "By Bin Size":
-            bin_size = st.sidebar.number_input("Bin Size", min_value=1, value=10)
-            tlt_x_axis = 'Bins: bin size=' + str(bin_size)
-            df_sorted = df.sort_values(by=['dog_name', 'date'])  # , 'Time stamp of trial initiation'
-            df_sorted['bin'] = df_sorted.groupby('dog_name').cumcount() // bin_size + 1
-            """ by_bins """
-            # st.write(df_sorted)
-            res, with_duplicates = groupping(df_sorted, ['dog_name', 'bin'])
+        correction = st.sidebar.selectbox("d' correction for rates of 0 and 1", CORRECTIONS,
+                                          index=CORRECTIONS.index(DEFAULT_CORRECTION))
+        if option == "Drill Down":
+            # counts over every dimension, built once per load; each roll-up sums the cube (see outcome_cube)
+            cube = cache.get_or_compute('cube', data_key, lambda: build_cube(get_trials()))
+            render_drill_down(st, cube, correction)
+            render_stats(st.sidebar, cache)
+            render_timings(st.sidebar)
+            return
+        # bootstrap resamples per group for the interval of d' (0: no interval)
+        ci = N_RESAMPLES if st.sidebar.checkbox(f"Bootstrap {CI_LEVEL:.0%} interval of d'") else 0
+        params = {}
+        if option == "By Bin Size":
+            params['bin_size'] = st.sidebar.number_input("Bin Size", min_value=1, value=10)
+        elif option == "Moving Window":
+            params['window'] = st.sidebar.number_input("Window (trials)", min_value=1, value=50)
+            params['stride'] = st.sidebar.number_input("Stride (trials)", min_value=1, value=5)
+
+        def get_bin_engine():
+            # one sort, then every bin size is a difference of prefix sums (see binning.BinEngine)
+            return cache.get_or_compute('bins', data_key,
+                                        lambda: BinEngine(get_trials(), order_by=['dog_name', 'date']))
+
+        mode = next(name for name, label in MODES.items() if label == option)
+        res, with_duplicates, tlt_x_axis, if_sessions = cache.get_or_compute(
+            'grouped', (data_key, option, *params.values(), correction, ci),
+            lambda: mode_result(mode, session_counts, get_bin_engine, correction, ci=ci, **params))
+        if option == "By Bin Size":
+            tlt_x_axis = 'Bins: bin size=' + str(params['bin_size'])
+        elif option == "Moving Window":
+            tlt_x_axis = f"Windows: size={params['window']}, stride={params['stride']}"
 
         unique_names = res["dog_name"].unique()
         selected_name = st.sidebar.selectbox("Select a Name", unique_names)
@@ -260,53 +290,146 @@ def run_all_in_one_manof():
             plot_line(selected_dog, ['hit_rate', 'fa_rate'], tlt_x_axis, 'Rate', 'Hit and FA rates over time',
                       if_sessions)
 
+        render_stats(st.sidebar, cache)
+    render_timings(st.sidebar)  # what this rerun spent its time on (cached stages do not show up)
+
     print("All-in-one Manof logic executed.")
 
-def main():
+def page_script():
+    """Path of this script for `streamlit run` (bundled next to the exe contents in the PyInstaller build)."""
+    if getattr(sys, 'frozen', False):
+        return os.path.join(sys._MEIPASS, 'new_run_all.py')
+    return os.path.abspath(__file__)
+
+
+def page_modules():
+    """The modules the page imports, in the order of the import statements of PAGE_FUNCTION."""
+    import ast
+    with open(page_script(), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    function = next(node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == PAGE_FUNCTION)
+    imports = sorted((node for node in ast.walk(function) if isinstance(node, (ast.Import, ast.ImportFrom))),
+                     key=lambda node: node.lineno)
+    modules = []
+    for node in imports:
+        names = [node.module] if isinstance(node, ast.ImportFrom) else [alias.name for alias in node.names]
+        modules += [name for name in names if name not in modules]
+    return modules
+
+
+def streamlit_args(port):
+    return [page_script(), f'--server.port={port}', '--server.headless=true', '--global.developmentMode=false']
+
+
+def open_browser(chrome_path, port):
+    url = f'http://localhost:{port}'
     try:
-        logging.info('Starting the application...')
+        subprocess.Popen([chrome_path, url])
+        logging.info(f'Opened Chrome at {url}, {time.perf_counter() - LAUNCH_START:.2f} s after launch')
+        os.environ['BROWSER_OPENED'] = '1'  # Set environment variable to prevent reopening
+    except Exception as e:
+        logging.exception('Failed to open Chrome')
+
+
+def on_server_ready(chrome_path, port):
+    logging.info(f'Streamlit server is ready on port {port}, {time.perf_counter() - LAUNCH_START:.2f} s after launch.')
+    # Open Chrome only if it's not already open
+    if chrome_path is not None and 'BROWSER_OPENED' not in os.environ:
+        open_browser(chrome_path, port)
+
+
+def run_server_in_process(port, on_ready=None):
+    """Run the Streamlit server in this process (no second interpreter importing everything again)."""
+    os.environ[PAGE_ENV] = '1'
+    if on_ready is not None:
+        threading.Thread(target=on_ready, daemon=True).start()
+    from streamlit.web import cli as stcli
+    sys.argv = ['streamlit', 'run'] + streamlit_args(port)
+    sys.exit(stcli.main())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Start the dogs analysis app and open it in Chrome.")
+    parser.add_argument('--port', type=int, default=8501)
+    parser.add_argument('--single-process', action='store_true', default=getattr(sys, 'frozen', False),
+                        help="run the Streamlit server inside this process (default for the packaged exe)")
+    parser.add_argument('--no-browser', action='store_true', help="start the server without opening Chrome")
+    parser.add_argument('--profile-imports', action='store_true',
+                        help="print an -X importtime style breakdown of the page imports and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile_imports:
+        from import_profile import print_report
+        try:
+            print_report(page_modules(), cwd=os.path.dirname(page_script()))
+        except RuntimeError as e:
+            sys.exit(f"Could not profile the page imports: {e}")
+        return
 
-        # Run the code from 'all_in_one_manof.py'
-        run_all_in_one_manof()  # <== This is the missing call
+    try:
+        logging.info('Starting the application...')
 
         # Find the Chrome path
-        chrome_path = find_chrome_path()
-        if chrome_path is None:
-            logging.error("Chrome could not be found. Make sure it is installed.")
+        chrome_path = None
+        if not args.no_browser:
+            chrome_path = find_chrome_path()
+            if chrome_path is None:
+                logging.error("Chrome could not be found. Make sure it is installed.")
+                return
+
+        # Reuse a server of this version of the app started by an earlier launch
+        version = app_version(page_script())
+        port = find_running_server(version)
+        if port is not None:
+            logging.info(f'Streamlit server (version {version}) is already running on port {port}.')
+            on_server_ready(chrome_path, port)
             return
 
-        # Check if the Streamlit server is already running
-        if not is_server_running():
-            # Start the Streamlit server only if it is not running
-            command = [sys.executable, '-m', 'streamlit', 'run', sys.argv[0]]  # Running current script itself
-            server = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            logging.info('Started the Streamlit server.')
-        else:
-            logging.info('Streamlit server is already running.')
-
-        # Wait for the Streamlit server to start
-        logging.info('Waiting for Streamlit server to start...')
-        for _ in range(300):  # Wait up to 300 seconds
-            if is_server_running():
-                logging.info('Streamlit server is running.')
-                break
-            time.sleep(1)
-        else:
-            logging.error('Streamlit server did not start in time.')
-            return
+        port = free_port(args.port)
+        if args.single_process:
+            def on_ready():
+                if not wait_until_ready(port):
+                    logging.error('Streamlit server did not start in time.')
+                    return
+                write_state(port, version, os.getpid())
+                on_server_ready(chrome_path, port)
 
-        # Open Chrome only if it's not already open
-        if 'BROWSER_OPENED' not in os.environ:
+            logging.info(f'Starting the Streamlit server in this process on port {port}.')
+            try:
+                run_server_in_process(port, on_ready)
+            finally:
+                clear_state(os.getpid())
+        else:
+            command = [sys.executable, '-m', 'streamlit', 'run'] + streamlit_args(port)
+            server = start_server(command, env=dict(os.environ, **{PAGE_ENV: '1'}))
+            logging.info(f'Started the Streamlit server on port {port}.')
             try:
-                subprocess.Popen([chrome_path, 'http://localhost:8501'])
-                logging.info('Opened Chrome at http://localhost:8501')
-                os.environ['BROWSER_OPENED'] = '1'  # Set environment variable to prevent reopening
-            except Exception as e:
-                logging.exception('Failed to open Chrome')
+                if not wait_until_ready(port, server):
+                    logging.error('Streamlit server did not start in time.')
+                    return
+                write_state(port, version, server.pid)
+                on_server_ready(chrome_path, port)
+                server.wait()  # the server output is read (and logged) by this process until it stops
+            finally:
+                clear_state(server.pid)
+                if server.poll() is None:
+                    server.terminate()
 
     except Exception as e:
         logging.exception('An error occurred during execution')
         sys.exit(1)  # Exit with an error code
 
 if __name__ == '__main__':
-    main()
+    # first: the PyInstaller build starts the loading and bootstrap workers from this exe, and they inherit
+    # PAGE_ENV from a single-process server
+    multiprocessing.freeze_support()
+    if os.environ.get(PAGE_ENV):
+        # executed by the Streamlit server: render the page, timing its stages
+        from instrumentation import collect
+        with collect():
+            run_all_in_one_manof()
+    else:
+        main()
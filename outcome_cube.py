@@ -0,0 +1,176 @@
+"""
+Outcome cube: the HIT/MISS/FA/CR counts of the loaded trials over every dimension the drill-down
+view slices by (dog, date, session, training, level, experiment, open port, target layout and
+continuous mode).
+
+The cube is built once per load with one groupby over the trials. It has one row per combination of
+dimension values that occurs, so it is much smaller than the trial table. Every roll-up (group by
+any subset of the dimensions) and slice (keep some values of any dimension) is a sum over the cube
+rows, and hit rate, FA rate and d' are computed on the summed counts (metrics.rates_table), the same
+as on the raw trials. Dimensions a loader does not give (the workbooks have no ports or levels) are
+left out of the cube.
+
+Check the cube against groupping() on the bundled files with:  python outcome_cube.py
+Time the build and the roll-ups with:  python benchmarks/bench_cube.py
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from metrics import OUTCOMES, SCORE_COL, rates_table
+
+PORT_COLUMNS = ['Port1 (1-Target,0-non-Target,-1-Distractor)', 'Port2', 'Port 3']
+LAYOUT = 'target_layout'
+# dimension -> label in the drill-down view
+DIMENSIONS = {
+    'dog_name': "Dog",
+    'date': "Date",
+    'num_session': "Session",
+    'training': "Training",
+    'Level identity': "Level",
+    'Exp name': "Experiment",
+    'Open_port(1,2,3)': "Open port",
+    LAYOUT: "Target layout (port 1, 2, 3)",
+    'continuous_mode(0,1)': "Continuous mode",
+}
+
+
+def _as_list(values):
+    return list(values) if isinstance(values, (list, tuple, set, np.ndarray, pd.Index)) else [values]
+
+
+class OutcomeCube:
+    def __init__(self, cells, dimensions):
+        self.cells = cells  # one row per combination of dimension values, with one count column per outcome
+        self.dimensions = dimensions
+
+    def values(self, dimension):
+        """The values of one dimension that occur in the cube, sorted."""
+        return sorted(self.cells[dimension].dropna().unique().tolist())
+
+    def _check(self, names):
+        unknown = [name for name in names if name not in self.dimensions]
+        if unknown:
+            raise ValueError(f"not a dimension of the cube: {', '.join(map(repr, unknown))}, "
+                             f"expected one of {', '.join(map(repr, self.dimensions))}")
+
+    @timed('cube_rollup', rows=len)
+    def rollup(self, dimensions, where=None):
+        """
+        Summed counts per group of the given dimensions, over the cube rows with the values selected in
+        where ({dimension: value or list of values}). Indexed by the dimensions and with one column per
+        outcome (the count table of metrics.rates_table and metrics.groupping_counts); without
+        dimensions, one row with the totals.
+        """
+        dimensions = _as_list(dimensions)
+        where = where or {}
+        self._check(dimensions + list(where))
+        cells = self.cells
+        if where:
+            mask = np.ones(len(cells), dtype=bool)
+            for dimension, selected in where.items():
+                mask &= cells[dimension].isin(_as_list(selected)).to_numpy()
+            cells = cells[mask]
+        if not dimensions:
+            return pd.DataFrame([cells[OUTCOMES].sum()], index=pd.Index(['all'], name='trials'))
+        return cells.groupby(dimensions, sort=True, observed=True, dropna=False)[OUTCOMES].sum()
+
+    def table(self, dimensions, where=None, correction=None):
+        """The rates_table of a roll-up: one row per group with its counts, hit_rate, fa_rate and d_prime."""
+        return rates_table(self.rollup(dimensions, where), correction)
+
+
+@timed('cube', rows=lambda cube: len(cube.cells))
+def build_cube(df):
+    """Count the outcomes of the trials of df per combination of the dimensions it has."""
+    has_layout = all(name in df.columns for name in PORT_COLUMNS)
+    dimensions = [name for name in DIMENSIONS if name in df.columns or (name == LAYOUT and has_layout)]
+    keys = [name for name in dimensions if name != LAYOUT] + (PORT_COLUMNS if has_layout else [])
+    if df.empty or SCORE_COL not in df.columns:
+        return OutcomeCube(pd.DataFrame(columns=dimensions + OUTCOMES), dimensions)
+
+    # one flag column per outcome, summed per combination in a single groupby
+    score = df[SCORE_COL].to_numpy()
+    flags = pd.DataFrame({outcome: score == outcome for outcome in OUTCOMES}, index=df.index)
+    cells = flags.groupby([df[key] for key in keys], sort=False, observed=True, dropna=False).sum()
+    cells = cells[cells.to_numpy().any(axis=1)].astype('int64').reset_index()
+    if has_layout:
+        # the three port codes as one label ('1 0 -1'), built on the cells rather than on every trial
+        ports = [cells[name].astype('string') for name in PORT_COLUMNS]
+        cells[LAYOUT] = (ports[0] + ' ' + ports[1] + ' ' + ports[2]).astype('category')
+        cells = cells.drop(columns=PORT_COLUMNS)
+    return OutcomeCube(cells[dimensions + OUTCOMES], dimensions)
+
+
+def _format_value(value):
+    return value.strftime('%d/%m/%Y') if isinstance(value, pd.Timestamp) else str(value)
+
+
+def render_drill_down(st, cube, correction=None):
+    """The drill-down view of the Streamlit pages: group by any dimensions, keep any values of them."""
+    import plotly.express as px
+
+    labels = {name: DIMENSIONS[name] for name in cube.dimensions}
+    by = st.sidebar.multiselect("Group by", cube.dimensions, default=cube.dimensions[:1], format_func=labels.get)
+    where = {}
+    with st.sidebar.expander("Keep only"):
+        for name in cube.dimensions:
+            selected = st.multiselect(labels[name], cube.values(name), format_func=_format_value,
+                                      key=f"drill_{name}")
+            if selected:
+                where[name] = selected
+    table = cube.table(by, where, correction)
+
+    st.subheader("Drill down")
+    st.caption(f"{len(table)} group(s), summed from {len(cube.cells)} cube cells")
+    st.dataframe(table, use_container_width=True)
+    if table.empty or not by:
+        return
+    y_axis = st.sidebar.selectbox("Plot", ['d_prime', 'hit_rate', 'fa_rate'])
+    shown = table.assign(**{name: table[name].map(_format_value) for name in by[:2]})
+    fig = px.bar(shown, x=by[0], y=y_axis, color=by[1] if len(by) > 1 else None, barmode='group',
+                 hover_data=by[2:] + OUTCOMES, labels=labels)
+    fig.update_layout(title=f"{y_axis} by {', '.join(labels[name] for name in by)}", title_x=0.5, height=600)
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def check_consistency(df, cube):
+    """Compare roll-ups of the cube with a groupby of the raw trials."""
+    for dimensions in ([], ['dog_name'], cube.dimensions[:3], cube.dimensions):
+        keys = [name for name in dimensions if name != LAYOUT]
+        if len(keys) < len(dimensions):
+            continue  # the layout is derived from the cells
+        flags = pd.DataFrame({outcome: df[SCORE_COL] == outcome for outcome in OUTCOMES})
+        if keys:
+            expected = flags.groupby([df[key] for key in keys], sort=True, observed=True, dropna=False).sum()
+            expected = expected[expected.to_numpy().any(axis=1)]
+        else:
+            expected = pd.DataFrame([flags.sum()], index=pd.Index(['all'], name='trials'))
+        pd.testing.assert_frame_equal(cube.rollup(dimensions), expected, check_dtype=False,
+                                      check_categorical=False, check_index_type=False)
+
+
+def main():
+    from log_parser import combine_logs, dog_name_from_file, parse_log
+    from preprocessing import combine_frames
+    from workbook_loader import load_workbooks
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    names = sorted(os.listdir(folder))
+    workbooks = [os.path.join(folder, name) for name in names
+                 if name.startswith('North.data') and name.endswith('.xlsx')]
+    dataframes, errors = load_workbooks(workbooks)
+    for name, e in errors:
+        print(f"Failed to load {name}: {e}")
+    logs = [parse_log(os.path.join(folder, name), dog_name=dog_name_from_file(name))
+            for name in names if name.endswith('Experiment.txt')]
+    for df in (combine_frames(dataframes), combine_logs(logs)):
+        cube = build_cube(df)
+        check_consistency(df, cube)
+        print(f"Cube of {len(cube.cells)} cells over {', '.join(cube.dimensions)} matches the trials")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+In-process cache for the Streamlit pages.
+
+Streamlit reruns the whole page on every widget change. Parsed uploads are kept under the content
+digest of the uploaded files, grouped results under (data key, display mode, its parameters, d'
+correction), so selecting another dog or going back to an earlier mode only redraws the charts.
+The cache lives in the server process and is shared by all browser sessions (entries are keyed by
+content). It is bounded to PAGE_CACHE_MB and evicts the least recently used entries; hits and misses
+are counted per kind and shown in the sidebar next to a button that clears the cache.
+
+Cached values are returned as they are, callers must not modify them in place.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PAGE_CACHE_MB = float(os.environ.get('DOGS_PAGE_CACHE_MB', 256))
+
+
+def uploads_key(uploaded_files):
+    """Digest of the names and contents of uploaded files (names matter: logs take the dog name from them)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for uploaded_file in uploaded_files:
+        digest.update(uploaded_file.name.encode())
+        digest.update(hashlib.blake2b(uploaded_file.getvalue(), digest_size=16).digest())
+    return digest.hexdigest()
+
+
+def _nbytes(value):
+    """Approximate memory of a cached value (frames, and tuples/lists/dicts of them)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, '__dict__'):  # e.g. a BinEngine
+        return _nbytes(vars(value))
+    return 64
+
+
+class PageCache:
+    def __init__(self, max_mb=PAGE_CACHE_MB):
+        self.max_bytes = max_mb * 1024 * 1024
+        self.entries = OrderedDict()  # (kind, key) -> (value, nbytes), least recently used first
+        self.hits = {}
+        self.misses = {}
+        self.lock = threading.Lock()  # Streamlit runs every browser session in its own thread
+
+    def get_or_compute(self, kind, key, compute):
+        """The cached value of (kind, key), computed with compute() and stored on a miss."""
+        with self.lock:
+            entry = self.entries.get((kind, key))
+            if entry is not None:
+                self.entries.move_to_end((kind, key))
+                self.hits[kind] = self.hits.get(kind, 0) + 1
+                return entry[0]
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+
+        value = compute()
+        nbytes = _nbytes(value)
+        with self.lock:
+            self.entries[(kind, key)] = (value, nbytes)
+            self._evict()
+        return value
+
+    def _evict(self):
+        total = sum(nbytes for _, nbytes in self.entries.values())
+        # the newest entry is kept even when it is larger than the whole budget
+        while total > self.max_bytes and len(self.entries) > 1:
+            _, (_, nbytes) = self.entries.popitem(last=False)
+            total -= nbytes
+
+    def size(self):
+        with self.lock:
+            return sum(nbytes for _, nbytes in self.entries.values())
+
+    def clear(self, kind=None):
+        """Drop every entry (of one kind); the counters are kept."""
+        with self.lock:
+            for entry_key in [entry_key for entry_key in self.entries if kind is None or entry_key[0] == kind]:
+                del self.entries[entry_key]
+
+    def stats(self):
+        """Per kind: (hits, misses, entries)."""
+        with self.lock:
+            kinds = sorted(set(self.hits) | set(self.misses) | {kind for kind, _ in self.entries})
+            return {kind: (self.hits.get(kind, 0), self.misses.get(kind, 0),
+                           sum(1 for entry_kind, _ in self.entries if entry_kind == kind))
+                    for kind in kinds}
+
+
+_default_cache = None
+
+
+def get_page_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PageCache()
+    return _default_cache
+
+
+def render_stats(container, cache=None):
+    """Hit/miss counters and a clear button, e.g. render_stats(st.sidebar)."""
+    cache = cache or get_page_cache()
+    box = container.expander("Cache")
+    for kind, (hits, misses, entries) in cache.stats().items():
+        box.caption(f"{kind}: {hits} hits, {misses} misses, {entries} cached")
+    box.caption(f"{cache.size() / 1e6:.1f} of {cache.max_bytes / 1e6:.0f} MB used")
+    if box.button("Clear cache"):
+        cache.clear()
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from instrumentation import timed
+from schema import apply_schema, concat_frames
+from xlsx_reader import read_columns
+
+# Columns of the North.data workbooks that the analysis never uses
+DROP_COLUMNS = ['area', 'dog_ID', 'target_bin', 'trial_ID', 'trial_total', 'target_ID', 'click_time',
+                'choice_time', 'tester']
+RENAME_COLUMNS = {'dog': 'dog_name', 'session': 'num_session', 'score': 'score (Hit/miss)'}
+SCORE_NAMES = {'cr': 'CR', 'hit': 'HIT', 'fp': 'FA', 'miss': 'MISS'}
+
+
+@timed('preprocess', rows=len)
+def preprocess_excel(df, typed=True):
+    """
+    Clean one North.data sheet: drop unused columns, rename fields, normalize scores and parse dates.
+    The result is converted to the compact schema.TRIAL_SCHEMA types unless typed is False.
+    """
+    df = df.drop(columns=DROP_COLUMNS, errors='ignore')  # read_workbook does not read them
+    df = df.rename(columns=RENAME_COLUMNS)
+    # a categorical column (xlsx_reader) maps each of its labels once
+    df['score (Hit/miss)'] = df['score (Hit/miss)'].map(lambda name: SCORE_NAMES.get(name, name))
+    df['date'] = df['date'].astype(str).str.zfill(6)
+    df['date'] = pd.to_datetime(df['date'], format='%d%m%y')
+    df = sort_by_date(df)
+    df['date_str'] = df['date'].dt.strftime('%d/%m/%Y')
+    return apply_schema(df) if typed else df
+
+
+def read_workbook(source):
+    """Read and preprocess one workbook (a path or an uploaded file object)."""
+    return preprocess_excel(read_columns(source, drop=DROP_COLUMNS))
+
+
+def sort_by_date(df):
+    # stable so trials of the same day keep their order in the workbook
+    return df.sort_values(by='date', ascending=True, kind='stable')
+
+
+@timed('combine', rows=len)
+def combine_frames(dataframes):
+    """Concatenate preprocessed workbooks and restore the overall date order."""
+    return sort_by_date(concat_frames(dataframes))
@@ -0,0 +1,219 @@
+"""
+The combined report figure of App.run_analysis: the score distribution, then per dog a d' plot and
+a hit/FA rate plot.
+
+Traces, session boundary lines and date annotations are assembled as plain dicts for all dogs at
+once and the figure is created (and validated) once, instead of building a throwaway plotly figure
+per plot and copying it into make_subplots trace by trace, shape by shape and annotation by
+annotation. Long series are downsampled (see downsample.py); series of SCATTERGL_MIN_POINTS points or
+more are drawn with WebGL (scattergl). report_sections gives the same plots as one figure per dog
+for the streamed report pages of report_writer.py.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from downsample import thin
+from instrumentation import timed
+from metrics import SCORE_COL
+
+SCATTERGL_MIN_POINTS = 1000
+ROW_HEIGHT = 300
+# make_subplots only allows a spacing up to 1 / (rows - 1); beyond 5 dogs the spacing shrinks
+VERTICAL_SPACING = 0.05
+MAX_TOTAL_SPACING = 0.5
+DIST_COLORS = ['blue', 'green', 'red', 'purple', 'orange', 'pink', 'brown', 'cyan']
+RATE_COLORS = {'hit_rate': '#636efa', 'fa_rate': '#EF553B'}  # plotly express defaults
+BOUNDARY_LINE = dict(color='rgb(150, 160, 165)', dash='dash')
+BOUNDARY_FONT = dict(color='rgb(97, 98, 99)')
+CI_FILL = 'rgba(99, 110, 250, 0.2)'  # the d' line colour, see-through
+
+
+def session_boundaries(df):
+    """
+    Index label (the x of plotly express) and label of the first row of every date: dd/mm/YYYY for
+    datetime dates, the text itself for dates a page has already formatted.
+    """
+    first = np.flatnonzero(~df['date'].duplicated().to_numpy())
+    dates = df['date'].iloc[first]
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        dates = dates.dt.strftime('%d/%m/%Y')
+    return df.index.to_numpy()[first], dates.astype(str).tolist()
+
+
+def boundary_shapes(positions, line=BOUNDARY_LINE, xref='x', yref='y domain'):
+    """Dashed vertical lines at the session boundaries (what add_vline draws, for all of them at once)."""
+    return [dict(type='line', x0=x, x1=x, y0=0, y1=1, line=line, xref=xref, yref=yref) for x in positions.tolist()]
+
+
+def boundary_annotations(positions, dates, y, x_offset, **refs):
+    """Vertical date labels just left of the session boundaries (refs: xref/yref of a subplot)."""
+    return [dict(x=x - x_offset, y=y, text=date, showarrow=False, textangle=270, font=BOUNDARY_FONT, **refs)
+            for x, date in zip(positions.tolist(), dates)]
+
+
+def ci_band(df, low='d_prime_low', high='d_prime_high', fill=CI_FILL):
+    """Shaded band between the low and high column of df (x: the index), to draw under the d' line."""
+    x = df.index.to_numpy()
+    edge = dict(mode='lines', line=dict(width=0), hoverinfo='skip', showlegend=False)
+    return [go.Scatter(x=x, y=df[high].to_numpy(), **edge),
+            go.Scatter(x=x, y=df[low].to_numpy(), fill='tonexty', fillcolor=fill, **edge)]
+
+
+def _suffix(row):
+    """Axis id suffix of a subplot row: x, y for the first row, x2, y2 for the second, ..."""
+    return '' if row == 1 else str(row)
+
+
+def _subplot_layout(titles, spacing):
+    """Axes and title annotations of a one-column subplot grid (what make_subplots builds)."""
+    rows = len(titles)
+    height = (1 - spacing * (rows - 1)) / rows
+    layout, annotations = {}, []
+    for row, title in enumerate(titles, start=1):
+        suffix = _suffix(row)
+        bottom = (rows - row) * (height + spacing)
+        layout[f'xaxis{suffix}'] = dict(anchor=f'y{suffix}', domain=[0.0, 1.0])
+        layout[f'yaxis{suffix}'] = dict(anchor=f'x{suffix}', domain=[bottom, bottom + height])
+        annotations.append(dict(text=title, x=0.5, xanchor='center', xref='paper', y=bottom + height,
+                                yanchor='bottom', yref='paper', showarrow=False, font=dict(size=16)))
+    return layout, annotations
+
+
+def _line_traces(df, y_cols, row):
+    """The traces plotly express draws for plot_line (markers for a single point), downsampled."""
+    n = len(df)
+    df = thin(df, y_cols)
+    x = df.index.to_numpy()
+    index_name = '_index' if 'index' in df.columns else 'index'
+    trace_type = 'scattergl' if len(df) >= SCATTERGL_MIN_POINTS else 'scatter'
+    axes = dict(xaxis=f'x{_suffix(row)}', yaxis=f'y{_suffix(row)}')
+    if trace_type == 'scatter':
+        axes['orientation'] = 'v'  # not a scattergl property
+    if y_cols == 'd_prime':
+        style = (dict(mode='lines', line=dict(color='green', dash='solid'), marker=dict(symbol='circle'))
+                 if n >= 2 else dict(mode='markers', marker=dict(color='#636efa', symbol='circle')))
+        return [dict(type=trace_type, x=x, y=df['d_prime'].to_numpy(), name='', legendgroup='', showlegend=False,
+                     hovertemplate=f'{index_name}=%{{x}}<br>d_prime=%{{y}}<extra></extra>', **style, **axes)]
+    traces = []
+    for col in y_cols:
+        style = (dict(mode='lines', line=dict(color=RATE_COLORS[col], dash='solid'), marker=dict(symbol='circle'))
+                 if n >= 2 else dict(mode='markers', marker=dict(color=RATE_COLORS[col], symbol='circle')))
+        traces.append(dict(type=trace_type, x=x, y=df[col].to_numpy(), name=col, legendgroup=col, showlegend=True,
+                           hovertemplate=f'variable={col}<br>{index_name}=%{{x}}<br>value=%{{y}}<extra></extra>',
+                           **style, **axes))
+    return traces
+
+
+def _score_traces(with_duplicates, axes=None):
+    """Score distribution: one bar trace per dog."""
+    axes = axes or dict(xaxis='x', yaxis='y')
+    score_dist = with_duplicates.groupby(['dog_name', SCORE_COL], sort=True, observed=True)['count'].sum().reset_index()
+    return [dict(type='bar', x=dog_data[SCORE_COL], y=dog_data['count'], name=dog,
+                 marker=dict(color=DIST_COLORS[i % len(DIST_COLORS)]), text=dog_data['count'], textposition='auto',
+                 **axes)
+            for i, (dog, dog_data) in enumerate(score_dist.groupby('dog_name', sort=False, observed=True))]
+
+
+def _split_by_dog(res):
+    """(dog, its rows) in order of first appearance like res["dog_name"] == dog, in one stable pass."""
+    res = res.iloc[np.argsort(res['dog_name'].factorize()[0], kind='stable')].reset_index(drop=True)
+    starts = np.flatnonzero(~res['dog_name'].duplicated().to_numpy())
+    for start, end in zip(starts, np.r_[starts[1:], len(res)]):
+        yield res['dog_name'].iloc[start], res.iloc[start:end].reset_index(drop=True)
+
+
+def _dog_plots(selected_dog, d_row, rate_row, if_sessions):
+    """Traces, boundary shapes and date annotations of the d' and rate plots of one dog."""
+    data = _line_traces(selected_dog, 'd_prime', d_row) + _line_traces(selected_dog, ['hit_rate', 'fa_rate'], rate_row)
+    shapes, annotations = [], []
+    if if_sessions and len(selected_dog) >= 2:
+        positions, dates = session_boundaries(selected_dog)
+        for row in (d_row, rate_row):
+            shapes += boundary_shapes(positions, xref=f'x{_suffix(row)}', yref=f'y{_suffix(row)}')
+        annotations += boundary_annotations(positions, dates, selected_dog['d_prime'].max() + 0.1, 0.1,
+                                            xref=f'x{_suffix(d_row)}', yref=f'y{_suffix(d_row)}')
+    return data, shapes, annotations
+
+
+def _x_titles(layout, rows, x_axis_tlt):
+    """Title the x axes of the given subplot rows (the d' and rate plots) with x_axis_tlt, if any."""
+    if x_axis_tlt:
+        for row in rows:
+            layout[f'xaxis{_suffix(row)}']['title'] = dict(text=x_axis_tlt)
+    return layout
+
+
+def _styled_layout(layout, **settings):
+    """The report look (white background, grey axis lines) on a layout dict."""
+    layout.update(
+        showlegend=True,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        **settings,
+    )
+    axis_style = dict(showline=True, linewidth=2, linecolor='grey', showgrid=True, gridcolor='lightgrey')
+    for key in list(layout):
+        if key.startswith(('xaxis', 'yaxis')):
+            layout[key].update(axis_style)
+    return layout
+
+
+@timed('figure')
+def combined_figure(res, with_duplicates, x_axis_tlt='', if_sessions=False):
+    """
+    The report figure for one groupping result (res: one row per group, with_duplicates: one row
+    per group and score). The d' and rate plots get x_axis_tlt as x-axis title; session boundaries
+    are marked when if_sessions is set.
+    """
+    all_dogs = res['dog_name'].unique()
+    titles = ["Score Distribution"] + [title for dog in all_dogs
+                                       for title in (f"{dog}: D-Prime over time", f"{dog}: Hit and FA rates over time")]
+    spacing = min(VERTICAL_SPACING, MAX_TOTAL_SPACING / (len(titles) - 1))
+    layout, annotations = _subplot_layout(titles, spacing)
+    _x_titles(layout, range(2, len(titles) + 1), x_axis_tlt)
+    shapes = []
+
+    # Score distribution: one bar trace per dog in the first row
+    data = _score_traces(with_duplicates)
+    for i, (dog, selected_dog) in enumerate(_split_by_dog(res)):
+        dog_data, dog_shapes, dog_annotations = _dog_plots(selected_dog, 2 * i + 2, 2 * i + 3, if_sessions)
+        data += dog_data
+        shapes += dog_shapes
+        annotations += dog_annotations
+
+    _styled_layout(
+        layout,
+        annotations=annotations,
+        shapes=shapes,
+        height=ROW_HEIGHT * len(titles),
+        width=800,
+        title=dict(text="<b>Analysis Results</b>", font=dict(size=24, family="Arial, sans-serif"), yanchor='top',
+                   y=0.95),
+        legend=dict(orientation="v", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=20, r=20, t=100, b=50),  # Adjust the top margin (t) for more space
+    )
+    return go.Figure(dict(data=data, layout=layout))
+
+
+def report_sections(res, with_duplicates, x_axis_tlt='', if_sessions=False):
+    """
+    The combined report as separate figures, built one at a time: ('scores', title, figure) for the
+    score distribution, then (dog, title, figure) with the d' and rate plots of every dog. Figures are
+    plain dicts (the same traces and layout as combined_figure) for report_writer.write_report.
+    """
+    layout, annotations = _subplot_layout(["Score Distribution"], 0)
+    yield 'scores', "Score Distribution", dict(
+        data=_score_traces(with_duplicates),
+        layout=_styled_layout(layout, annotations=annotations, height=ROW_HEIGHT + 80,
+                              legend=dict(orientation="v", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                              margin=dict(l=20, r=20, t=60, b=30)))
+    for dog, selected_dog in _split_by_dog(res):
+        titles = [f"{dog}: D-Prime over time", f"{dog}: Hit and FA rates over time"]
+        layout, annotations = _subplot_layout(titles, VERTICAL_SPACING * 2)
+        _x_titles(layout, (1, 2), x_axis_tlt)
+        data, shapes, dog_annotations = _dog_plots(selected_dog, 1, 2, if_sessions)
+        yield dog, titles[0], dict(
+            data=data,
+            layout=_styled_layout(layout, annotations=annotations + dog_annotations, shapes=shapes,
+                                  height=ROW_HEIGHT * 2 + 80, margin=dict(l=20, r=20, t=60, b=30)))
@@ -0,0 +1,42 @@
+"""
+The display modes of the report (the radio buttons of App): which counts are grouped by which keys,
+and how the x axis is titled. Shared by the Tk app and the batch command line (batch_report.py).
+"""
+from metrics import groupping_counts
+
+# name -> label of the App radio button
+MODES = {
+    'sessions': "By Sessions",
+    'all': "All Together",
+    'bins': "By Bin Size",
+    'windows': "Moving Window",
+}
+DEFAULT_BIN_SIZE = 10
+DEFAULT_WINDOW = 50
+DEFAULT_STRIDE = 5
+
+
+def mode_result(mode, session_counts, get_bin_engine, correction=None, bin_size=DEFAULT_BIN_SIZE,
+                window=DEFAULT_WINDOW, stride=DEFAULT_STRIDE, ci=0):
+    """
+    Group the data for one display mode. get_bin_engine() returns the BinEngine of the data (only
+    called for bins and windows, so it can be built lazily). ci: bootstrap resamples for the interval
+    of d' (see metrics.groupping_counts).
+    Returns (res, with_duplicates, x axis title, if_sessions) as combined_figure takes them.
+    """
+    if mode == 'sessions':
+        res, with_duplicates = groupping_counts(session_counts, ['dog_name', 'date', 'num_session'],
+                                                correction=correction, ci=ci)
+        return res, with_duplicates, 'session', True
+    if mode == 'all':
+        res, with_duplicates = groupping_counts(session_counts, 'dog_name', correction=correction, ci=ci)
+        return res, with_duplicates, '', False
+    if mode == 'bins':
+        res, with_duplicates = groupping_counts(get_bin_engine().bins(bin_size), ['dog_name', 'bin'],
+                                                correction=correction, ci=ci)
+        return res, with_duplicates, '', False
+    if mode == 'windows':
+        res, with_duplicates = groupping_counts(get_bin_engine().windows(window, stride), ['dog_name', 'window'],
+                                                correction=correction, ci=ci)
+        return res, with_duplicates, 'window', False
+    raise ValueError(f"unknown display mode {mode!r}, expected one of {', '.join(MODES)}")
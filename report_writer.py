@@ -0,0 +1,191 @@
+"""
+The HTML report pages (combined_analysis.html of the Tk app, the pages of batch_report.py).
+
+A page is written to disk section by section as the figures of report_figure.report_sections are
+built (into <page>.tmp, renamed when complete, so a cancelled or failed run leaves the previous page
+as it was); the whole page is never held in memory as one string. Next to the page, or under the
+asset root a caller gives (batch_report: the output folder, shared by every mode folder):
+
+    assets/plotly-<version>.min.js   plotly.js, written once and shared by every report using the folder
+    assets/report-<digest>.js        the plotly template and the section loader, shared as well
+    <page>_files/<dog>-<digest>.js   one fragment per dog with the figure of that dog (next to the page)
+
+Pages work offline (no CDN). The score distribution is drawn at once; a dog's fragment is only loaded
+when its section scrolls near the screen, so opening a report of many dogs only draws the first ones.
+Fragments are named by their content: a rerun does not rewrite the dogs whose plots did not change,
+and fragments no longer used by the page are removed.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import webbrowser
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+from plotly.utils import PlotlyJSONEncoder
+
+from instrumentation import timed
+
+ASSET_DIR = 'assets'
+SECTION_HEIGHT_MARGIN = 20
+
+STYLE = """
+body { margin: 0; font-family: Arial, sans-serif; }
+.scroll-container {
+    width: 100%;  /* Set the container to use full width of the viewport */
+    height: 100vh;  /* Set the visible height */
+    overflow-y: scroll;  /* Enable vertical scrolling */
+    box-sizing: border-box;  /* Ensure padding is included in width */
+    padding: 20px 0;  /* Add padding at the top and bottom */
+    display: flex;  /* Use flexbox to center the graphs */
+    flex-direction: column;  /* Stack the graphs vertically */
+    align-items: center;  /* Center the graphs horizontally */
+}
+.plotly-graph {
+    width: 100%;  /* Ensure each graph takes the full width */
+    max-width: 800px;  /* Limit max width for large screens */
+    flex: none;
+}
+h1 { font-size: 24px; }
+"""
+
+# dogsReport.show(id, figure) draws a figure with the plotly template; sections with a data-src are
+# loaded (a <script> tag, which also works for pages opened from disk) when they come near the screen
+LOADER = """
+window.dogsReport = (function () {
+    var template = %(template)s;
+    function show(id, figure) {
+        figure.layout.template = template;
+        Plotly.newPlot(id, figure.data, figure.layout, {responsive: true});
+    }
+    function load(section) {
+        var script = document.createElement('script');
+        script.src = section.getAttribute('data-src');
+        document.head.appendChild(script);
+    }
+    document.addEventListener('DOMContentLoaded', function () {
+        var sections = document.querySelectorAll('[data-src]');
+        if (!('IntersectionObserver' in window)) {
+            sections.forEach(load);
+            return;
+        }
+        var observer = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    load(entry.target);
+                }
+            });
+        }, {rootMargin: '800px 0px'});
+        sections.forEach(function (section) { observer.observe(section); });
+    });
+    return {show: show};
+})();
+"""
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _write_once(path, text):
+    """Write text to path unless it is already there (assets and fragments are named by version or content)."""
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)  # a page opened meanwhile never sees half a file
+
+
+def _to_json(obj):
+    return json.dumps(obj, cls=PlotlyJSONEncoder, separators=(',', ':'))
+
+
+def shared_assets(folder, page_folder=None):
+    """
+    Write plotly.js and the loader to folder/assets (once) and return their URLs relative to
+    page_folder (default: folder).
+    """
+    plotly_name = f"plotly-{get_plotlyjs_version()}.min.js"
+    plotly_path = os.path.join(folder, ASSET_DIR, plotly_name)
+    if not os.path.exists(plotly_path):
+        _write_once(plotly_path, get_plotlyjs())
+    loader = LOADER % dict(template=_to_json(pio.templates[pio.templates.default].layout.to_plotly_json()))
+    loader_name = f"report-{_digest(loader)}.js"
+    _write_once(os.path.join(folder, ASSET_DIR, loader_name), loader)
+    prefix = os.path.relpath(os.path.join(folder, ASSET_DIR), page_folder or folder).replace(os.sep, '/')
+    return f"{prefix}/{plotly_name}", f"{prefix}/{loader_name}"
+
+
+def _safe_key(key):
+    return re.sub(r'[^\w-]+', '_', str(key))
+
+
+@timed('write_report')
+def write_report(path, sections, title="Analysis Results", asset_root=None):
+    """
+    Write a report page for the (key, title, figure) sections of report_figure.report_sections: the
+    first section inline, the others as fragments loaded when scrolled to. asset_root: the folder
+    whose assets/ the page uses (default: the page's folder). Returns the page path.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    fragment_dir = f"{stem}_files"
+    plotly_url, loader_url = shared_assets(asset_root or folder, folder)
+    title = html.escape(title)
+    used = set()
+
+    tmp_path = f"{path}.tmp"
+    try:
+        _write_page(tmp_path, sections, title, plotly_url, loader_url, folder, fragment_dir, used)
+        os.replace(tmp_path, path)
+    except BaseException:  # cancelled (App.checked) or failed: the previous page stays
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # fragments of earlier runs that this page no longer loads
+    fragment_path = os.path.join(folder, fragment_dir)
+    if os.path.isdir(fragment_path):
+        for name in os.listdir(fragment_path):
+            if name.endswith('.js') and name not in used:
+                os.remove(os.path.join(fragment_path, name))
+    return path
+
+
+def _write_page(path, sections, title, plotly_url, loader_url, folder, fragment_dir, used):
+    """The page itself (see write_report); the names of the fragments it loads are added to used."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n'
+                f'<style>{STYLE}</style>\n<script src="{plotly_url}"></script>\n<script src="{loader_url}"></script>\n'
+                f'</head>\n<body>\n<div class="scroll-container">\n<h1><b>{title}</b></h1>\n')
+        for index, (key, section_title, figure) in enumerate(sections):
+            section_id = f"section-{index}-{_safe_key(key)}"
+            height = figure['layout'].get('height', 450) + SECTION_HEIGHT_MARGIN
+            if index == 0:
+                f.write(f'<div class="plotly-graph" id="{section_id}" style="height:{height}px"></div>\n'
+                        f'<script>dogsReport.show("{section_id}", ')
+                json.dump(figure, f, cls=PlotlyJSONEncoder, separators=(',', ':'))
+                f.write(');</script>\n')
+                continue
+            fragment = f'dogsReport.show("{section_id}", {_to_json(figure)});\n'
+            name = f"{_safe_key(key)}-{_digest(fragment)}.js"
+            _write_once(os.path.join(folder, fragment_dir, name), fragment)
+            used.add(name)
+            f.write(f'<div class="plotly-graph" id="{section_id}" title="{html.escape(section_title)}" '
+                    f'data-src="{fragment_dir}/{name}" style="height:{height}px"></div>\n')
+        f.write('</div>\n</body>\n</html>\n')
+
+
+def open_report(path):
+    """Open a written report: the associated program on Windows, the default browser elsewhere."""
+    if hasattr(os, 'startfile'):
+        os.startfile(path)
+    else:
+        webbrowser.open(f"file://{os.path.abspath(path)}")
@@ -0,0 +1,178 @@
+"""
+Typed schema of the trial table, shared by every loader (North.data workbooks and experiment logs).
+
+Names, scores, training levels and other labels repeat a handful of values over thousands of
+trials, so they are stored as categories; counters and port codes as the smallest integer type
+that holds them, flags as bool and dates as datetime64. apply_schema converts a loaded frame and
+rejects values that do not fit (text in a number column, a session number out of range, ...).
+
+Show the memory before and after on the bundled files with:  python schema.py
+"""
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+TRIAL_SCHEMA = {
+    # labels
+    'dog_name': 'category',
+    'score (Hit/miss)': 'category',
+    'training': 'category',
+    'Exp name': 'category',
+    'Level identity': 'category',
+    'date_str': 'category',
+    # dates and times of day
+    'date': 'datetime64',
+    'Time stamp of trial initiation': 'timedelta64',
+    'termination': 'timedelta64',
+    # counters and codes
+    'num_session': 'int16',
+    'trial': 'int16',
+    'score_ID': 'int8',
+    'video ': 'int32',
+    'take_difficulty': 'int8',
+    'Port1 (1-Target,0-non-Target,-1-Distractor)': 'int8',
+    'Port2': 'int8',
+    'Port 3': 'int8',
+    'Open_port(1,2,3)': 'int8',
+    # flags
+    'continuous_mode(0,1)': 'bool',
+}
+INT_SCHEMA = {name: dtype for name, dtype in TRIAL_SCHEMA.items() if dtype.startswith('int')}
+# Columns that read_csv reads as category: dates and times are parsed from text once per distinct value
+# (see log_parser), flags are stripped there and converted by apply_schema (the C engine cannot parse
+# 'True ' as bool)
+READ_AS_CATEGORY = ('datetime64', 'timedelta64', 'bool')
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def read_dtypes(names):
+    """read_csv dtypes for the given columns: the schema type, or category for dates, times and flags."""
+    dtypes = {}
+    for name in names:
+        dtype = TRIAL_SCHEMA.get(name, 'str')
+        dtypes[name] = 'category' if dtype in READ_AS_CATEGORY else dtype
+    return dtypes
+
+
+def _to_int(col, dtype):
+    values = pd.to_numeric(col, errors='coerce')
+    bad = values.isna() & col.notna()
+    if bad.any():
+        raise SchemaError(f"column {col.name!r}: {col[bad].iloc[0]!r} is not a number")
+    present = values.dropna()
+    if (present % 1 != 0).any():
+        raise SchemaError(f"column {col.name!r}: {present[present % 1 != 0].iloc[0]!r} is not a whole number")
+    info = np.iinfo(dtype)
+    if len(present) and (present.min() < info.min or present.max() > info.max):
+        raise SchemaError(f"column {col.name!r}: values {present.min()}..{present.max()} do not fit {dtype}")
+    # missing values need the nullable integer type
+    return values.astype(dtype.capitalize() if len(present) < len(values) else dtype)
+
+
+def _to_bool(col):
+    if col.dtype == bool:
+        return col
+    flags = col.astype(str).str.strip().str.lower().map({'true': True, 'false': False, '1': True, '0': False})
+    if flags.isna().any():
+        raise SchemaError(f"column {col.name!r}: {col[flags.isna()].iloc[0]!r} is not a flag")
+    return flags.astype(bool)
+
+
+def _convert(col, dtype):
+    if dtype == 'category':
+        if not isinstance(col.dtype, pd.CategoricalDtype):
+            return col.astype('category')
+        # categories in sorted order, like astype('category'), whatever order the labels were mapped in
+        categories = col.cat.categories
+        return col if categories.is_monotonic_increasing else col.cat.reorder_categories(categories.sort_values())
+    if dtype == 'datetime64':
+        if pd.api.types.is_datetime64_any_dtype(col.dtype):
+            return col
+        try:
+            return pd.to_datetime(col)
+        except (ValueError, TypeError) as e:
+            raise SchemaError(f"column {col.name!r}: {e}") from e
+    if dtype == 'timedelta64':
+        if pd.api.types.is_timedelta64_dtype(col.dtype):
+            return col
+        try:
+            return pd.to_timedelta(col)
+        except (ValueError, TypeError) as e:
+            raise SchemaError(f"column {col.name!r}: {e}") from e
+    if dtype == 'bool':
+        return _to_bool(col)
+    if col.dtype == dtype:
+        return col
+    return _to_int(col, dtype)
+
+
+def apply_schema(df, schema=TRIAL_SCHEMA):
+    """Convert the columns of df that the schema knows (others are left alone); raises SchemaError."""
+    converted = {name: _convert(df[name], dtype) for name, dtype in schema.items() if name in df.columns}
+    return df.assign(**converted) if converted else df
+
+
+def concat_frames(frames):
+    """
+    pd.concat(frames, ignore_index=True) that keeps the schema types: categorical columns stay
+    categorical when the frames have different categories, and an integer column that some frames
+    lack becomes a nullable integer instead of float.
+    """
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    columns = list(dict.fromkeys(name for frame in frames for name in frame.columns))
+    aligned = [frame.copy(deep=False) for frame in frames]
+    for name in columns:
+        present = [frame[name] for frame in frames if name in frame.columns]
+        if not all(isinstance(col.dtype, pd.CategoricalDtype) for col in present):
+            continue
+        categories = union_categoricals(present, sort_categories=True).categories
+        for frame in aligned:
+            if name in frame.columns:
+                frame[name] = frame[name].cat.set_categories(categories)
+            else:
+                frame[name] = pd.Categorical([None] * len(frame), categories=categories)
+    return apply_schema(pd.concat(aligned, ignore_index=True)[columns], INT_SCHEMA)
+
+
+def memory_report(before, after):
+    """Per column dtype and memory (MB, including the strings) before and after apply_schema."""
+    report = pd.DataFrame({
+        'dtype before': before.dtypes.astype(str),
+        'MB before': before.memory_usage(deep=True, index=False) / 1e6,
+        'dtype after': after.dtypes.astype(str),
+        'MB after': after.memory_usage(deep=True, index=False) / 1e6,
+    })
+    report.loc['total'] = ['', report['MB before'].sum(), '', report['MB after'].sum()]
+    return report
+
+
+def main(paths=None):
+    from preprocessing import preprocess_excel
+    from log_parser import load_logs
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    workbooks = paths or sorted(glob.glob(os.path.join(folder, 'North.data*.xlsx')))
+    logs = [] if paths else sorted(glob.glob(os.path.join(folder, '*Experiment.txt')))
+    if workbooks:
+        frames = [preprocess_excel(pd.read_excel(path), typed=False) for path in workbooks]
+        untyped = pd.concat(frames, ignore_index=True)
+        typed = concat_frames([apply_schema(df) for df in frames])
+        print(f"{len(workbooks)} workbook(s), {len(typed)} trials")
+        print(memory_report(untyped, typed).round(3).to_string(), end='\n\n')
+    if logs:
+        typed = load_logs(logs)
+        untyped = typed.astype({name: str for name in typed.columns})
+        print(f"{len(logs)} log(s), {len(typed)} trials (before: every column as text)")
+        print(memory_report(untyped, typed).round(3).to_string())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,139 @@
+"""
+Start (or find) the Streamlit server of the app and tell when it is ready to serve.
+
+Readiness comes from the server itself: the "You can now view" line Streamlit prints on stdout when
+it runs as a child process, or its /_stcore/health endpoint, probed with exponential backoff.
+A started server is recorded in a small state file with its port and the app version (a digest of
+the page script), so the next launch of the same version reuses it instead of starting another;
+a server of another version, or some other program on the port, is never taken for ours.
+Only the standard library is imported here, the launcher has to start fast.
+"""
+import hashlib
+import json
+import logging
+import os
+import socket
+import subprocess
+import threading
+import time
+import urllib.request
+
+STATE_DIR = os.environ.get('DOGS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.dogs_cache'))
+STATE_NAME = 'server.json'
+READY_LINE = 'You can now view your Streamlit app'
+HEALTH_PATH = '/_stcore/health'
+
+
+def app_version(script):
+    """Digest of the page script: a server started from another version of the app is not reused."""
+    with open(script, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+
+def port_in_use(port, host='localhost'):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex((host, port)) == 0
+
+
+def free_port(preferred=None, host='localhost'):
+    """`preferred` when nothing uses it, otherwise a port chosen by the OS."""
+    if preferred and not port_in_use(preferred, host):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind((host, preferred))
+                return preferred
+            except OSError:
+                pass
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def is_healthy(port, host='localhost', timeout=0.5):
+    """True when a Streamlit server answers its health check on `port`."""
+    try:
+        with urllib.request.urlopen(f'http://{host}:{port}{HEALTH_PATH}', timeout=timeout) as response:
+            return response.status == 200 and response.read().strip() == b'ok'
+    except (OSError, ValueError):
+        return False
+
+
+def _follow_output(stream, ready):
+    """Log the server output and set `ready` at Streamlit's ready line (keeps the pipe drained)."""
+    for line in iter(stream.readline, ''):
+        line = line.rstrip()
+        if line:
+            logging.info(f'server: {line}')
+        if READY_LINE in line:
+            ready.set()
+
+
+def wait_until_ready(port, proc=None, timeout=300, first_delay=0.02, max_delay=0.5):
+    """
+    Wait until the server on `port` is ready; returns False on timeout or when `proc` exits first.
+    With `proc` (a server started by start_server) its ready line ends the wait as soon as it is
+    printed; the health probe backs off from first_delay to max_delay seconds between tries.
+    """
+    ready = threading.Event()
+    if proc is not None and proc.stdout is not None:
+        threading.Thread(target=_follow_output, args=(proc.stdout, ready), daemon=True).start()
+    deadline = time.monotonic() + timeout
+    delay = first_delay
+    while True:
+        if ready.is_set() or is_healthy(port):
+            return True
+        if proc is not None and proc.poll() is not None:
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        ready.wait(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def start_server(command, env=None):
+    """Start a server child process whose output is read by wait_until_ready."""
+    env = dict(env if env is not None else os.environ, PYTHONUNBUFFERED='1')  # the ready line must not sit in a buffer
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+                            env=env)
+
+
+def _state_path():
+    return os.path.join(STATE_DIR, STATE_NAME)
+
+
+def read_state():
+    try:
+        with open(_state_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_state(port, version, pid):
+    """Remember the ready server so later launches of the same version can reuse it."""
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(_state_path(), 'w') as f:
+            json.dump({'port': port, 'version': version, 'pid': pid}, f)
+    except OSError:
+        logging.exception('Could not record the server state')
+
+
+def clear_state(pid):
+    """Forget the recorded server if it is the one started as `pid`."""
+    state = read_state()
+    if state is not None and state.get('pid') == pid:
+        try:
+            os.remove(_state_path())
+        except OSError:
+            pass
+
+
+def find_running_server(version):
+    """Port of a healthy server of this app version started by an earlier launch, or None."""
+    state = read_state()
+    if state is None or state.get('version') != version:
+        return None
+    port = state.get('port')
+    return port if isinstance(port, int) and is_healthy(port) else None
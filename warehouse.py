@@ -0,0 +1,315 @@
+"""
+Local trial warehouse: the trials of every workbook and experiment log the apps load, in one SQLite file.
+
+A loaded frame is imported once (sources are known by their content digest, see
+aggregate_store.frame_digest), and a trial that an earlier source already holds (same identity as in
+dedup.trial_keys, see dedup.identity_columns for logs) is not stored again, so the combined workbook
+and the monthly ones can all be imported, and so can a log that has grown since its last import.
+The trials table is indexed on (dog_name, date, num_session) and on (level, training).
+
+counts_by pushes the grouping down to SQL: it returns one row of score counts per group, the table
+that metrics.groupping_counts and metrics.rates_table take. counts_by(SESSION_KEYS, ...) is the
+session_counts argument of report_modes.mode_result, so "By Sessions" and "All Together" need no
+source file; trials() gives the trial rows for the bin and window modes. Labels (training, level)
+come back as text. This is the "Trial warehouse" data source of the xlsx Streamlit page
+(new_run_all.py); the Tk app, main_stream and batch_report group the files they load.
+
+    python warehouse.py import "data/North.data*.xlsx" "logs/*Experiment.txt"
+    python warehouse.py query --dog touch --days 30 --by session
+    python warehouse.py info
+
+The file is DOGS_WAREHOUSE (default: trials.sqlite in the cache folder); with DOGS_WAREHOUSE=0 the
+apps do not import what they load.
+"""
+import argparse
+import glob
+import logging
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from aggregate_store import SESSION_KEYS, frame_digest
+from dedup import identity_columns, trial_keys
+from excel_cache import CACHE_DIR
+from instrumentation import timed
+from metrics import OUTCOMES, SCORE_COL, rates_table
+from schema import apply_schema
+
+DEFAULT_PATH = os.path.join(CACHE_DIR, 'trials.sqlite')
+WAREHOUSE_PATH = os.environ.get('DOGS_WAREHOUSE', DEFAULT_PATH)
+ENABLED = WAREHOUSE_PATH != '0'
+SCHEMA_VERSION = 2
+logger = logging.getLogger(__name__)
+
+# frame column -> (warehouse column, SQL type); dates are stored as ISO days ('2024-03-17')
+COLUMNS = {
+    'dog_name': ('dog_name', 'TEXT'),
+    'date': ('date', 'TEXT'),
+    'num_session': ('num_session', 'INTEGER'),
+    'trial': ('trial', 'INTEGER'),
+    SCORE_COL: ('score', 'TEXT'),
+    'training': ('training', 'TEXT'),
+    'Level identity': ('level', 'TEXT'),
+    'Exp name': ('exp_name', 'TEXT'),
+}
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    name TEXT,
+    trials INTEGER,
+    stored INTEGER,
+    imported_at TEXT
+);
+CREATE TABLE IF NOT EXISTS trials (
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    trial_key INTEGER,
+    {', '.join(f'{column} {sql_type}' for column, sql_type in COLUMNS.values())}
+);
+CREATE UNIQUE INDEX IF NOT EXISTS trials_key ON trials(trial_key);
+CREATE INDEX IF NOT EXISTS trials_dog_date_session ON trials(dog_name, date, num_session);
+CREATE INDEX IF NOT EXISTS trials_level_training ON trials(level, training);
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+# run on a file of an older schema version before SCHEMA
+MIGRATIONS = {
+    # version 1 stored the trials of experiment logs without an identity: forget those sources, the
+    # apps import them again (with trial keys) the next time they are loaded
+    1: """
+DELETE FROM sources WHERE id IN (SELECT DISTINCT source_id FROM trials WHERE trial_key IS NULL);
+DELETE FROM trials WHERE trial_key IS NULL;
+""",
+}
+# --by of the query command -> group keys (frame column names)
+GROUPINGS = {
+    'session': SESSION_KEYS,
+    'date': ['dog_name', 'date'],
+    'dog': ['dog_name'],
+    'training': ['dog_name', 'training'],
+    'level': ['dog_name', 'Level identity'],
+}
+
+
+def _values(df, name):
+    """One column of df as SQLite values (None for missing ones or a column df does not have)."""
+    if name not in df.columns:
+        return [None] * len(df)
+    col = df[name]
+    if name == 'date':
+        col = pd.to_datetime(col).dt.strftime('%Y-%m-%d')
+    # Python ints and strings (numbers in a TEXT column are stored as text by SQLite)
+    values = col.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def _typed(df):
+    """Frame column names and the schema types for rows read back from the warehouse."""
+    df = df.rename(columns={column: name for name, (column, _) in COLUMNS.items()})
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+    return apply_schema(df)
+
+
+def _where(dogs=None, since=None, until=None, days=None, training=None, level=None):
+    """
+    SQL condition and parameters of a selection. days keeps the last days counted back from the
+    newest trial of the selection (the files are history, not today's data).
+    """
+    clauses, params = [], []
+    if dogs:
+        clauses.append(f"dog_name IN ({', '.join('?' * len(dogs))})")
+        params += [str(dog) for dog in dogs]
+    if since is not None:
+        clauses.append("date >= ?")
+        params.append(pd.Timestamp(since).strftime('%Y-%m-%d'))
+    if until is not None:
+        clauses.append("date <= ?")
+        params.append(pd.Timestamp(until).strftime('%Y-%m-%d'))
+    if training is not None:
+        clauses.append("training = ?")
+        params.append(str(training))
+    if level is not None:
+        clauses.append("level = ?")
+        params.append(str(level))
+    condition = " AND ".join(clauses) or "1"
+    if days:
+        clauses.append(f"date > date((SELECT MAX(date) FROM trials WHERE {condition}), ?)")
+        params += params + [f"-{int(days)} days"]
+        condition = " AND ".join(clauses)
+    return condition, params
+
+
+class Warehouse:
+    def __init__(self, path=WAREHOUSE_PATH):
+        self.path = path
+
+    def connect(self):
+        """A new connection (one per call, so the Tk worker and Streamlit threads can all use the warehouse)."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version in MIGRATIONS:
+                connection.executescript(MIGRATIONS[version])
+            connection.executescript(SCHEMA)
+        return connection
+
+    def import_frame(self, connection, df, name):
+        """Store the trials of one loaded frame; returns the number stored, None if it was imported before."""
+        digest = frame_digest(df)
+        if connection.execute("SELECT 1 FROM sources WHERE digest = ?", (digest,)).fetchone():
+            return None
+        source_id = connection.execute(
+            "INSERT INTO sources (digest, name, trials, imported_at) VALUES (?, ?, ?, ?)",
+            (digest, name, len(df), time.strftime('%Y-%m-%dT%H:%M:%S'))).lastrowid
+        key_columns = identity_columns(df)
+        keys = trial_keys(df, key_columns).view('int64').tolist() if key_columns else [None] * len(df)
+        columns = [_values(df, name) for name in COLUMNS]
+        before = connection.total_changes
+        # INSERT OR IGNORE skips the trials an earlier source stored (unique trial_key)
+        connection.executemany(
+            f"INSERT OR IGNORE INTO trials (source_id, trial_key, {', '.join(c for c, _ in COLUMNS.values())}) "
+            f"VALUES ({', '.join('?' * (len(COLUMNS) + 2))})",
+            zip([source_id] * len(df), keys, *columns))
+        stored = connection.total_changes - before
+        connection.execute("UPDATE sources SET stored = ? WHERE id = ?", (stored, source_id))
+        return stored
+
+    def import_frames(self, frames, names):
+        """Import loaded frames in one transaction; returns [(name, trials stored or None if known)]."""
+        with closing(self.connect()) as connection, connection:
+            return [(name, self.import_frame(connection, df, name)) for df, name in zip(frames, names)]
+
+    def counts_by(self, keys, **selection):
+        """
+        Score counts per group of the selected trials (see _where), computed in SQL: indexed by keys
+        (frame column names), one column per score label, like aggregate_store.session_counts.
+        """
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        columns = [COLUMNS[key][0] for key in keys]
+        condition, params = _where(**selection)
+        with closing(self.connect()) as connection:
+            rows = pd.read_sql_query(
+                f"SELECT {', '.join(columns)}, score, COUNT(*) AS n FROM trials "
+                f"WHERE score IS NOT NULL AND {condition} GROUP BY {', '.join(columns)}, score",
+                connection, params=params)
+        if rows.empty:
+            return pd.DataFrame()
+        rows = _typed(rows)
+        counts = rows.set_index(keys + [SCORE_COL])['n'].unstack(SCORE_COL, fill_value=0)
+        counts.columns = counts.columns.astype(str)
+        return counts
+
+    def trials(self, **selection):
+        """The selected trials in load order (date, then source and row), with the schema types."""
+        condition, params = _where(**selection)
+        names = [column for column, _ in COLUMNS.values()]
+        with closing(self.connect()) as connection:
+            df = pd.read_sql_query(f"SELECT {', '.join(names)} FROM trials WHERE {condition} "
+                                   f"ORDER BY date, source_id, rowid", connection, params=params)
+        df = _typed(df.dropna(axis='columns', how='all'))
+        if 'date' in df.columns:
+            df['date_str'] = df['date'].dt.strftime('%d/%m/%Y').astype('category')
+        return df
+
+    def dog_names(self):
+        with closing(self.connect()) as connection:
+            return [name for name, in connection.execute(
+                "SELECT DISTINCT dog_name FROM trials WHERE dog_name IS NOT NULL ORDER BY dog_name")]
+
+    def state(self):
+        """(sources, newest source id): changes with every import, for keying cached results."""
+        with closing(self.connect()) as connection:
+            return connection.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM sources").fetchone()
+
+    def sources(self):
+        with closing(self.connect()) as connection:
+            return pd.read_sql_query("SELECT name, trials, stored, imported_at FROM sources ORDER BY id", connection)
+
+
+_default_warehouse = None
+
+
+def get_warehouse():
+    global _default_warehouse
+    if _default_warehouse is None:
+        _default_warehouse = Warehouse()
+    return _default_warehouse
+
+
+@timed('warehouse_import')
+def import_loaded(frames, names):
+    """Import what an app loaded (unless DOGS_WAREHOUSE=0); a failure is logged, never raised."""
+    if not ENABLED:
+        return []
+    try:
+        return get_warehouse().import_frames(frames, names)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Could not import into the trial warehouse %s: %s", WAREHOUSE_PATH, e)
+        return []
+
+
+def import_files(warehouse, paths):
+    from log_parser import dog_name_from_file, parse_log
+    from workbook_loader import load_workbooks
+
+    logs = [path for path in paths if path.lower().endswith('.txt')]
+    workbooks = [path for path in paths if path not in logs]
+    frames, errors = load_workbooks(workbooks)
+    failed = {name for name, _ in errors}
+    names = [path for path in workbooks if path not in failed]
+    for path in logs:
+        try:
+            frames.append(parse_log(path, dog_name=dog_name_from_file(path)))
+            names.append(path)
+        except Exception as e:
+            errors.append((path, e))
+    for name, e in errors:
+        print(f"Failed to load {name}: {e}", file=sys.stderr)
+    for name, stored in warehouse.import_frames(frames, names):
+        print(f"{name}: already imported" if stored is None else f"{name}: {stored} trial(s) stored")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import trials into the local warehouse and query it.")
+    parser.add_argument('--path', default=WAREHOUSE_PATH if ENABLED else DEFAULT_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    importing = commands.add_parser('import', help="import workbooks and experiment logs")
+    importing.add_argument('inputs', nargs='+', help="files or glob patterns")
+    query = commands.add_parser('query', help="d' per group of the stored trials")
+    query.add_argument('--dog', action='append', help="repeat for several dogs (default: all)")
+    query.add_argument('--days', type=int, help="the last DAYS days, counted back from the newest trial")
+    query.add_argument('--since')
+    query.add_argument('--until')
+    query.add_argument('--training')
+    query.add_argument('--level')
+    query.add_argument('--by', choices=list(GROUPINGS), default='session')
+    commands.add_parser('info', help="list the imported files")
+    args = parser.parse_args(argv)
+
+    warehouse = Warehouse(args.path)
+    if args.command == 'import':
+        paths = sorted({path for pattern in args.inputs for path in (glob.glob(pattern) or [pattern])})
+        import_files(warehouse, paths)
+    elif args.command == 'query':
+        start = time.perf_counter()
+        counts = warehouse.counts_by(GROUPINGS[args.by], dogs=args.dog, days=args.days, since=args.since,
+                                     until=args.until, training=args.training, level=args.level)
+        seconds = time.perf_counter() - start
+        if counts.empty:
+            print("No trials match.")
+        else:
+            table = rates_table(counts).round({'hit_rate': 3, 'fa_rate': 3, 'd_prime': 3})
+            print(table[GROUPINGS[args.by] + OUTCOMES + ['hit_rate', 'fa_rate', 'd_prime']].to_string(index=False))
+        print(f"{len(counts)} group(s) from SQL in {seconds * 1000:.1f} ms")
+    else:
+        print(f"{args.path}:")
+        print(warehouse.sources().to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Load several North.data workbooks at once.
+
+Cached workbooks are read in the calling process (a memory-mapped read is cheaper than shipping the
+frame back from a worker). The remaining workbooks are parsed and preprocessed concurrently in a
+process pool; the results are then written to the cache by the caller so only one process touches
+the cache index.
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from excel_cache import get_cache
+from instrumentation import timed
+from preprocessing import read_workbook
+
+# 0 / unset means one worker per CPU (never more than the number of workbooks to parse)
+LOAD_WORKERS = int(os.environ.get('DOGS_LOAD_WORKERS', 0))
+
+
+def source_name(source):
+    return source if isinstance(source, (str, os.PathLike)) else source.name
+
+
+def _to_picklable(source):
+    # Uploaded files are sent to the workers as raw bytes
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    return source.name, source.getvalue()
+
+
+def _read_in_worker(source):
+    if isinstance(source, tuple):
+        source = io.BytesIO(source[1])
+    return read_workbook(source)
+
+
+@timed('load_workbooks', rows=lambda result: sum(len(df) for df in result[0]))
+def load_workbooks(sources, max_workers=LOAD_WORKERS, use_cache=True, on_progress=None):
+    """
+    Load and preprocess workbooks (paths or uploaded files).
+    Returns (dataframes, errors): the frames of the workbooks that loaded, in the order of `sources`,
+    and a list of (name, exception) for the ones that failed.
+    on_progress(done, total, name) is called after each workbook; an exception it raises stops the
+    loading (workbooks not started yet are skipped) and is passed on.
+    """
+    sources = list(sources)
+    total = len(sources)
+    results = [None] * total
+    failed = {}
+    done = 0
+    cache = get_cache() if use_cache else None
+
+    def report(i, df=None, error=None):
+        nonlocal done
+        done += 1
+        if error is None:
+            results[i] = df
+        else:
+            failed[i] = error
+        if on_progress is not None:
+            on_progress(done, total, source_name(sources[i]))
+
+    pending = []
+    for i, source in enumerate(sources):
+        df = None
+        if cache is not None:
+            try:
+                df = cache.get(source)
+            except OSError:
+                df = None
+        if df is not None:
+            report(i, df)
+        else:
+            pending.append(i)
+
+    if not max_workers:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(pending))
+
+    if max_workers <= 1:
+        for i in pending:
+            try:
+                report(i, read_workbook(sources[i]))
+            except Exception as e:
+                report(i, error=e)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_read_in_worker, _to_picklable(sources[i])): i for i in pending}
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        report(i, error=e)
+                    else:
+                        report(i, result)
+            except BaseException:
+                # on_progress raised (e.g. the user cancelled): drop the workbooks not started yet
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+
+    if cache is not None:
+        for i in pending:
+            if results[i] is not None:
+                try:
+                    cache.put(sources[i], results[i])
+                except OSError:
+                    pass  # a full or read-only cache folder must not break loading
+
+    # keep the order of the sources so the output matches a sequential load
+    errors = [(source_name(sources[i]), failed[i]) for i in sorted(failed)]
+    return [df for df in results if df is not None], errors
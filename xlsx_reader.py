@@ -0,0 +1,233 @@
+"""
+Read only the needed columns of a North.data workbook.
+
+pd.read_excel builds a Python object for every cell of the sheet, including the nine columns
+preprocess_excel drops right away. read_columns streams the sheet XML out of the .xlsx archive
+with expat instead (like openpyxl's read-only mode, but without cell or element objects) and keeps
+the values of the wanted columns only:
+- text cells point into the workbook's shared-strings table; their indexes become the codes of a
+  categorical column directly (each distinct label is decoded once, not once per row),
+- number cells are collected as text and converted column by column with numpy (whole numbers
+  become int64, like pd.read_excel).
+
+When python-calamine is installed, pd.read_excel(engine='calamine', usecols=...) is used instead: it
+parses the workbook in Rust and only converts the wanted columns.
+
+Cell formats are not read, so a date-formatted cell comes back as its Excel serial number (the trial
+columns are plain numbers and text). Columns without a header are skipped; repeated headers are
+renamed name.1, name.2, ... like pd.read_excel does. The row and cell references (r attributes) are
+optional in OOXML; where a writer leaves them out, the position follows the previous row or cell.
+
+Compare with pd.read_excel on the bundled workbooks with:  python benchmarks/bench_xlsx_reader.py
+"""
+import importlib.util
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+
+import numpy as np
+import pandas as pd
+
+# without python-calamine the sheet is parsed here with expat
+ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') is not None else None
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+# tag names as expat reports them with namespace_separator=' '
+ROW_TAG, C_TAG, V_TAG, T_TAG = (f"{NS[1:-1]} {name}" for name in ('row', 'c', 'v', 't'))
+
+
+def _first_sheet_path(archive):
+    """Path in the archive of the first sheet (the one pd.read_excel reads by default)."""
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{NS}sheets/{NS}sheet')
+    rel_id = sheet.get(f'{REL_NS}id')
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(f'{PKG_REL_NS}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    raise ValueError("workbook has no first sheet")
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    for _, element in ET.iterparse(archive.open('xl/sharedStrings.xml')):
+        if element.tag == f'{NS}si':
+            # plain <t> or rich text runs <r><t>; phonetic hints (<rPh>) are not part of the value
+            phonetic = {t for rph in element.iter(f'{NS}rPh') for t in rph.iter(f'{NS}t')}
+            strings.append(''.join(t.text or '' for t in element.iter(f'{NS}t') if t not in phonetic))
+            element.clear()
+    return strings
+
+
+def _column_number(letters):
+    """1 for column A, 27 for AA, ..."""
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord('A') + 1
+    return number
+
+
+def _unique_names(names):
+    """
+    names with the repeated ones renamed name.1, name.2, ... as pd.read_excel does (skipping a
+    suffix that another column of the header already has).
+    """
+    names = list(names)
+    counts = {}
+    for i, name in enumerate(names):
+        original, count = name, counts.get(name, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def _column(cells, n_rows, shared):
+    """Build one column from its cells: lists of row positions, cell types and raw values."""
+    rows, kinds, raws = cells
+    kind_set = set(kinds)
+    rows = np.array(rows, dtype=np.int64)
+    if kind_set == {'s'}:
+        # shared-string indexes are the categorical codes
+        indexes = np.array(raws, dtype=np.int64)
+        used, codes = np.unique(indexes, return_inverse=True)
+        categories = [shared[i] for i in used]
+        if len(set(categories)) == len(categories):  # the same text twice in the table needs decoding
+            # sorted categories, as astype('category') gives (groupby follows the category order)
+            order = sorted(range(len(categories)), key=categories.__getitem__)
+            rank = np.empty(len(order), dtype=np.int32)
+            rank[order] = np.arange(len(order), dtype=np.int32)
+            all_codes = np.full(n_rows, -1, dtype=np.int32)
+            all_codes[rows] = rank[codes]
+            return pd.Categorical.from_codes(all_codes, categories=[categories[i] for i in order])
+    if kind_set == {'n'}:
+        values = np.full(n_rows, np.nan)
+        values[rows] = np.array(raws, dtype=float)
+        whole = len(raws) == n_rows and np.all(values == np.round(values))
+        return values.astype(np.int64) if whole and len(values) else values
+    if kind_set == {'b'} and len(raws) == n_rows:
+        values = np.zeros(n_rows, dtype=bool)
+        values[rows] = np.array(raws) == '1'
+        return values
+    # mixed text and numbers (or repeated shared strings): plain Python objects like pd.read_excel
+    values = np.full(n_rows, np.nan, dtype=object)
+    for row, kind, raw in zip(rows, kinds, raws):
+        if kind == 's':
+            values[row] = shared[int(raw)]
+        elif kind == 'n':
+            number = float(raw)
+            values[row] = int(number) if number.is_integer() else number
+        elif kind == 'b':
+            values[row] = raw == '1'
+        else:
+            values[row] = raw
+    return values
+
+
+def _sheet_cells(sheet, shared, wanted):
+    """
+    Parse the sheet XML with expat (no element objects): the cells of each wanted column by header
+    name (see _column) and the number of data rows.
+    """
+    header_row = None
+    columns = {}  # column number -> cells, for the wanted columns
+    cells = {}  # name -> ([row position], [cell type], [raw value])
+    numbers = {}  # column letters -> column number
+    header = {}  # column number -> name, until the header row is complete
+    last_row = 0
+    cell = [0, 0, None]  # row and column number of the open (or last) <c>, and its type
+    text = None  # text of the open <v> (or <t> of an inline string), None outside of them
+
+    def start(tag, attrs):
+        nonlocal text
+        if tag == C_TAG:
+            ref = attrs.get('r')
+            if ref is None:  # the cell after the previous one
+                cell[1] += 1
+            else:
+                letters = ref.rstrip('0123456789')
+                cell[0] = int(ref[len(letters):])
+                number = numbers.get(letters)
+                cell[1] = number if number is not None else numbers.setdefault(letters, _column_number(letters))
+            cell[2] = attrs.get('t', 'n')
+            text = None
+        elif tag in (V_TAG, T_TAG):
+            text = [] if text is None else text
+        elif tag == ROW_TAG:
+            ref = attrs.get('r')
+            cell[0] = int(ref) if ref is not None else cell[0] + 1
+            cell[1] = 0
+
+    def data(chunk):
+        if text is not None:
+            text.append(chunk)
+
+    def take_header():
+        nonlocal header
+        for number, name in zip(header, _unique_names(header.values())):
+            if wanted(name):
+                columns[number] = cells[name] = ([], [], [])
+        header = None
+
+    def end(tag):
+        nonlocal text, header_row, last_row
+        if tag != C_TAG or text is None:
+            return
+        raw, kind = ''.join(text), cell[2]
+        text = None
+        row, number = cell[0], cell[1]
+        if kind in ('inlineStr', 'e'):  # inline text, error value
+            kind = 'str'
+        if header_row is None:
+            header_row = row
+        if row == header_row:
+            header[number] = shared[int(raw)] if kind == 's' else raw
+            return
+        if header is not None:
+            take_header()
+        last_row = row
+        column = columns.get(number)
+        if column is not None:
+            column[0].append(row - header_row - 1)
+            column[1].append(kind)
+            column[2].append(raw)
+
+    parser = expat.ParserCreate(namespace_separator=' ')
+    parser.buffer_text = True
+    parser.StartElementHandler, parser.CharacterDataHandler, parser.EndElementHandler = start, data, end
+    parser.ParseFile(sheet)
+    if header is not None:
+        take_header()
+    n_rows = max(last_row - header_row, 0) if header_row is not None else 0
+    return cells, n_rows
+
+
+def _read_xml(source, wanted):
+    with zipfile.ZipFile(source) as archive:
+        shared = _shared_strings(archive)
+        with archive.open(_first_sheet_path(archive)) as sheet:
+            cells, n_rows = _sheet_cells(sheet, shared, wanted)
+    return pd.DataFrame({name: _column(column_cells, n_rows, shared) for name, column_cells in cells.items()},
+                        index=pd.RangeIndex(n_rows))
+
+
+def read_columns(source, drop=()):
+    """
+    The first sheet of a workbook (path or binary file object) without the columns named in drop.
+    Header names are taken from the first row, as pd.read_excel does.
+    """
+    drop = set(drop)
+    if hasattr(source, 'seek'):
+        source.seek(0)  # Streamlit hands back the same buffer on every rerun
+    if ENGINE is not None:
+        return pd.read_excel(source, engine=ENGINE, usecols=lambda name: name not in drop)
+    return _read_xml(source, lambda name: name not in drop)